@@ -0,0 +1,228 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for headless batch processing of a whole directory of flight
+  *          (NMEA) and PPG raw data logs across a pool of worker processes.
+  *
+  *          Every log gets one plot and one JSON summary in the output directory, under the
+  *          same subdirectories as the log below the input directory; the timing of each file
+  *          is reported back to the caller.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import concurrent.futures
+import glob
+import json
+import logging as log
+import os
+import time
+
+import numpy as np
+
+from cache_utility import cached_parse
+from gnss_utility import parse_track
+from ppg_utility import parse_all_raw_mmap
+from plot_utility import render_flight_route, render_ppg, PLOT_UTILITY__TRUE
+
+# log file extensions collected from a directory
+BATCH_UTILITY__LOG_FILE_EXTENSIONS = (".txt",)
+# number of bytes read to tell GNSS and PPG logs apart
+BATCH_UTILITY__SNIFF_SIZE = 256
+BATCH_UTILITY__NMEA_MARKER = b"$GP"
+# log types
+BATCH_UTILITY__LOG_TYPE_GNSS = "gnss"
+BATCH_UTILITY__LOG_TYPE_PPG = "ppg"
+# output names
+BATCH_UTILITY__PLOT_FORMAT = "png"
+BATCH_UTILITY__SUMMARY_SUFFIX = ".summary.json"
+
+
+def collect_log_files(path=None):
+    """
+    @brief: list the log files of a directory (recursively) or matching a glob pattern.
+    @param:
+        path: directory, glob pattern (e.g. "logs/**/*.TXT") or single file.
+    @returns:
+        sorted list of file paths.
+    """
+    if os.path.isdir(path):
+        log_files = []
+        for root, directories, filenames in os.walk(path):
+            for filename in filenames:
+                if filename.lower().endswith(BATCH_UTILITY__LOG_FILE_EXTENSIONS):
+                    log.debug(filename)
+                    log_files.append(os.path.join(root, filename))
+    else:
+        log_files = [name for name in glob.glob(path, recursive=True) if os.path.isfile(name)]
+    log.info(f"Number of log files to parse: {len(log_files)}")
+    return sorted(log_files)
+
+
+def log_type(log_file=None):
+    """
+    @brief: tell a GNSS log from a PPG raw data log by its first bytes.
+    @returns:
+        BATCH_UTILITY__LOG_TYPE_GNSS, BATCH_UTILITY__LOG_TYPE_PPG or None if neither.
+    """
+    with open(log_file, 'rb') as lf:
+        head = lf.read(BATCH_UTILITY__SNIFF_SIZE)
+    if BATCH_UTILITY__NMEA_MARKER in head:
+        return BATCH_UTILITY__LOG_TYPE_GNSS
+    if head.strip()[:1].isdigit():
+        return BATCH_UTILITY__LOG_TYPE_PPG
+    return None
+
+
+def _input_root(path, log_files):
+    """
+    @brief: directory the output names of the log files are relative to: the input directory,
+    or the deepest directory holding all files matched by a glob pattern.
+    """
+    if os.path.isdir(path):
+        return path
+    if not log_files:
+        return None
+    return os.path.commonpath([os.path.dirname(os.path.abspath(name)) for name in log_files])
+
+
+def _finite(value):
+    """
+    @brief: value as a float, or None (JSON null) for NaN and infinity.
+    """
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def _parse(log_file, name, parse, use_cache, stats=None):
+    if use_cache:
+        return cached_parse(log_file, name, parse, stats)
+    return parse(log_file) if stats is None else parse(log_file, stats=stats)
+
+
+def _summarise_gnss(log_file, output_file, timing, use_cache):
+    stats = {}
+    start = time.perf_counter()
+    # the positions come from the track table, the log is decoded (or cached) once
+    track = _parse(log_file, "track", parse_track, use_cache, stats)
+    fixed = ~(np.isnan(track["latitude"]) | np.isnan(track["longitude"]))
+    latitude, longitude = track["latitude"][fixed], track["longitude"][fixed]
+    timing["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rendered = render_flight_route(latitude, longitude, output_file)
+    timing["render"] = time.perf_counter() - start
+    summary = {
+        "fixes": int(latitude.size),
+        "epochs": int(track["utc_time"].size),
+        "rejected_sentences": stats.get("rejected", 0),
+    }
+    if latitude.size:
+        altitude = track["altitude"][~np.isnan(track["altitude"])]
+        summary.update({
+            "latitude_min": _finite(latitude.min()), "latitude_max": _finite(latitude.max()),
+            "longitude_min": _finite(longitude.min()), "longitude_max": _finite(longitude.max()),
+            "altitude_max": _finite(altitude.max()) if altitude.size else None,
+            "utc_start": _finite(track["utc_time"][0]),
+            "utc_end": _finite(track["utc_time"][-1]),
+        })
+    return rendered, summary
+
+
+def _summarise_ppg(log_file, output_file, timing, use_cache):
+    start = time.perf_counter()
+    ppg_array = _parse(log_file, "ppg", parse_all_raw_mmap, use_cache)
+    timing["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rendered = render_ppg(np.arange(1, ppg_array.size + 1), ppg_array, output_file)
+    timing["render"] = time.perf_counter() - start
+    summary = {"samples": int(ppg_array.size)}
+    if ppg_array.size:
+        summary.update({"ppg_min": int(ppg_array.min()), "ppg_max": int(ppg_array.max()),
+                        "ppg_mean": _finite(ppg_array.mean())})
+    return rendered, summary
+
+
+def process_log_file(log_file=None, output_dir=None, file_format=None, use_cache=True,
+                     input_root=None):
+    """
+    @brief: decode one log, write its plot and JSON summary into output_dir. Runs in a
+    worker process.
+    @param:
+        log_file: Full path of the log file.
+        output_dir: directory for the plot and the summary.
+        file_format: plot file format (png, svg, pdf), None for png.
+        use_cache: load unchanged logs from the decoded log cache (cache_utility).
+        input_root: directory the log was collected from; the outputs keep the log's
+                    subdirectories below it, so logs of the same name do not collide. None
+                    names the outputs after the log file only.
+    @returns:
+        dict with the log file, its type, output files, summary and per-stage timing in
+        seconds; "error" is set instead of the outputs if the file could not be processed.
+        Non-finite summary values are written as null.
+    """
+    start = time.perf_counter()
+    result = {"log_file": log_file, "type": None, "timing": {}}
+    try:
+        result["type"] = log_type(log_file)
+        if result["type"] is None:
+            result["error"] = "not a GNSS or PPG log"
+            return result
+        name = (os.path.relpath(log_file, input_root) if input_root
+                else os.path.basename(log_file))
+        stem = os.path.join(output_dir, os.path.splitext(name)[0])
+        os.makedirs(os.path.dirname(stem), exist_ok=True)
+        plot_file = stem + "." + (file_format or BATCH_UTILITY__PLOT_FORMAT)
+        summarise = (_summarise_gnss if result["type"] == BATCH_UTILITY__LOG_TYPE_GNSS
+                     else _summarise_ppg)
+        rendered, summary = summarise(log_file, plot_file, result["timing"], use_cache)
+        summary["log_file"] = log_file
+        summary["type"] = result["type"]
+        summary_file = stem + BATCH_UTILITY__SUMMARY_SUFFIX
+        with open(summary_file, 'w') as sf:
+            json.dump(summary, sf, indent=2, allow_nan=False)
+        result.update({"summary": summary, "summary_file": summary_file,
+                       "plot_file": plot_file if rendered == PLOT_UTILITY__TRUE else None})
+    except Exception as error:
+        # a log the decoders choke on is reported with the others, it does not stop the pool
+        result["error"] = f"{type(error).__name__}: {error}"
+    finally:
+        result["timing"]["total"] = time.perf_counter() - start
+    return result
+
+
+def batch_process(path=None, output_dir=None, workers=None, file_format=None, use_cache=True):
+    """
+    @brief: process every log under path in parallel, one worker process per file.
+    @param:
+        path: directory, glob pattern or single file, see collect_log_files().
+        output_dir: directory for plots and summaries, created if missing.
+        workers: number of worker processes, None for one per CPU core.
+        file_format: plot file format (png, svg, pdf), None for png.
+        use_cache: load unchanged logs from the decoded log cache (cache_utility).
+    @returns:
+        list of the process_log_file() results, in log file order.
+    """
+    log_files = collect_log_files(path)
+    input_root = _input_root(path, log_files)
+    os.makedirs(output_dir, exist_ok=True)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(process_log_file, log_files, [output_dir] * len(log_files),
+                             [file_format] * len(log_files), [use_cache] * len(log_files),
+                             [input_root] * len(log_files)))
+
+
+def print_batch_report(results=None):
+    """
+    @brief: print one timing line per processed log and the batch total.
+    """
+    for result in results:
+        timing = result["timing"]
+        if "error" in result:
+            print(f"SKIPPED {result['log_file']}: {result['error']}")
+        else:
+            print(f"{result['type']:4} parse {timing['parse']:8.3f}s render "
+                  f"{timing['render']:8.3f}s total {timing['total']:8.3f}s  {result['log_file']}")
+    print(f"processed {sum('error' not in result for result in results)} of "
+          f"{len(results)} log files")
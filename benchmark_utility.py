@@ -0,0 +1,117 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for benchmarking the command line tools and the exporters.
+  *
+  *          Cold start is measured as the wall time of a fresh interpreter running a tool with
+  *          --help, i.e. interpreter start, module imports and argument parsing, which is what
+  *          a render server pays on every invocation.
+  *
+  *          Export throughput is measured per writer of export_utility on the same columns, in
+  *          rows and output megabytes per second.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from export_utility import EXPORT_UTILITY__FORMATS, EXPORT_UTILITY__FORMAT_NPY, export_columns
+
+# tools measured by default, relative to this module
+BENCHMARK_UTILITY__TOOLS = ("gnss-plots.py", "ppg-raw-data-plots.py")
+BENCHMARK_UTILITY__COLD_START_REPEATS = 5
+BENCHMARK_UTILITY__COLD_START_ARGS = ("--help",)
+BENCHMARK_UTILITY__EXPORT_REPEATS = 3
+# log exported by the command line benchmark
+BENCHMARK_UTILITY__EXPORT_LOG = os.path.join("data", "gps.txt")
+BYTES_PER_MEGABYTE = 1024 * 1024
+
+
+def benchmark_cold_start(tools=BENCHMARK_UTILITY__TOOLS,
+                         repeats=BENCHMARK_UTILITY__COLD_START_REPEATS):
+    """
+    @brief: time fresh interpreter runs of each tool with --help.
+    @param:
+        tools: script file names, relative to this module's directory.
+        repeats: runs per tool.
+    @returns:
+        dict tool -> {"min": seconds, "median": seconds, "runs": list of seconds}
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for tool in tools:
+        command = [sys.executable, os.path.join(here, tool), *BENCHMARK_UTILITY__COLD_START_ARGS]
+        runs = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=here, check=True, stdout=subprocess.DEVNULL)
+            runs.append(time.perf_counter() - start)
+        results[tool] = {"min": min(runs), "median": statistics.median(runs), "runs": runs}
+    return results
+
+
+def _output_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def benchmark_export(columns=None, formats=EXPORT_UTILITY__FORMATS,
+                     repeats=BENCHMARK_UTILITY__EXPORT_REPEATS):
+    """
+    @brief: time each export writer on the same columns, into a temporary directory.
+    @param:
+        columns: dict of equally long column arrays.
+        formats: export formats to measure.
+        repeats: runs per format, the fastest counts.
+    @returns:
+        dict format -> {"seconds", "rows_per_second", "megabytes_per_second", "bytes"} of the
+        fastest run, or {"error": message} if the writer is unavailable (e.g. no pyarrow).
+    """
+    rows = len(next(iter(columns.values())))
+    results = {}
+    output_dir = tempfile.mkdtemp()
+    try:
+        for file_format in formats:
+            output = os.path.join(output_dir, "export")
+            if file_format != EXPORT_UTILITY__FORMAT_NPY:
+                output += "." + file_format
+            runs = []
+            try:
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    export_columns(columns, output, file_format)
+                    runs.append(time.perf_counter() - start)
+            except ImportError as error:
+                results[file_format] = {"error": str(error)}
+                continue
+            size = _output_size(output)
+            seconds = min(runs)
+            results[file_format] = {"seconds": seconds, "rows_per_second": rows / seconds,
+                                    "megabytes_per_second": size / BYTES_PER_MEGABYTE / seconds,
+                                    "bytes": size}
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return results
+
+
+if __name__ == '__main__':
+    for tool, timing in benchmark_cold_start().items():
+        print(f"cold start {tool}: min {timing['min'] * 1000:.1f} ms, "
+              f"median {timing['median'] * 1000:.1f} ms")
+
+    from gnss_utility import parse_track
+    track = parse_track(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     BENCHMARK_UTILITY__EXPORT_LOG))
+    for file_format, timing in benchmark_export(track).items():
+        if "error" in timing:
+            print(f"export {file_format:8}: {timing['error']}")
+        else:
+            print(f"export {file_format:8}: {timing['rows_per_second']:12.0f} rows/s "
+                  f"{timing['megabytes_per_second']:8.1f} MB/s  {timing['seconds'] * 1000:8.1f} ms")
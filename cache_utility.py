@@ -0,0 +1,256 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for caching decoded logs on disk, so a log that has not changed
+  *          is loaded as memory-mapped .npy arrays instead of being parsed again.
+  *
+  *          An entry is one directory per (log path, decoder, decoder version, decoder options)
+  *          holding one .npy file per decoded array and meta.json with the size, mtime and
+  *          BLAKE2b hash of the log it was built from. An entry is used when size and mtime
+  *          still match; if only the mtime changed the content hash decides. Anything else
+  *          rebuilds the entry. The least recently used entries are evicted once the cache grows
+  *          beyond its size cap.
+  *
+  *          The cache directory is $LOG_CACHE_DIR, or ~/.cache/log-plots.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import hashlib
+import json
+import logging as log
+import mmap
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_READ, stage
+
+CACHE_UTILITY__DIRECTORY_ENVIRONMENT = "LOG_CACHE_DIR"
+CACHE_UTILITY__DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "log-plots")
+# total size of all entries before the least recently used ones are evicted
+CACHE_UTILITY__MAX_BYTES = 1024 * 1024 * 1024
+# bump when the stored layout changes; old entries are then rebuilt
+CACHE_UTILITY__FORMAT_VERSION = 2
+# version of the decoder behind each cached kind (the name up to its first "-", e.g. "grid"
+# for "grid-z16"); bump it when the decoder changes its result, so entries of that kind are
+# rebuilt even though their layout is the same
+CACHE_UTILITY__DECODER_VERSIONS = {"gpgga": 2, "track": 2, "ppg": 2, "grid": 1}
+# kinds built from another cached kind; the version of that one is part of their key too
+CACHE_UTILITY__DERIVED_KINDS = {"grid": "track"}
+CACHE_UTILITY__KIND_SEPARATOR = "-"
+CACHE_UTILITY__META_FILE = "meta.json"
+CACHE_UTILITY__ARRAY_SUFFIX = ".npy"
+CACHE_UTILITY__HASH_CHUNK_SIZE = 16 * 1024 * 1024
+# how the decoded result is rebuilt from its arrays
+CACHE_UTILITY__KIND_ARRAY = "array"
+CACHE_UTILITY__KIND_TUPLE = "tuple"
+CACHE_UTILITY__KIND_DICT = "dict"
+
+
+def cache_directory(cache_dir=None) -> str:
+    """
+    @brief: the cache directory to use: cache_dir, $LOG_CACHE_DIR or the default.
+    """
+    return (cache_dir or os.environ.get(CACHE_UTILITY__DIRECTORY_ENVIRONMENT) or
+            CACHE_UTILITY__DEFAULT_DIRECTORY)
+
+
+def content_hash(log_file=None) -> str:
+    """
+    @brief: BLAKE2b hex digest of a file's content, hashed from a read-only mapping.
+    """
+    digest = hashlib.blake2b()
+    with open(log_file, 'rb') as lf:
+        if os.fstat(lf.fileno()).st_size:
+            with mmap.mmap(lf.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                view = memoryview(data)
+                for start in range(0, len(view), CACHE_UTILITY__HASH_CHUNK_SIZE):
+                    digest.update(view[start:start + CACHE_UTILITY__HASH_CHUNK_SIZE])
+                view.release()
+    return digest.hexdigest()
+
+
+def decoder_version(name=None) -> str:
+    """
+    @brief: version of the decoder of a cached kind, including the kinds it is built from;
+    "0" for kinds without a registered version.
+    """
+    kind = name.split(CACHE_UTILITY__KIND_SEPARATOR)[0]
+    version = str(CACHE_UTILITY__DECODER_VERSIONS.get(kind, 0))
+    if kind in CACHE_UTILITY__DERIVED_KINDS:
+        version += "." + decoder_version(CACHE_UTILITY__DERIVED_KINDS[kind])
+    return version
+
+
+def _options_key(options):
+    return json.dumps(options or {}, sort_keys=True, default=repr)
+
+
+def _entry_directory(cache_dir, log_file, name, options=None):
+    key = (f"{CACHE_UTILITY__FORMAT_VERSION}:{name}:{decoder_version(name)}:"
+           f"{_options_key(options)}:{os.path.abspath(log_file)}")
+    return os.path.join(cache_dir, hashlib.blake2b(key.encode(), digest_size=16).hexdigest())
+
+
+def _read_meta(entry):
+    try:
+        with open(os.path.join(entry, CACHE_UTILITY__META_FILE)) as mf:
+            return json.load(mf)
+    except (OSError, ValueError):
+        return None
+
+
+def _entry_valid(entry, meta, log_file, status):
+    """
+    @brief: True if the entry was built from the current content of log_file. A matching
+    content hash with a new mtime (touched or copied log) refreshes the stored mtime.
+    """
+    if meta is None or meta.get("size") != status.st_size:
+        return False
+    if meta.get("mtime_ns") == status.st_mtime_ns:
+        return True
+    if meta.get("hash") != content_hash(log_file):
+        return False
+    meta["mtime_ns"] = status.st_mtime_ns
+    _write_meta(entry, meta)
+    return True
+
+
+def _write_meta(entry, meta):
+    with open(os.path.join(entry, CACHE_UTILITY__META_FILE), 'w') as mf:
+        json.dump(meta, mf, indent=2)
+
+
+def _load_entry(entry, meta):
+    with stage(INSTRUMENT_UTILITY__STAGE_READ) as read_stage:
+        arrays = [np.load(os.path.join(entry, array_name + CACHE_UTILITY__ARRAY_SUFFIX),
+                          mmap_mode="r")
+                  for array_name in meta["arrays"]]
+        read_stage.add(nbytes=sum(array.nbytes for array in arrays))
+    if meta["kind"] == CACHE_UTILITY__KIND_ARRAY:
+        return arrays[0]
+    if meta["kind"] == CACHE_UTILITY__KIND_TUPLE:
+        return tuple(arrays)
+    return dict(zip(meta["arrays"], arrays))
+
+
+def _store_entry(cache_dir, entry, meta, result):
+    """
+    @brief: write the arrays of result and meta.json into a new directory, then move it in
+    place of the entry, so readers never see a half written entry.
+    """
+    if isinstance(result, np.ndarray):
+        kind, arrays = CACHE_UTILITY__KIND_ARRAY, {"0": result}
+    elif isinstance(result, tuple):
+        kind, arrays = CACHE_UTILITY__KIND_TUPLE, {str(i): array for i, array in enumerate(result)}
+    else:
+        kind, arrays = CACHE_UTILITY__KIND_DICT, dict(result)
+    meta.update({"kind": kind, "arrays": list(arrays)})
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=cache_dir)
+    try:
+        for array_name, array in arrays.items():
+            np.save(os.path.join(staging, array_name + CACHE_UTILITY__ARRAY_SUFFIX),
+                    np.asarray(array))
+        _write_meta(staging, meta)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(staging, entry)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def _entry_size(entry):
+    return sum(os.path.getsize(os.path.join(entry, filename)) for filename in os.listdir(entry))
+
+
+def evict(cache_dir=None, max_bytes=CACHE_UTILITY__MAX_BYTES):
+    """
+    @brief: delete least recently used entries until the cache is at most max_bytes.
+    @returns:
+        number of entries deleted.
+    """
+    cache_dir = cache_directory(cache_dir)
+    entries = []
+    for entry_name in os.listdir(cache_dir) if os.path.isdir(cache_dir) else ():
+        entry = os.path.join(cache_dir, entry_name)
+        try:
+            # meta.json's mtime is the last time the entry was used
+            used = os.path.getmtime(os.path.join(entry, CACHE_UTILITY__META_FILE))
+            entries.append((used, _entry_size(entry), entry))
+        except OSError:
+            continue
+    total = sum(size for _, size, _ in entries)
+    deleted = 0
+    for _, size, entry in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+        deleted += 1
+    return deleted
+
+
+def cached_parse(log_file=None, name=None, parse=None, stats=None, cache_dir=None,
+                 max_bytes=CACHE_UTILITY__MAX_BYTES, options=None):
+    """
+    @brief: parse(log_file, **options) through the cache.
+    @param:
+        log_file: Full path of the log file.
+        name: name of the decoder, part of the cache key (e.g. "gpgga", "track"), as is its
+              version in CACHE_UTILITY__DECODER_VERSIONS.
+        parse: function(log_file) returning an array, a tuple of arrays or a dict of arrays;
+               called as parse(log_file, stats=...) when stats is given.
+        stats: optional dict of counters filled by parse; they are stored with the entry and
+               added to stats again when the entry is used.
+        cache_dir: cache directory, None for cache_directory().
+        max_bytes: size cap of the cache, enforced after storing a new entry.
+        options: optional dict of keyword arguments of parse that change its result (e.g.
+               {"drop_invalid": False}); part of the cache key, so every combination has its
+               own entry. Options that do not change the result, such as a worker count,
+               are bound with functools.partial instead.
+    @returns:
+        the result of parse; read-only memory-mapped arrays when it came from the cache.
+    """
+    cache_dir = cache_directory(cache_dir)
+    options = dict(options or {})
+    entry = _entry_directory(cache_dir, log_file, name, options)
+    status = os.stat(log_file)
+    meta = _read_meta(entry)
+    # an entry built without counters cannot answer a call that wants them
+    if _entry_valid(entry, meta, log_file, status) and \
+            (stats is None or meta.get("stats") is not None):
+        try:
+            result = _load_entry(entry, meta)
+        except (OSError, ValueError, KeyError):
+            log.info(f"cache entry of {log_file} unreadable, parsing again")
+        else:
+            os.utime(os.path.join(entry, CACHE_UTILITY__META_FILE))
+            if stats is not None:
+                for key, value in meta["stats"].items():
+                    stats[key] = stats.get(key, 0) + value
+            return result
+
+    if stats is None:
+        parse_stats = None
+        result = parse(log_file, **options)
+    else:
+        parse_stats = {}
+        result = parse(log_file, stats=parse_stats, **options)
+        for key, value in parse_stats.items():
+            stats[key] = stats.get(key, 0) + value
+    meta = {"log_file": os.path.abspath(log_file), "name": name,
+            "decoder_version": decoder_version(name),
+            "options": json.loads(_options_key(options)), "size": status.st_size,
+            "mtime_ns": status.st_mtime_ns, "hash": content_hash(log_file),
+            "stats": parse_stats}
+    try:
+        _store_entry(cache_dir, entry, meta, result)
+        evict(cache_dir, max_bytes)
+    except OSError as error:
+        # a read-only or full cache directory only costs the speed-up
+        log.warning(f"could not cache {log_file}: {error}")
+    return result
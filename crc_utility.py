@@ -6,61 +6,184 @@
   **************************************************************************************************
 """
 
+import functools
+import zlib
+
+import numpy as np
+
 # CRC polynomials
 CRC_UTILITY__CRC_8_CCITT_NORMAL = 0x07
 CRC_UTILITY__CRC_8_CCITT_REVERSED = 0xE0
 CRC_UTILITY__CRC_8_TH_SHT4X = 0x31
+# CRC-16/KERMIT (CCITT 0x1021, least significant bit first)
+CRC_UTILITY__CRC_16_CCITT_REVERSED = 0x8408
+# NovAtel 32 bit CRC (CRC-32 0x04C11DB7, least significant bit first)
+CRC_UTILITY__CRC_32_REVERSED = 0xEDB88320
+
+# CRC register sizes
+CRC_UTILITY__CRC_8_MASK = 0xFF
+CRC_UTILITY__CRC_16_MASK = 0xFFFF
+CRC_UTILITY__CRC_32_MASK = 0xFFFFFFFF
+CRC_UTILITY__TABLE_SIZE = 256
+CRC_UTILITY__BITS_PER_BYTE = 8
+
 
-# Error Codes
-CRC_UTILITY__ERROR_INVALID_PARAMETER = 2
+# @brief    Build (once per polynomial) the 256 entry lookup table of a CRC8 computed least
+#           significant bit first. Tables are cached, so only the first call per polynomial
+#           pays for the bitwise loop.
+# @param    crc_polynomial  - reverse polynomial
+# @return   table           - bytes, table[i] is the CRC register after shifting in byte i
+#
+@functools.lru_cache(maxsize=None)
+def _crc8_lsb_table(crc_polynomial):
+    table = bytearray(CRC_UTILITY__TABLE_SIZE)
+    for index in range(CRC_UTILITY__TABLE_SIZE):
+        crc = index
+        for _ in range(CRC_UTILITY__BITS_PER_BYTE):
+            crc = (crc >> 1) ^ crc_polynomial if crc & 1 else crc >> 1
+        table[index] = crc
+    return bytes(table)
+
+
+# @brief    Build (once per polynomial) the 256 entry lookup table of a CRC8 computed most
+#           significant bit first.
+# @param    crc_polynomial  - normal polynomial
+# @return   table           - bytes, table[i] is the CRC register after shifting in byte i
+#
+@functools.lru_cache(maxsize=None)
+def _crc8_msb_table(crc_polynomial):
+    table = bytearray(CRC_UTILITY__TABLE_SIZE)
+    for index in range(CRC_UTILITY__TABLE_SIZE):
+        crc = index
+        for _ in range(CRC_UTILITY__BITS_PER_BYTE):
+            crc = (crc << 1) ^ crc_polynomial if crc & 0x80 else crc << 1
+        table[index] = crc & CRC_UTILITY__CRC_8_MASK
+    return bytes(table)
+
+
+# @brief    Build (once per polynomial) the 256 entry lookup table of a CRC16 computed least
+#           significant bit first.
+# @param    crc_polynomial  - reverse polynomial
+# @return   table           - tuple of 256 register values
+#
+@functools.lru_cache(maxsize=None)
+def _crc16_lsb_table(crc_polynomial):
+    table = []
+    for index in range(CRC_UTILITY__TABLE_SIZE):
+        crc = index
+        for _ in range(CRC_UTILITY__BITS_PER_BYTE):
+            crc = (crc >> 1) ^ crc_polynomial if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+# @brief    View data as unsigned bytes. bytes, bytearray and memoryview are taken as their
+#           raw bytes without copying. Integer numpy arrays and other sequences of integers
+#           are taken one byte per element (in C order), so crc([1, 2]) and
+#           crc(np.array([1, 2])) agree whatever the dtype; their values must be 0..255.
+# @param    data_ro         - bytes, bytearray, memoryview, integer numpy array or a sequence
+#                             of integers 0..255
+# @return   view            - memoryview of unsigned bytes, None if data is not byte data
+#
+def _as_bytes(data_ro):
+    if isinstance(data_ro, (bytes, bytearray, memoryview)):
+        view = memoryview(data_ro)
+        return view.cast('B') if view.contiguous else memoryview(view.tobytes())
+    if isinstance(data_ro, np.ndarray):
+        if data_ro.dtype.kind not in "iu" or \
+                (data_ro.size and (data_ro.min() < 0 or data_ro.max() > CRC_UTILITY__CRC_8_MASK)):
+            return None
+        return memoryview(data_ro.astype(np.uint8).tobytes())
+    try:
+        return memoryview(bytes(data_ro))
+    except (TypeError, ValueError):
+        return None
+
+
+# @brief    View the data of a CRC8 as unsigned bytes and check its polynomial.
+# @return   view            - memoryview of unsigned bytes
+# @raise    ValueError      - data is not byte data, or the polynomial is not 8 bit
+#
+def _crc8_arguments(data_ro, crc_polynomial):
+    data = _as_bytes(data_ro)
+    if data is None:
+        raise ValueError("CRC8 data must be bytes or integers in range(256)")
+    if not isinstance(crc_polynomial, int) or not 0 < crc_polynomial <= CRC_UTILITY__CRC_8_MASK:
+        raise ValueError(f"CRC8 polynomial must be an integer in 1..255: {crc_polynomial!r}")
+    return data
 
 
 # @brief    Function to calculate CRC8 checksum of given data, least significant bit first,
 #           both in terms of the algorithm and the polynomial to be used,
 #           which is the so called "reverse polynomial". The reverse polynomial
 #           CRC_UTILITY__CRC_8_CCITT_REVERSED should be used as crc_polynomial parameter.
-# @param    data_ro         - buffer containing the data
+# @param    data_ro         - buffer or integers containing the data (see _as_bytes)
 # @param    crc_polynomial  - To use for CRC Calculation
-# @return   error           - error result of funciton
+# @param    crc_init        - initial value of the CRC register
 # @return   crc_accumulator - CRC value result
+# @raise    ValueError      - data is not byte data, or the polynomial is not 8 bit
 #
+def calculate_crc8_lsb(data_ro, crc_polynomial, crc_init=0):
+    data = _crc8_arguments(data_ro, crc_polynomial)
+    table = _crc8_lsb_table(crc_polynomial)
+    crc_accumulator = crc_init & CRC_UTILITY__CRC_8_MASK
+    for byte in data:
+        crc_accumulator = table[crc_accumulator ^ byte]
+    return crc_accumulator
 
 
-
-#
-# CRC calc for TempHumidity Sensor samples
-#
-print("CRC8 for real samples")
-error, crc = calculate_crc8_lsb([0x10, 0xC5], CRC_UTILITY__CRC_8_TH_SHT4X)
-print(hex(crc))
-print("error is:", error)
-
-
-print("CRC8 for example")
-error, crc = calculate_crc8_lsb([0xEF, 0xBF], CRC_UTILITY__CRC_8_TH_SHT4X)
-print(hex(crc))
-error, crc = calculate_crc8_lsb([0xBF, 0xEF], CRC_UTILITY__CRC_8_TH_SHT4X)
-print(hex(crc))
-error, crc = calculate_crc8_lsb([0xBF, 0xEF], CRC_UTILITY__CRC_8_CCITT_REVERSED)
-print(hex(crc))
-
-print("created my own exercise Git repository for practice python")
-print("---------------------------------------------")
-#
-# verify CRC result by inserting the result into end of data array
+# @brief    Function to calculate CRC8 checksum of given data, most significant bit first,
+#           using the "normal polynomial", e.g. CRC_UTILITY__CRC_8_TH_SHT4X with crc_init
+#           0xFF for the Sensirion SHT4x temperature and humidity samples.
+# @param    data_ro         - buffer or integers containing the data (see _as_bytes)
+# @param    crc_polynomial  - To use for CRC Calculation
+# @param    crc_init        - initial value of the CRC register
+# @return   crc_accumulator - CRC value result
+# @raise    ValueError      - data is not byte data, or the polynomial is not 8 bit
 #
-print(calculate_crc16([0, 1, 2, 1, 0, 1, 0 ,0, 0xC61B]))
-
-print("Simon tried himself here") 
-print(hex(calculate_crc16([0x00, 0x01, 0x02, 4, 0, 1, 0, 0])))
+def calculate_crc8_msb(data_ro, crc_polynomial, crc_init=0):
+    data = _crc8_arguments(data_ro, crc_polynomial)
+    table = _crc8_msb_table(crc_polynomial)
+    crc_accumulator = crc_init & CRC_UTILITY__CRC_8_MASK
+    for byte in data:
+        crc_accumulator = table[crc_accumulator ^ byte]
+    return crc_accumulator
 
 
+# @brief    Function to calculate the CRC16 (CRC-16/KERMIT: polynomial 0x1021 least significant
+#           bit first, initial value 0, no final XOR) of given data. Appending the result to
+#           the data, low byte first, gives a CRC of 0.
+# @param    data_ro         - buffer or integers containing the data (see _as_bytes)
+# @param    crc_init        - initial value of the CRC register, pass a previous result to
+#                             continue the calculation over several buffers
+# @return   crc_accumulator - CRC value result
+# @raise    ValueError      - data is not byte data
 #
-# all data are in Hex
-#
-print('Hex of Caclulated CRC16:', hex(calculate_crc16([0x7E,0x10, 0x00, 0x01, 0x02, 0x01, 0x00, 0x01, 0x00, 0x00, 0x1B, 0xC6])))
+def calculate_crc16(data_ro, crc_init=0):
+    data = _as_bytes(data_ro)
+    if data is None:
+        raise ValueError("CRC16 data must be bytes or integers in range(256)")
+    table = _crc16_lsb_table(CRC_UTILITY__CRC_16_CCITT_REVERSED)
+    crc_accumulator = crc_init & CRC_UTILITY__CRC_16_MASK
+    for byte in data:
+        crc_accumulator = (crc_accumulator >> CRC_UTILITY__BITS_PER_BYTE) ^ \
+            table[(crc_accumulator ^ byte) & CRC_UTILITY__CRC_8_MASK]
+    return crc_accumulator
 
+
+# @brief    Function to calculate the NovAtel 32 bit CRC of given data, as appended to binary
+#           logs such as CORRIMUDATAS: polynomial CRC_UTILITY__CRC_32_REVERSED least
+#           significant bit first, initial value 0, no final XOR. zlib implements the same
+#           table-driven CRC-32 in C but with initial value and final XOR 0xFFFFFFFF, which
+#           the XORs below cancel.
+# @param    data_ro         - buffer or integers containing the data (see _as_bytes)
+# @param    crc_init        - initial value of the CRC register
+# @return   crc_accumulator - CRC value result
+# @raise    ValueError      - data is not byte data
 #
-# all data are in decimal
-#
-print('Caclulated CRC16 in decimal:', calculate_crc16([0, 1, 2, 1, 0, 1, 0 ,0, 125, 1782]))
+def calculate_crc32(data_ro, crc_init=0):
+    data = _as_bytes(data_ro)
+    if data is None:
+        raise ValueError("CRC32 data must be bytes or integers in range(256)")
+    crc_init = (crc_init & CRC_UTILITY__CRC_32_MASK) ^ CRC_UTILITY__CRC_32_MASK
+    return zlib.crc32(data, crc_init) ^ CRC_UTILITY__CRC_32_MASK
@@ -0,0 +1,200 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for bulk export of decoded GNSS tracks and PPG traces, given as
+  *          a dict of equally long column arrays (e.g. gnss_utility.decode_track()).
+  *
+  *          Columnar binary formats write every column in one call:
+  *            npz       numpy archive, one array per column
+  *            npy       directory of one .npy file per column, loadable with mmap_mode="r"
+  *            parquet   Apache Parquet (needs pyarrow)
+  *            feather   Arrow IPC file (needs pyarrow)
+  *          Text and spreadsheet formats:
+  *            csv       formatted a chunk of rows per %-operation instead of row by row
+  *            xlsx      openpyxl write-only (streaming) workbook, for spreadsheet users
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+
+import numpy as np
+
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_SAVE, stage
+
+EXPORT_UTILITY__FORMAT_NPZ = "npz"
+EXPORT_UTILITY__FORMAT_NPY = "npy"
+EXPORT_UTILITY__FORMAT_PARQUET = "parquet"
+EXPORT_UTILITY__FORMAT_FEATHER = "feather"
+EXPORT_UTILITY__FORMAT_CSV = "csv"
+EXPORT_UTILITY__FORMAT_XLSX = "xlsx"
+EXPORT_UTILITY__FORMATS = (EXPORT_UTILITY__FORMAT_NPZ, EXPORT_UTILITY__FORMAT_NPY,
+                           EXPORT_UTILITY__FORMAT_PARQUET, EXPORT_UTILITY__FORMAT_FEATHER,
+                           EXPORT_UTILITY__FORMAT_CSV, EXPORT_UTILITY__FORMAT_XLSX)
+EXPORT_UTILITY__NPY_SUFFIX = ".npy"
+# rows formatted per string operation when writing CSV
+EXPORT_UTILITY__CSV_CHUNK_ROWS = 65536
+EXPORT_UTILITY__CSV_DELIMITER = ","
+# shortest text that reads back to the same value (str of a Python float or int)
+EXPORT_UTILITY__CSV_VALUE_FORMAT = "%s"
+# cell written for NaN
+EXPORT_UTILITY__CSV_MISSING = ""
+EXPORT_UTILITY__XLSX_SHEET_TITLE = "data"
+
+
+def _check_columns(columns):
+    """
+    @brief: the columns as a dict of 1-D arrays of one length.
+    @raises:
+        ValueError if the columns are empty or differ in length.
+    """
+    columns = {name: np.asarray(values) for name, values in columns.items()}
+    lengths = {values.shape for values in columns.values()}
+    if not columns or len(lengths) != 1 or len(next(iter(lengths))) != 1:
+        raise ValueError("export needs 1-D columns of equal length")
+    return columns
+
+
+def export_npz(columns=None, output_file=None, compressed=False):
+    """
+    @brief: write the columns into one .npz archive.
+    """
+    columns = _check_columns(columns)
+    save = np.savez_compressed if compressed else np.savez
+    save(output_file, **columns)
+
+
+def export_npy(columns=None, output_dir=None):
+    """
+    @brief: write each column as output_dir/<name>.npy.
+    """
+    columns = _check_columns(columns)
+    os.makedirs(output_dir, exist_ok=True)
+    for name, values in columns.items():
+        np.save(os.path.join(output_dir, name + EXPORT_UTILITY__NPY_SUFFIX), values)
+
+
+def load_npy(output_dir=None):
+    """
+    @brief: read a directory written by export_npy() back as memory-mapped columns.
+    """
+    return {filename[:-len(EXPORT_UTILITY__NPY_SUFFIX)]:
+            np.load(os.path.join(output_dir, filename), mmap_mode="r")
+            for filename in sorted(os.listdir(output_dir))
+            if filename.endswith(EXPORT_UTILITY__NPY_SUFFIX)}
+
+
+def _arrow_table(columns):
+    try:
+        import pyarrow
+    except ImportError as error:
+        raise ImportError("parquet and feather export need pyarrow (pip install pyarrow)") \
+            from error
+    return pyarrow.table(_check_columns(columns))
+
+
+def export_parquet(columns=None, output_file=None):
+    """
+    @brief: write the columns as an Apache Parquet file; needs pyarrow.
+    """
+    table = _arrow_table(columns)
+    import pyarrow.parquet
+    pyarrow.parquet.write_table(table, output_file)
+
+
+def export_feather(columns=None, output_file=None):
+    """
+    @brief: write the columns as an Arrow IPC (Feather v2) file; needs pyarrow.
+    """
+    table = _arrow_table(columns)
+    import pyarrow.feather
+    pyarrow.feather.write_feather(table, output_file)
+
+
+def export_csv(columns=None, output_file=None, chunk_rows=EXPORT_UTILITY__CSV_CHUNK_ROWS):
+    """
+    @brief: write the columns as CSV with a header line.
+    @param:
+        columns: dict of column arrays.
+        output_file: CSV file to write.
+        chunk_rows: rows formatted per %-operation; one format string covers a whole chunk,
+                    so the per-value work happens inside str % tuple instead of a Python loop.
+    """
+    columns = _check_columns(columns)
+    names = list(columns)
+    rows = columns[names[0]].size
+    row_format = EXPORT_UTILITY__CSV_DELIMITER.join(
+        [EXPORT_UTILITY__CSV_VALUE_FORMAT] * len(names)) + "\n"
+    with open(output_file, 'w', newline='') as cf:
+        cf.write(EXPORT_UTILITY__CSV_DELIMITER.join(names) + "\n")
+        for start in range(0, rows, chunk_rows):
+            end = min(start + chunk_rows, rows)
+            # row-major values of the chunk as Python scalars, column order per row
+            values = [None] * ((end - start) * len(names))
+            for index, name in enumerate(names):
+                chunk = columns[name][start:end]
+                cells = chunk.tolist()
+                if chunk.dtype.kind == "f":
+                    # NaN is a missing value, written as an empty cell
+                    for row in np.flatnonzero(np.isnan(chunk)).tolist():
+                        cells[row] = EXPORT_UTILITY__CSV_MISSING
+                values[index::len(names)] = cells
+            cf.write((row_format * (end - start)) % tuple(values))
+
+
+def export_xlsx(columns=None, output_file=None):
+    """
+    @brief: write the columns as an Excel workbook with openpyxl in write-only mode, which
+    streams rows to disk instead of building every cell object in memory.
+    """
+    import openpyxl
+    columns = _check_columns(columns)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(EXPORT_UTILITY__XLSX_SHEET_TITLE)
+    sheet.append(list(columns))
+    column_values = [values.tolist() for values in columns.values()]
+    for row in zip(*column_values):
+        # NaN is not a valid spreadsheet number, it is left empty
+        sheet.append([None if value != value else value for value in row])
+    workbook.save(output_file)
+
+
+EXPORT_UTILITY__WRITERS = {
+    EXPORT_UTILITY__FORMAT_NPZ: export_npz,
+    EXPORT_UTILITY__FORMAT_NPY: export_npy,
+    EXPORT_UTILITY__FORMAT_PARQUET: export_parquet,
+    EXPORT_UTILITY__FORMAT_FEATHER: export_feather,
+    EXPORT_UTILITY__FORMAT_CSV: export_csv,
+    EXPORT_UTILITY__FORMAT_XLSX: export_xlsx,
+}
+
+
+def export_format(output_file=None, file_format=None) -> str:
+    """
+    @brief: the export format: file_format, else from the output file extension (no
+    extension means an npy directory).
+    @raises:
+        ValueError for an unknown format.
+    """
+    extension = os.path.splitext(output_file)[1][1:].lower()
+    file_format = file_format or extension or EXPORT_UTILITY__FORMAT_NPY
+    if file_format not in EXPORT_UTILITY__WRITERS:
+        raise ValueError(f"unknown export format: {file_format}")
+    return file_format
+
+
+def export_columns(columns=None, output_file=None, file_format=None):
+    """
+    @brief: write the columns with the writer of the export format.
+    @param:
+        columns: dict of equally long 1-D arrays.
+        output_file: file to write (directory for npy).
+        file_format: one of EXPORT_UTILITY__FORMATS, None to use the file extension.
+    @returns:
+        the format written.
+    """
+    file_format = export_format(output_file, file_format)
+    with stage(INSTRUMENT_UTILITY__STAGE_SAVE) as save_stage:
+        save_stage.add(lines=len(next(iter(columns.values()), ())))
+        EXPORT_UTILITY__WRITERS[file_format](columns, output_file)
+    return file_format
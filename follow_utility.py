@@ -0,0 +1,171 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for following growing GNSS and PPG logs (tail -f) while a
+  *          capture is still running.
+  *
+  *          Each poll reads only the bytes appended since the previous one, decodes the complete
+  *          lines among them and appends the values to growable numpy buffers; a partial last
+  *          line is kept until its line feed arrives. The file is never re-read from the start
+  *          unless it was replaced, which clears the buffers: it shrank (truncated), it is
+  *          another file than before (rotated, a new device / inode number), or its first bytes
+  *          changed (truncated and rewritten in place beyond the old end between two polls).
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+import time
+
+import numpy as np
+
+# initial rows of a growable buffer, doubled whenever it fills up
+FOLLOW_UTILITY__INITIAL_CAPACITY = 4096
+FOLLOW_UTILITY__GROWTH_FACTOR = 2
+# seconds between polls of the log file
+FOLLOW_UTILITY__POLL_INTERVAL_SECONDS = 1.0
+FOLLOW_UTILITY__LINE_FEED = b"\n"
+# leading bytes of the log compared on every poll to tell a rewritten file
+FOLLOW_UTILITY__SIGNATURE_SIZE = 64
+
+
+class GrowableBuffer:
+    """
+    @brief: preallocated 1-D numpy array with amortised O(1) appends.
+    """
+
+    def __init__(self, dtype, capacity=FOLLOW_UTILITY__INITIAL_CAPACITY):
+        self.data = np.empty(max(int(capacity), 1), dtype=dtype)
+        self.size = 0
+
+    def append(self, values: np.ndarray):
+        """
+        @brief: append values, reallocating to at least twice the capacity if they do not fit.
+        """
+        end = self.size + values.size
+        if end > self.data.size:
+            grown = np.empty(max(end, self.data.size * FOLLOW_UTILITY__GROWTH_FACTOR),
+                             dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = values
+        self.size = end
+
+    def clear(self):
+        self.size = 0
+
+    def view(self) -> np.ndarray:
+        """
+        @brief: the appended values, as a view valid until the next append.
+        """
+        return self.data[:self.size]
+
+
+class LogFollower:
+    """
+    @brief: incremental decoder of a log file that is still being written.
+    @param:
+        log_file: Full path of the log file, it does not need to exist yet.
+        decode: function of a buffer of whole lines returning one array or a tuple of
+                equally long arrays, e.g. gnss_utility.decode_gpgga or
+                ppg_utility.decode_ppg_raw.
+    Usage:
+        follower = LogFollower(log_file, decode_gpgga)
+        if follower.poll():
+            latitude, longitude = follower.columns()
+    """
+
+    def __init__(self, log_file=None, decode=None):
+        self.log_file = log_file
+        self.decode = decode
+        self.offset = 0
+        self.pending = b""
+        self.buffers = None
+        # (device, inode) and first bytes of the file read so far
+        self.identity = None
+        self.signature = b""
+
+    def _replaced(self, lf, status) -> bool:
+        """
+        @brief: True if the open log is not the file read so far.
+        """
+        if (status.st_dev, status.st_ino) != self.identity or status.st_size < self.offset:
+            return True
+        return lf.read(len(self.signature)) != self.signature
+
+    def poll(self) -> int:
+        """
+        @brief: decode the lines appended since the last poll.
+        @returns:
+            number of rows appended to the buffers, 0 if there was no complete new line.
+        """
+        try:
+            lf = open(self.log_file, 'rb')
+        except OSError:
+            return 0
+        with lf:
+            status = os.fstat(lf.fileno())
+            if self.offset and self._replaced(lf, status):
+                # truncated, rotated or rewritten by a new capture, start over
+                self.offset = 0
+                self.pending = b""
+                for buffer in self.buffers or ():
+                    buffer.clear()
+            self.identity = (status.st_dev, status.st_ino)
+            if status.st_size == self.offset:
+                return 0
+            lf.seek(self.offset)
+            data = lf.read(status.st_size - self.offset)
+        if self.offset == 0:
+            self.signature = data[:FOLLOW_UTILITY__SIGNATURE_SIZE]
+        self.offset += len(data)
+        data = self.pending + data
+        complete = data.rfind(FOLLOW_UTILITY__LINE_FEED) + 1
+        self.pending = data[complete:]
+        if complete == 0:
+            return 0
+
+        columns = self.decode(memoryview(data)[:complete])
+        if isinstance(columns, np.ndarray):
+            columns = (columns,)
+        if self.buffers is None:
+            self.buffers = [GrowableBuffer(column.dtype) for column in columns]
+        for buffer, column in zip(self.buffers, columns):
+            buffer.append(column)
+        return columns[0].size
+
+    def columns(self) -> tuple:
+        """
+        @brief: everything decoded so far, one array view per decoded column.
+        """
+        return tuple(buffer.view() for buffer in self.buffers or ())
+
+
+def follow(follower=None, on_update=None, interval=FOLLOW_UTILITY__POLL_INTERVAL_SECONDS,
+           idle_timeout=None):
+    """
+    @brief: poll a LogFollower and call on_update(*columns) whenever new rows arrived.
+    @param:
+        follower: LogFollower of the log.
+        on_update: callback taking the decoded columns.
+        interval: seconds between polls.
+        idle_timeout: stop after this many seconds without new rows, None to run until
+                      interrupted (Ctrl+C).
+    @returns:
+        total number of rows decoded.
+    """
+    rows = 0
+    last_update = time.monotonic()
+    try:
+        while True:
+            appended = follower.poll()
+            if appended:
+                rows += appended
+                last_update = time.monotonic()
+                on_update(*follower.columns())
+            elif idle_timeout is not None and time.monotonic() - last_update >= idle_timeout:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    return rows
@@ -0,0 +1,257 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for track analytics on decoded fixes: segment distances,
+  *          path length, ground speed, heading and climb rate.
+  *
+  *          Everything is computed on whole column arrays (gnss_utility.decode_track() tables),
+  *          one NumPy operation per quantity; no Python loop runs over the fixes. Segment i
+  *          runs from fix i - 1 to fix i, so the derived columns line up with the track rows
+  *          and their first value is NaN.
+  *
+  *          Distances are great circle (haversine, spherical earth) or ellipsoidal (Vincenty,
+  *          WGS84). The derived speed and heading are checked against what the receiver
+  *          reported in GPVTG, which gives a quick plausibility test of a log:
+  *            python geodesy_utility.py data/gps.txt
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import argparse
+
+import numpy as np
+
+from gnss_utility import GNSS_UTILITY__ROLLOVER_SECONDS, GNSS_UTILITY__SECONDS_PER_DAY
+
+GEODESY_UTILITY__EARTH_RADIUS_M = 6371008.8
+# WGS84 ellipsoid
+GEODESY_UTILITY__WGS84_A = 6378137.0
+GEODESY_UTILITY__WGS84_F = 1 / 298.257223563
+GEODESY_UTILITY__WGS84_B = GEODESY_UTILITY__WGS84_A * (1 - GEODESY_UTILITY__WGS84_F)
+GEODESY_UTILITY__VINCENTY_TOLERANCE = 1e-12
+GEODESY_UTILITY__VINCENTY_MAX_ITERATIONS = 200
+
+GEODESY_UTILITY__METHOD_HAVERSINE = "haversine"
+GEODESY_UTILITY__METHOD_VINCENTY = "vincenty"
+GEODESY_UTILITY__METHODS = (GEODESY_UTILITY__METHOD_HAVERSINE, GEODESY_UTILITY__METHOD_VINCENTY)
+
+GEODESY_UTILITY__KMH_PER_MPS = 3.6
+GEODESY_UTILITY__MPS_PER_KNOT = 1852 / 3600
+# segments slower than this have no meaningful heading (position noise dominates)
+GEODESY_UTILITY__MIN_HEADING_SPEED_MPS = 1.0
+GEODESY_UTILITY__FULL_CIRCLE_DEGREES = 360.0
+GEODESY_UTILITY__HALF_CIRCLE_DEGREES = 180.0
+
+# columns added by analyse_track()
+GEODESY_UTILITY__ANALYTICS_COLUMNS = (
+    "segment_distance",     # metres from the previous fix
+    "path_length",          # metres from the first fix, summed over the segments
+    "ground_speed",         # m/s over the segment
+    "heading",              # degrees clockwise from true north over the segment
+    "climb_rate",           # m/s of GPGGA altitude change over the segment
+)
+
+
+def haversine_distance(latitude1, longitude1, latitude2, longitude2,
+                       radius=GEODESY_UTILITY__EARTH_RADIUS_M):
+    """
+    @brief: great circle distance between points in signed degrees, on a sphere.
+    @returns:
+        float64 array of metres, NaN where a coordinate is NaN.
+    """
+    phi1, phi2 = np.radians(latitude1), np.radians(latitude2)
+    half_dphi = (phi2 - phi1) / 2
+    half_dlambda = np.radians(np.subtract(longitude2, longitude1)) / 2
+    chord = np.sin(half_dphi) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(half_dlambda) ** 2
+    return 2 * radius * np.arcsin(np.sqrt(np.clip(chord, 0, 1)))
+
+
+def vincenty_distance(latitude1, longitude1, latitude2, longitude2):
+    """
+    @brief: distance between points in signed degrees on the WGS84 ellipsoid, with Vincenty's
+    inverse formula. The iteration runs on all point pairs at once until every pair has
+    converged; nearly antipodal pairs that do not converge get the haversine distance.
+    @returns:
+        float64 array of metres, NaN where a coordinate is NaN.
+    """
+    a, b, f = GEODESY_UTILITY__WGS84_A, GEODESY_UTILITY__WGS84_B, GEODESY_UTILITY__WGS84_F
+    latitude1, longitude1, latitude2, longitude2 = np.broadcast_arrays(
+        *(np.asarray(values, dtype=np.float64)
+          for values in (latitude1, longitude1, latitude2, longitude2)))
+    u1 = np.arctan((1 - f) * np.tan(np.radians(latitude1)))
+    u2 = np.arctan((1 - f) * np.tan(np.radians(latitude2)))
+    sin_u1, cos_u1, sin_u2, cos_u2 = np.sin(u1), np.cos(u1), np.sin(u2), np.cos(u2)
+    big_l = np.radians(longitude2 - longitude1)
+    lam = big_l.copy()
+    active = ~np.isnan(lam)
+    sin_sigma = cos_sigma = sigma = cos_sq_alpha = cos_2sigma_m = np.zeros_like(lam)
+    for _ in range(GEODESY_UTILITY__VINCENTY_MAX_ITERATIONS):
+        sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+        sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+        sigma = np.arctan2(sin_sigma, cos_sigma)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sin_alpha = np.where(sin_sigma == 0, 0, cos_u1 * cos_u2 * sin_lam / sin_sigma)
+            cos_sq_alpha = 1 - sin_alpha ** 2
+            # both points on the equator: cos_2sigma_m is taken as 0
+            cos_2sigma_m = np.where(cos_sq_alpha == 0, 0,
+                                    cos_sigma - 2 * sin_u1 * sin_u2 / cos_sq_alpha)
+        c = f / 16 * cos_sq_alpha * (4 + f * (4 - 3 * cos_sq_alpha))
+        previous = lam
+        lam = big_l + (1 - c) * f * sin_alpha * (
+            sigma + c * sin_sigma * (cos_2sigma_m + c * cos_sigma *
+                                     (-1 + 2 * cos_2sigma_m ** 2)))
+        active = np.abs(lam - previous) > GEODESY_UTILITY__VINCENTY_TOLERANCE
+        if not active.any():
+            break
+    u_sq = cos_sq_alpha * (a ** 2 - b ** 2) / b ** 2
+    big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    delta_sigma = big_b * sin_sigma * (cos_2sigma_m + big_b / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sigma_m ** 2) -
+        big_b / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+    distance = b * big_a * (sigma - delta_sigma)
+    return np.where(active, haversine_distance(latitude1, longitude1, latitude2, longitude2),
+                    distance)
+
+
+def initial_bearing(latitude1, longitude1, latitude2, longitude2):
+    """
+    @brief: initial great circle bearing from the first to the second point.
+    @returns:
+        float64 array of degrees clockwise from true north, in [0, 360).
+    """
+    phi1, phi2 = np.radians(latitude1), np.radians(latitude2)
+    dlambda = np.radians(np.subtract(longitude2, longitude1))
+    bearing = np.degrees(np.arctan2(np.sin(dlambda) * np.cos(phi2),
+                                    np.cos(phi1) * np.sin(phi2) -
+                                    np.sin(phi1) * np.cos(phi2) * np.cos(dlambda)))
+    return bearing % GEODESY_UTILITY__FULL_CIRCLE_DEGREES
+
+
+def angle_difference(angle1, angle2):
+    """
+    @brief: signed smallest difference angle1 - angle2 in degrees, in [-180, 180).
+    """
+    return ((np.subtract(angle1, angle2) + GEODESY_UTILITY__HALF_CIRCLE_DEGREES) %
+            GEODESY_UTILITY__FULL_CIRCLE_DEGREES - GEODESY_UTILITY__HALF_CIRCLE_DEGREES)
+
+
+def elapsed_seconds(utc_time):
+    """
+    @brief: seconds since the first epoch from seconds of the UTC day, across midnight.
+    """
+    steps = np.diff(utc_time)
+    steps = np.where(steps < -GNSS_UTILITY__ROLLOVER_SECONDS,
+                     steps + GNSS_UTILITY__SECONDS_PER_DAY, steps)
+    return np.concatenate(([0.0], np.cumsum(steps))) if np.size(utc_time) else np.empty(0)
+
+
+def analyse_track(track=None, method=GEODESY_UTILITY__METHOD_HAVERSINE):
+    """
+    @brief: derive distance, ground speed, heading and climb rate of a track table.
+    @param:
+        track: dict of column arrays with utc_time, latitude, longitude and altitude, see
+               gnss_utility.decode_track().
+        method: GEODESY_UTILITY__METHOD_HAVERSINE or GEODESY_UTILITY__METHOD_VINCENTY.
+    @returns:
+        dict of the GEODESY_UTILITY__ANALYTICS_COLUMNS float64 arrays, one value per track
+        row. A segment touching a fix without position (or altitude, for the climb rate), or
+        of zero duration, is NaN; the path length skips NaN segments.
+    """
+    if method not in GEODESY_UTILITY__METHODS:
+        raise ValueError(f"unknown distance method: {method}")
+    latitude, longitude = track["latitude"], track["longitude"]
+    rows = latitude.size
+    if rows == 0:
+        return {name: np.empty(0) for name in GEODESY_UTILITY__ANALYTICS_COLUMNS}
+    distance_function = (haversine_distance if method == GEODESY_UTILITY__METHOD_HAVERSINE
+                         else vincenty_distance)
+    distance = distance_function(latitude[:-1], longitude[:-1], latitude[1:], longitude[1:])
+    duration = np.diff(elapsed_seconds(track["utc_time"]))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        duration = np.where(duration > 0, duration, np.nan)
+        ground_speed = distance / duration
+        climb_rate = np.diff(track["altitude"]) / duration
+    heading = np.where(ground_speed >= GEODESY_UTILITY__MIN_HEADING_SPEED_MPS,
+                       initial_bearing(latitude[:-1], longitude[:-1], latitude[1:],
+                                       longitude[1:]), np.nan)
+    return {
+        "segment_distance": np.concatenate(([np.nan], distance)),
+        "path_length": np.concatenate(([0.0], np.nancumsum(distance))),
+        "ground_speed": np.concatenate(([np.nan], ground_speed)),
+        "heading": np.concatenate(([np.nan], heading)),
+        "climb_rate": np.concatenate(([np.nan], climb_rate)),
+    }
+
+
+def summarize_track(track=None, analytics=None, method=GEODESY_UTILITY__METHOD_HAVERSINE):
+    """
+    @brief: summary figures of a track, with the derived speed and heading cross-checked
+    against the speed over ground and true course the receiver reported in GPVTG. Epochs
+    without a GPVTG sentence fall back to the GPRMC values.
+    @param:
+        track: dict of column arrays, see gnss_utility.decode_track().
+        analytics: analyse_track() of the track, None to compute it.
+        method: distance method, see analyse_track().
+    @returns:
+        dict of floats (NaN where undefined): fixes, duration_seconds, path_length_m,
+        mean/max ground_speed_mps, max climb/descent rate_mps, and the median and 95th
+        percentile of |derived - reported| speed (m/s) and heading (degrees). The reported
+        value of a segment is the mean of the values at its two ends.
+    """
+    if analytics is None:
+        analytics = analyse_track(track, method)
+    ground_speed, climb_rate = analytics["ground_speed"], analytics["climb_rate"]
+    reported_speed = track["vtg_speed_knots"] * GEODESY_UTILITY__MPS_PER_KNOT
+    reported_speed = np.where(np.isnan(reported_speed),
+                              track["speed_kmh"] / GEODESY_UTILITY__KMH_PER_MPS, reported_speed)
+    reported_speed = np.where(np.isnan(reported_speed),
+                              track["speed_knots"] * GEODESY_UTILITY__MPS_PER_KNOT, reported_speed)
+    segment_speed = np.concatenate(([np.nan], (reported_speed[:-1] + reported_speed[1:]) / 2))
+    course = np.where(np.isnan(track["vtg_course_true"]), track["course_true"],
+                      track["vtg_course_true"])
+    # the mean of two courses, taken across north
+    segment_course = np.concatenate(([np.nan], (course[:-1] + angle_difference(
+        course[1:], course[:-1]) / 2) % GEODESY_UTILITY__FULL_CIRCLE_DEGREES))
+    speed_error = np.abs(ground_speed - segment_speed)
+    heading_error = np.abs(angle_difference(analytics["heading"], segment_course))
+    elapsed = elapsed_seconds(track["utc_time"])
+
+    def statistic(function, values):
+        values = values[~np.isnan(values)]
+        return float(function(values)) if values.size else float("nan")
+
+    return {
+        "fixes": int(np.count_nonzero(~np.isnan(track["latitude"]))),
+        "duration_seconds": float(elapsed[-1]) if elapsed.size else float("nan"),
+        "path_length_m": float(analytics["path_length"][-1]) if elapsed.size else float("nan"),
+        "mean_ground_speed_mps": statistic(np.mean, ground_speed),
+        "max_ground_speed_mps": statistic(np.max, ground_speed),
+        "max_climb_rate_mps": statistic(np.max, climb_rate),
+        "max_descent_rate_mps": statistic(lambda values: -np.min(values), climb_rate),
+        "speed_error_median_mps": statistic(np.median, speed_error),
+        "speed_error_p95_mps": statistic(lambda values: np.percentile(values, 95),
+                                         speed_error),
+        "heading_error_median_degrees": statistic(np.median, heading_error),
+        "heading_error_p95_degrees": statistic(lambda values: np.percentile(values, 95),
+                                               heading_error),
+    }
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Print distance, speed, heading and climb rate figures of a GPS log and "
+                    "check the derived speed and heading against the reported ones.")
+    parser.add_argument("log_file", help="GPS log with GPGGA, GPRMC and GPVTG sentences")
+    parser.add_argument("--method", choices=GEODESY_UTILITY__METHODS,
+                        default=GEODESY_UTILITY__METHOD_HAVERSINE,
+                        help="segment distance method (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    from gnss_utility import parse_track
+    args = parse_arguments()
+    for name, value in summarize_track(parse_track(args.log_file), method=args.method).items():
+        print(f"{name:<30} {value:.6g}")
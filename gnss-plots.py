@@ -20,15 +20,31 @@
 
 # for plotting function
 import numpy as np
-import matplotlib.pyplot as plt
+# matplotlib.pyplot is imported on first use by _pyplot(), on the non-interactive Agg backend
 
 # for data process function
+import argparse
+import functools
 import logging as log
-import tkinter as tk
-from tkinter import filedialog as fd
-import openpyxl as xlsx
 import time
 import os
+import sys
+
+# for bulk data process function
+from gnss_utility import parse_all_vectorized, iter_gpgga_chunks, decode_gpgga, parse_track
+from follow_utility import LogFollower, follow, FOLLOW_UTILITY__POLL_INTERVAL_SECONDS
+from cache_utility import cached_parse
+from parallel_utility import parallel_parse_all
+from time_index_utility import parse_utc, query_fixes, query_track
+from projection_utility import PROJECTION_UTILITY__DEGREES, PROJECTION_UTILITY__PROJECTIONS
+from projection_utility import project
+from tile_utility import TILE_UTILITY__ZOOMS, parse_zooms
+from lod_utility import lttb_indices, point_budget
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_READ, INSTRUMENT_UTILITY__STAGE_PARSE
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_CONVERT, INSTRUMENT_UTILITY__STAGE_BUILD
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_RENDER, INSTRUMENT_UTILITY__STAGE_SAVE
+from instrument_utility import stage
+import instrument_utility
 
 # Error Codes
 GNSS__TRUE = 1
@@ -58,9 +74,9 @@ GNSS__USER_INTERACTIVE_SLEEP_BEFORE_QUIT_PROGRAM_SECOND = 2
 # PATH for data log and test data log
 class Const:
     """Constants used as gnss data inputs."""
-    TEST_DATA_INPUT_LOCAL_PATH = r"data\gps_test_input.txt"
-    EXPECTED_TEST_DATA_OUTPUT_PATH = r"data\expected_gps_test_output.txt"
-    DATA_LOCAL_PATH = r"data\gps.txt"
+    TEST_DATA_INPUT_LOCAL_PATH = os.path.join("data", "gps_test_input.txt")
+    EXPECTED_TEST_DATA_OUTPUT_PATH = os.path.join("data", "expected_gps_test_output.txt")
+    DATA_LOCAL_PATH = os.path.join("data", "gps.txt")
 
 # Delimiters used in GPGGA to separate data and labels. Used for the parse_all function.
 DEFAULT_DELIMS = (",")
@@ -68,6 +84,15 @@ DEFAULT_DELIMS__GNSS_GPGGA_LOG_FIELD_DELIMITERS_INDEX = 0
 
 # Output plot file name.
 OUTPUT_FILE_NAME = "flight_route.png"
+# Output directory of batch mode plots and summaries.
+BATCH_OUTPUT_DIR = "batch_output"
+# Output plot formats; rendering is always headless.
+OUTPUT_FILE_FORMATS = ("png", "svg", "pdf")
+PLOT_BACKEND = "Agg"
+# Characters that make the input a glob pattern.
+GLOB_MAGIC_CHARS = "*?["
+# tcp://host:port, udp://host:port or pipe://path input reads a live NMEA stream
+STREAM_SOURCE_SEPARATOR = "://"
 
 # ============================part of progressive solutions============================
 # following three functions contain progressive work during the task: 
@@ -275,16 +300,24 @@ def parse_all(log_file=None, delims=None):
         quit()
         
     with open(log_file, 'r') as lf:
-        file = lf.readlines()
-        for line in file:
-            error, ret_latitude, ret_longitude = parse(
-                line, delims)
-            if (error == GNSS__FALSE):                
-                log.info("Not a GPGGA")
-            else:
-                # Reviewer feedback:A lot of overhead in the code such as copying and moving data.
-                ret_latitude_list.append(ret_latitude)
-                ret_longitude_list.append(ret_longitude)    
+        with stage(INSTRUMENT_UTILITY__STAGE_READ) as read_stage:
+            file = lf.readlines()
+            read_stage.add(lines=len(file), nbytes=lf.tell())
+        # parse() splits and converts each line in one go, so its loop is timed as both the
+        # parse stage (all lines) and the convert stage (GPGGA lines)
+        with stage(INSTRUMENT_UTILITY__STAGE_PARSE) as parse_stage, \
+                stage(INSTRUMENT_UTILITY__STAGE_CONVERT) as convert_stage:
+            parse_stage.add(lines=len(file))
+            for line in file:
+                error, ret_latitude, ret_longitude = parse(
+                    line, delims)
+                if (error == GNSS__FALSE):                
+                    log.info("Not a GPGGA")
+                else:
+                    # Reviewer feedback:A lot of overhead in the code such as copying and moving data.
+                    ret_latitude_list.append(ret_latitude)
+                    ret_longitude_list.append(ret_longitude)    
+            convert_stage.add(lines=len(ret_latitude_list))
         # debug print: :
         # print("extracted list of Long Lati data in GPGGA logs:")
         # print(ret_latitude_list)
@@ -293,12 +326,25 @@ def parse_all(log_file=None, delims=None):
 
 
 
-def data_plot(latitude=None, longitude=None):   
+def _pyplot():
+    """
+    @brief import pyplot on first use, on the non-interactive Agg backend (no Tk, no display)
+    """
+    import matplotlib
+    matplotlib.use(PLOT_BACKEND)
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def data_plot(latitude=None, longitude=None, output_file=OUTPUT_FILE_NAME,
+              projection=PROJECTION_UTILITY__DEGREES):
     """
-    @brief plot 2-D data
+    @brief plot 2-D data, longitude on the x-axis and latitude on the y-axis
     @param: 
         latitude in array values 
         longitude in array values
+        output_file: image file to write, the format follows the extension
+        projection: degrees, or mercator / utm for metres with equal axis scales
     @returns:
         GNSS__TRUE - Success
         GNSS__FALSE - Failure
@@ -316,15 +362,71 @@ def data_plot(latitude=None, longitude=None):
     # print(longitude)
     
     # plotting
-    fig, ax = plt.subplots()    
-    ax.plot(latitude, longitude)
+    plt = _pyplot()
+    with stage(INSTRUMENT_UTILITY__STAGE_RENDER) as render_stage:
+        fig, ax = plt.subplots()    
+        # the whole arrays are projected in one call
+        x, y, xlabel, ylabel = project(latitude, longitude, projection)
+        # only draw as many fixes as the output resolution can show
+        keep = lttb_indices(x, y, point_budget(fig))
+        render_stage.add(lines=len(latitude))
+        ax.plot(x[keep], y[keep])
+
+        ax.set(xlabel=xlabel, ylabel=ylabel, title='Plot of flight route')
+        if projection != PROJECTION_UTILITY__DEGREES:
+            ax.set_aspect('equal', adjustable='datalim')
+        ax.grid()
+
+    with stage(INSTRUMENT_UTILITY__STAGE_SAVE):
+        fig.savefig(output_file)
+    plt.close(fig)
+    return GNSS__TRUE
 
-    ax.set(xlabel='latitude (degree)', ylabel='longitude (degree)',
-           title='Plot of flight route')
-    ax.grid()
 
-    fig.savefig(OUTPUT_FILE_NAME)
-    plt.show()
+def data_plot_stream(chunks=None, output_file=OUTPUT_FILE_NAME,
+                     projection=PROJECTION_UTILITY__DEGREES):
+    """
+    @brief plot 2-D data batch by batch, without holding the whole track in memory. Each
+    batch is reduced to the point budget of the output resolution as it arrives, and the
+    reduced route once more before drawing, so drawing time does not grow with the log.
+    @param:
+        chunks: iterable of (latitude, longitude) array pairs, e.g. from iter_gpgga_chunks
+        output_file: image file to write, the format follows the extension
+        projection: see data_plot()
+    @returns:
+        GNSS__TRUE - Success
+        GNSS__FALSE - Failure
+    """
+    plt = _pyplot()
+    fig, ax = plt.subplots()
+    budget = point_budget(fig)
+    route_latitude = []
+    route_longitude = []
+    for latitude, longitude in chunks:
+        with stage(INSTRUMENT_UTILITY__STAGE_RENDER) as render_stage:
+            render_stage.add(lines=latitude.size)
+            keep = lttb_indices(longitude, latitude, budget)
+            route_latitude.append(latitude[keep])
+            route_longitude.append(longitude[keep])
+    with stage(INSTRUMENT_UTILITY__STAGE_BUILD):
+        latitude = np.concatenate(route_latitude) if route_latitude else np.empty(0)
+        longitude = np.concatenate(route_longitude) if route_longitude else np.empty(0)
+    if latitude.size == 0:
+        plt.close(fig)
+        return GNSS__FALSE
+    with stage(INSTRUMENT_UTILITY__STAGE_RENDER):
+        x, y, xlabel, ylabel = project(latitude, longitude, projection)
+        keep = lttb_indices(x, y, budget)
+        ax.plot(x[keep], y[keep])
+
+        ax.set(xlabel=xlabel, ylabel=ylabel, title='Plot of flight route')
+        if projection != PROJECTION_UTILITY__DEGREES:
+            ax.set_aspect('equal', adjustable='datalim')
+        ax.grid()
+
+    with stage(INSTRUMENT_UTILITY__STAGE_SAVE):
+        fig.savefig(output_file)
+    plt.close(fig)
     return GNSS__TRUE
 
 
@@ -397,60 +499,230 @@ def test_parse_all(test_input=None, expected_test_input=None, delims=None):
         return GNSS__FALSE
 
 
+def test_parse_all_vectorized(test_input=None, delims=None):
+    """
+     @brief: test bulk GPGGA decoder against the per-line parse function
+     @param:
+         test_input: test input file
+         delims: Tuple confining delimiter characters.
+     @returns:
+         GNSS__TRUE - Success
+         GNSS__FALSE - Failure
+    """
+    # parse() is the reference the bulk decoder is checked against
+    [latitude_list, longitude_list] = parse_all(test_input, delims)
+    lat_array, long_array = parse_all_vectorized(test_input)
+    if np.array_equal(lat_array, np.array(sum(latitude_list, [])))\
+            and np.array_equal(long_array, np.array(sum(longitude_list, []))):
+        return GNSS__TRUE
+    else:
+        return GNSS__FALSE
+
+
+def parse_arguments(argv=None):
+    """
+     @brief: command line of the tool
+     @param:
+         argv: argument list, None for sys.argv
+     @returns:
+         argparse namespace with input, output, format, workers, follow, interval,
+         idle_timeout, no_cache, export, projection, tiles, tile_zooms, summary, window
+         and profile
+    """
+    parser = argparse.ArgumentParser(
+        description="Plot the flight route of a GPS log (GPGGA sentences). A directory or "
+                    "glob pattern as input runs batch mode over all flight and PPG logs; "
+                    "tcp://host:port, udp://host:port or pipe://path reads a live NMEA stream.")
+    parser.add_argument("input", nargs="?", default=Const.DATA_LOCAL_PATH,
+                        help="GPS log file, directory, glob pattern or stream source "
+                             "(default: %(default)s)")
+    parser.add_argument("-o", "--output",
+                        help="output plot file, or output directory in batch mode "
+                             f"(default: {OUTPUT_FILE_NAME} / {BATCH_OUTPUT_DIR})")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FILE_FORMATS,
+                        help="plot file format (default: from the output file extension)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes of batch mode, and of decoding one large log in "
+                             "byte ranges (default: one per CPU core)")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep following the log as it grows and rewrite the plot on "
+                             "new fixes, until Ctrl+C")
+    parser.add_argument("--interval", type=float, default=FOLLOW_UTILITY__POLL_INTERVAL_SECONDS,
+                        help="follow mode poll interval in seconds (default: %(default)s)")
+    parser.add_argument("--idle-timeout", type=float,
+                        help="stop following after this many seconds without new data")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always parse the log, bypassing the decoded log cache "
+                             "($LOG_CACHE_DIR, default ~/.cache/log-plots)")
+    parser.add_argument("-e", "--export",
+                        help="also write the decoded track table (GGA/RMC/VTG columns) to this "
+                             "file; format from the extension: npz, parquet, feather, csv, "
+                             "xlsx, or none for a directory of .npy columns")
+    parser.add_argument("--projection", choices=PROJECTION_UTILITY__PROJECTIONS,
+                        default=PROJECTION_UTILITY__DEGREES,
+                        help="plot coordinates: degrees, or Web Mercator / UTM metres "
+                             "(default: %(default)s)")
+    parser.add_argument("--tiles", metavar="DIR",
+                        help="also render the route coverage as XYZ map tiles DIR/z/x/y.png")
+    parser.add_argument("--tile-zooms", type=parse_zooms, default=TILE_UTILITY__ZOOMS,
+                        help="zoom levels of --tiles, Z or Z0-Z1 (default: %(default)s)")
+    parser.add_argument("--summary", action="store_true",
+                        help="print path length, ground speed and climb rate figures of the "
+                             "track, with the derived speed and heading checked against the "
+                             "reported ones")
+    parser.add_argument("--window", nargs=2, metavar=("START", "END"), type=parse_utc,
+                        help="only plot the fixes between two UTC times (HH:MM:SS), read "
+                             "through the time index next to the log (built on first use)")
+    parser.add_argument("--profile", metavar="REPORT",
+                        help="measure time, throughput and peak memory of the read, parse, "
+                             "convert, build, render and save stages, print them and write "
+                             "them as JSON to REPORT ('-' for stdout); single log modes only")
+    return parser.parse_args(argv)
+
+
+def write_profile(report_file=None):
+    """
+     @brief: print the stage measurements and write them as JSON, if profiling is on
+    """
+    if instrument_utility.enabled():
+        instrument_utility.print_report()
+        instrument_utility.write_report(report_file)
+
+
+def output_file_name(output=None, file_format=None):
+    """
+     @brief: plot file name from the --output and --format arguments
+    """
+    output = output or OUTPUT_FILE_NAME
+    if file_format:
+        output = os.path.splitext(output)[0] + "." + file_format
+    return output
+
 
 # @brief    Main for gnss-plots (a tool which is plotting the flight route of a plane.) that does:
-#           Execute unit test code for parse_all function
 #           Decode data file
-#           Python 2D plot
+#           Python 2D plot, headless
+#           Batch mode over a directory or glob pattern of logs
+#           Follow mode, re-plotting a log that is still being written
+#           Stream mode, reading NMEA from a TCP / UDP receiver or a pipe
 #           
-# @param    none
+# @param    see parse_arguments()
 #
 if __name__ == '__main__':
     log.basicConfig(level=log.CRITICAL)
-
-    root = tk.Tk()
-    root.withdraw()
-    data_dir = None    
-    # ++ this is an enhancement to ask user to choose directory where data file exist
-    # folder = fd.askdirectory(title="Choose a folder containing log files")        
-    # files = os.walk(folder)    
-    # for root, directories, filenames in os.walk(folder):
-    #     for filename in filenames:
-    #         if filename.endswith(".txt"):
-    #             log.debug(filename)
-    #             log_files.append(os.path.join(root, filename))
-    #     log.info(f"Number of log files to parse: {len(log_files)}")
-    log_files = []
-    results = []
-    test_result = None
-    data_file = os.path.abspath(Const.DATA_LOCAL_PATH)
-    test_data_input = os.path.abspath(Const.TEST_DATA_INPUT_LOCAL_PATH)
-    expected_test_input = os.path.abspath(Const.EXPECTED_TEST_DATA_OUTPUT_PATH)
-
-    test_result = test_parse_all(
-        test_data_input, expected_test_input, DEFAULT_DELIMS)
-    
-    if(test_result == GNSS__FALSE):
-        log.info("unit test failed.")
-        print("ERROR:unit test failed.")
-        # sleep 2 seconds
-        time.sleep(GNSS__USER_INTERACTIVE_SLEEP_BEFORE_QUIT_PROGRAM_SECOND)
-        quit()
+    args = parse_arguments()
+    if args.profile:
+        instrument_utility.enable()
+    stream_source = STREAM_SOURCE_SEPARATOR in args.input
+
+    # headless batch mode: parses and renders every flight and PPG log in a pool of
+    # worker processes
+    if not stream_source and (
+            os.path.isdir(args.input) or any(char in args.input for char in GLOB_MAGIC_CHARS)):
+        from batch_utility import batch_process, print_batch_report
+        print_batch_report(batch_process(args.input, args.output or BATCH_OUTPUT_DIR,
+                                         args.workers, args.format, not args.no_cache))
+        sys.exit(0)
+
+    # the parser checks against the golden files run in the pytest suite (tests/), not here
+    data_file = os.path.abspath(args.input)
+    output_file = output_file_name(args.output, args.format)
+
+    if not args.follow and not stream_source and not os.path.isfile(data_file):
+        print("ERROR:Could not find data log for use.")
+        sys.exit(1)
     else:
-        print("unit test passed, proceed to main tool feature.")
-        [latitude_list, longitude_list] = parse_all(data_file, DEFAULT_DELIMS)
-        # convert nested list to flat list
-        flat_latitude_list = sum(latitude_list, [])
-        flat_longitude_list = sum(longitude_list, [])
-        """
-        Reviewer feedback:A lot of overhead in the code such as copying and moving data.
-        """
-        # convert list to array
-        lat_array = np.array(flat_latitude_list)
-        long_array = np.array(flat_longitude_list)
-        if data_plot(lat_array, long_array) == GNSS__TRUE:
-            print("Plotting successfully")
+        print("proceed to main tool feature.")
+        # decode the log batch by batch straight into arrays, no per-line lists to flatten
+        # and copy, and memory stays bounded however long the flight is
+        # sentences failing the NMEA checksum are dropped and counted
+        checksum_stats = {}
+        track = None
+        if args.follow:
+            # only the bytes appended since the last poll are decoded, and the same line
+            # artist is updated in place
+            from plot_utility import LivePlot
+            live_plot = LivePlot(output_file, lttb_indices, 'longitude (degree)',
+                                 'latitude (degree)', 'Plot of flight route')
+            follower = LogFollower(data_file,
+                                   functools.partial(decode_gpgga, stats=checksum_stats))
+            print("following", data_file, "- Ctrl+C to stop")
+            print("fixes decoded:", follow(follower,
+                                           lambda latitude, longitude:
+                                           live_plot.update(longitude, latitude),
+                                           args.interval, args.idle_timeout))
+        elif stream_source:
+            # live receiver: sentences are decoded batch by batch as they arrive, and the
+            # plot is rewritten after every batch; asyncio is only imported for this
+            import asyncio
+            from stream_utility import ingest
+            from plot_utility import LivePlot
+            live_plot = LivePlot(output_file, lttb_indices, 'longitude (degree)',
+                                 'latitude (degree)', 'Plot of flight route')
+
+            def plot_track(track):
+                fixed = ~np.isnan(track["latitude"])
+                live_plot.update(track["longitude"][fixed], track["latitude"][fixed])
+
+            print("reading", args.input, "- until the stream ends")
+            try:
+                track = asyncio.run(ingest(args.input, stats=checksum_stats,
+                                           on_batch=plot_track))
+            except (OSError, ValueError) as error:
+                print("ERROR:", error)
+                sys.exit(1)
+            print("epochs decoded:", track["utc_time"].size)
+        elif args.window:
+            # only the bytes of the window are read and decoded, found in the time index
+            latitude, longitude = query_fixes(data_file, *args.window, stats=checksum_stats)
+            print("fixes in window:", latitude.size)
+            if data_plot(latitude, longitude, output_file, args.projection) == GNSS__TRUE:
+                print("Plotting successfully:", output_file)
+            else:
+                print("Plotting failed")
+        elif not args.no_cache:
+            # an unchanged log is loaded from the cache as memory-mapped arrays, a new or
+            # changed one is parsed once, in byte ranges on all cores, and stored
+            latitude, longitude = cached_parse(data_file, "gpgga",
+                                               functools.partial(parallel_parse_all,
+                                                                 workers=args.workers),
+                                               stats=checksum_stats)
+            if data_plot(latitude, longitude, output_file, args.projection) == GNSS__TRUE:
+                print("Plotting successfully:", output_file)
+            else:
+                print("Plotting failed")
+        elif data_plot_stream(iter_gpgga_chunks(data_file, stats=checksum_stats),
+                              output_file, args.projection) == GNSS__TRUE:
+            print("Plotting successfully:", output_file)
         else:
             print("Plotting failed")
+        print("sentences rejected by checksum:", checksum_stats.get("rejected", 0))
+        if track is None and (args.export or args.summary or args.tiles):
+            if args.window:
+                track = query_track(data_file, *args.window)
+            else:
+                track = (parse_track(data_file) if args.no_cache
+                         else cached_parse(data_file, "track", parse_track))
+        if args.summary:
+            # derived from whole columns at once, see geodesy_utility
+            from geodesy_utility import summarize_track
+            for name, value in summarize_track(track).items():
+                print(f"{name:<30} {value:.6g}")
+        if args.tiles:
+            # only the tiles the route touches, rasterised by a pool of worker processes
+            from tile_utility import render_tiles
+            tiles = render_tiles(track["latitude"], track["longitude"], args.tiles,
+                                 args.tile_zooms, args.workers)
+            print(f"Rendered {sum(tiles.values())} tiles of zoom levels "
+                  f"{min(tiles)}-{max(tiles)}:", args.tiles)
+        if args.export:
+            # columns are written in bulk, not cell by cell
+            from export_utility import export_columns
+            try:
+                print(f"Exported {track['utc_time'].size} epochs as "
+                      f"{export_columns(track, args.export)}:", args.export)
+            except (ImportError, ValueError) as error:
+                print("ERROR:", error)
+                sys.exit(1)
+        write_profile(args.profile)
     print("------------------main end---------------------------")
-
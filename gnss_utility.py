@@ -0,0 +1,522 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for bulk decoding of NMEA logs into numpy arrays.
+  *
+  *          The per-line parse() in gnss-plots.py stays the reference implementation; the
+  *          decoders here work on the whole byte buffer at once and must give the same values.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import numpy as np
+
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_PARSE, INSTRUMENT_UTILITY__STAGE_CONVERT
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_BUILD, INSTRUMENT_UTILITY__STAGE_READ
+from instrument_utility import stage
+from log_utility import LOG_UTILITY__FIELD_DELIMITER, LOG_UTILITY__LINE_FEED
+from log_utility import map_log_file, line_bounds, starts_with, parse_decimal
+
+# GPGGA log data header
+GNSS_UTILITY__GPGGA_HEADER = b"$GPGGA"
+# GPGGA field numbers (field 0 is the header)
+GNSS_UTILITY__GPGGA_FIELD__LATITUDE = 2
+GNSS_UTILITY__GPGGA_FIELD__LATITUDE_DIRECTION = 3
+GNSS_UTILITY__GPGGA_FIELD__LONGITUDE = 4
+GNSS_UTILITY__GPGGA_FIELD__LONGITUDE_DIRECTION = 5
+# ddmm.mmmm / dddmm.mmmm slicing, identical to parse() in gnss-plots.py
+GNSS_UTILITY__LATITUDE_MINUTES_START_IDX = 2
+GNSS_UTILITY__LATITUDE_MINUTES_END_IDX = 8
+GNSS_UTILITY__LONGITUDE_MINUTES_START_IDX = 3
+GNSS_UTILITY__LONGITUDE_MINUTES_END_IDX = 7
+GNSS_UTILITY__LATITUDE_SOUTH_CHAR = ord("S")
+GNSS_UTILITY__LONGITUDE_WEST_CHAR = ord("W")
+GNSS_UTILITY__MINUTE_DEGREE_CONVERSION_FACTOR = 60
+
+# GPRMC / GPVTG log data headers
+GNSS_UTILITY__GPRMC_HEADER = b"$GPRMC"
+GNSS_UTILITY__GPVTG_HEADER = b"$GPVTG"
+# NMEA checksum delimiter, ends the last data field
+GNSS_UTILITY__CHECKSUM_DELIMITER = ord("*")
+# NMEA checksum: two hex digits after the delimiter, XOR of all bytes between '$' and '*'
+GNSS_UTILITY__CHECKSUM_DIGITS = 2
+GNSS_UTILITY__HEX_DIGIT_INVALID = 0xFF
+GNSS_UTILITY__HEX_DIGIT_VALUES = np.full(256, GNSS_UTILITY__HEX_DIGIT_INVALID, dtype=np.uint8)
+GNSS_UTILITY__HEX_DIGIT_VALUES[np.frombuffer(b"0123456789ABCDEF", np.uint8)] = np.arange(16)
+GNSS_UTILITY__HEX_DIGIT_VALUES[np.frombuffer(b"abcdef", np.uint8)] = np.arange(10, 16)
+# hhmmss.ss UTC time field
+GNSS_UTILITY__UTC_MINUTES_IDX = 2
+GNSS_UTILITY__UTC_SECONDS_IDX = 4
+GNSS_UTILITY__SECONDS_PER_HOUR = 3600
+GNSS_UTILITY__SECONDS_PER_MINUTE = 60
+GNSS_UTILITY__SECONDS_PER_DAY = 86400
+# a UTC time of day more than half a day before the previous one is taken as the next day
+GNSS_UTILITY__ROLLOVER_SECONDS = GNSS_UTILITY__SECONDS_PER_DAY / 2
+# GPGGA fields used for the track table (see resources/GPGGA.pdf)
+GNSS_UTILITY__GPGGA_FIELD__UTC = 1
+GNSS_UTILITY__GPGGA_FIELD__QUALITY = 6
+GNSS_UTILITY__GPGGA_FIELD__SATELLITES = 7
+GNSS_UTILITY__GPGGA_FIELD__HDOP = 8
+GNSS_UTILITY__GPGGA_FIELD__ALTITUDE = 9
+GNSS_UTILITY__GPGGA_FIELD__UNDULATION = 11
+# GPRMC fields (see resources/GPRMC.pdf)
+GNSS_UTILITY__GPRMC_FIELD__UTC = 1
+GNSS_UTILITY__GPRMC_FIELD__STATUS = 2
+GNSS_UTILITY__GPRMC_FIELD__LATITUDE = 3
+GNSS_UTILITY__GPRMC_FIELD__LATITUDE_DIRECTION = 4
+GNSS_UTILITY__GPRMC_FIELD__LONGITUDE = 5
+GNSS_UTILITY__GPRMC_FIELD__LONGITUDE_DIRECTION = 6
+GNSS_UTILITY__GPRMC_FIELD__SPEED_KNOTS = 7
+GNSS_UTILITY__GPRMC_FIELD__COURSE_TRUE = 8
+GNSS_UTILITY__GPRMC_FIELD__DATE = 9
+GNSS_UTILITY__GPRMC_STATUS_VALID_CHAR = ord("A")
+# GPVTG fields (see resources/GPVTG.pdf)
+GNSS_UTILITY__GPVTG_FIELD__COURSE_TRUE = 1
+GNSS_UTILITY__GPVTG_FIELD__COURSE_MAGNETIC = 3
+GNSS_UTILITY__GPVTG_FIELD__SPEED_KNOTS = 5
+GNSS_UTILITY__GPVTG_FIELD__SPEED_KMH = 7
+
+# columns of the track table returned by decode_track(), one row per UTC epoch
+GNSS_UTILITY__TRACK_COLUMNS = (
+    "utc_time",         # seconds of the UTC day
+    "date",             # ddmmyy from GPRMC
+    "latitude",         # signed degrees, GPGGA or else GPRMC
+    "longitude",        # signed degrees, GPGGA or else GPRMC
+    "altitude",         # metres above mean sea level, GPGGA
+    "undulation",       # geoid separation in metres, GPGGA
+    "fix_quality",      # GPGGA quality indicator
+    "satellites",       # satellites in use, GPGGA
+    "hdop",             # horizontal dilution of precision, GPGGA
+    "rmc_valid",        # 1 if the GPRMC status is A (valid), 0 if V
+    "speed_knots",      # GPRMC or else GPVTG
+    "speed_kmh",        # GPVTG
+    "course_true",      # degrees, GPRMC or else GPVTG
+    "course_magnetic",  # degrees, GPVTG
+    "vtg_speed_knots",  # GPVTG only
+    "vtg_course_true",  # degrees, GPVTG only
+)
+
+# streaming reader defaults
+GNSS_UTILITY__STREAM_BATCH_SIZE = 65536
+GNSS_UTILITY__STREAM_READ_SIZE = 4 * 1024 * 1024
+
+
+def checksum_valid(buf: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    @brief: verify the *XX checksum of NMEA sentences with one vectorised XOR-reduce.
+    @param:
+        buf: uint8 view of the log.
+        starts, ends: [start, end) byte offsets of the sentences, start on the '$'.
+    @returns:
+        boolean mask, False for sentences whose checksum is wrong, malformed or missing.
+    """
+    # prefix XOR: the XOR of buf[i + 1:j] is prefix[j - 1] ^ prefix[i]
+    prefix = np.bitwise_xor.accumulate(buf)
+    stars = np.flatnonzero(buf == GNSS_UTILITY__CHECKSUM_DELIMITER)
+    star = np.append(stars, buf.size)[np.searchsorted(stars, starts)]
+    valid = star + GNSS_UTILITY__CHECKSUM_DIGITS < ends
+    star = star[valid]
+    high = GNSS_UTILITY__HEX_DIGIT_VALUES[buf[star + 1]]
+    low = GNSS_UTILITY__HEX_DIGIT_VALUES[buf[star + 2]]
+    calculated = prefix[star - 1] ^ prefix[starts[valid]]
+    valid[valid] = ((high != GNSS_UTILITY__HEX_DIGIT_INVALID) &
+                    (low != GNSS_UTILITY__HEX_DIGIT_INVALID) &
+                    (calculated == (high << 4 | low)))
+    return valid
+
+
+def _check_sentences(buf, starts, ends, drop_invalid, stats):
+    """
+    @brief: checksum the given sentences, count the rejected ones in stats["rejected"] and
+    drop them unless drop_invalid is False.
+    """
+    valid = checksum_valid(buf, starts, ends)
+    if stats is not None:
+        stats["rejected"] = stats.get("rejected", 0) + int(valid.size - np.count_nonzero(valid))
+    if not drop_invalid:
+        return starts, ends
+    return starts[valid], ends[valid]
+
+
+def _field_bounds(commas: np.ndarray, first_comma: np.ndarray, field: int):
+    """
+    @brief: [start, end) byte offsets of NMEA field number field (field >= 1).
+    """
+    return commas[first_comma + field - 1] + 1, commas[first_comma + field]
+
+
+def _convert_coordinate(buf, start, end, minutes_start, minutes_end, negative_char, direction):
+    """
+    @brief: convert NMEA ddmm.mmmm fields to signed degrees, the same way parse() does.
+    """
+    degrees = parse_decimal(buf, start, np.minimum(end, start + minutes_start), minutes_start)
+    minutes = parse_decimal(buf, start + minutes_start, end, minutes_end - minutes_start)
+    converted = degrees + minutes / GNSS_UTILITY__MINUTE_DEGREE_CONVERSION_FACTOR
+    return np.where(direction == negative_char, -np.abs(converted), converted)
+
+
+def decode_gpgga(buffer, drop_invalid=True, stats=None):
+    """
+    @brief: decode every GPGGA sentence of an NMEA byte buffer in one vectorised pass.
+    @param:
+        buffer: bytes, bytearray, memoryview or uint8 array holding whole NMEA lines.
+        drop_invalid: skip sentences failing the NMEA checksum; False keeps them.
+        stats: optional dict, stats["rejected"] is increased by the number of sentences
+               failing the checksum (kept or not).
+    @returns:
+        latitude, longitude: float64 arrays in signed degrees. Sentences without a position
+        (empty latitude or longitude field) are skipped.
+    """
+    buf = np.frombuffer(buffer, dtype=np.uint8)
+    with stage(INSTRUMENT_UTILITY__STAGE_PARSE) as parse_stage:
+        starts, ends = line_bounds(buf)
+        parse_stage.add(lines=starts.size, nbytes=buf.size)
+        is_gpgga = starts_with(buf, starts, GNSS_UTILITY__GPGGA_HEADER)
+        starts, ends = _check_sentences(buf, starts[is_gpgga], ends[is_gpgga], drop_invalid,
+                                        stats)
+        if starts.size == 0:
+            return np.empty(0), np.empty(0)
+
+        commas = np.flatnonzero(buf == LOG_UTILITY__FIELD_DELIMITER)
+        first_comma = np.searchsorted(commas, starts)
+        last_field = GNSS_UTILITY__GPGGA_FIELD__LONGITUDE_DIRECTION
+        # drop sentences truncated before the longitude direction field
+        complete = first_comma + last_field < commas.size
+        complete[complete] = commas[first_comma[complete] + last_field] < ends[complete]
+        first_comma = first_comma[complete]
+
+        lat_start, lat_end = _field_bounds(commas, first_comma,
+                                           GNSS_UTILITY__GPGGA_FIELD__LATITUDE)
+        lon_start, lon_end = _field_bounds(commas, first_comma,
+                                           GNSS_UTILITY__GPGGA_FIELD__LONGITUDE)
+        lat_dir = buf[_field_bounds(commas, first_comma,
+                                    GNSS_UTILITY__GPGGA_FIELD__LATITUDE_DIRECTION)[0]]
+        lon_dir = buf[_field_bounds(commas, first_comma,
+                                    GNSS_UTILITY__GPGGA_FIELD__LONGITUDE_DIRECTION)[0]]
+        has_fix = (lat_end > lat_start) & (lon_end > lon_start)
+
+    with stage(INSTRUMENT_UTILITY__STAGE_CONVERT) as convert_stage:
+        convert_stage.add(lines=lat_start.size)
+        latitude = _convert_coordinate(buf, lat_start, lat_end,
+                                       GNSS_UTILITY__LATITUDE_MINUTES_START_IDX,
+                                       GNSS_UTILITY__LATITUDE_MINUTES_END_IDX,
+                                       GNSS_UTILITY__LATITUDE_SOUTH_CHAR, lat_dir)
+        longitude = _convert_coordinate(buf, lon_start, lon_end,
+                                        GNSS_UTILITY__LONGITUDE_MINUTES_START_IDX,
+                                        GNSS_UTILITY__LONGITUDE_MINUTES_END_IDX,
+                                        GNSS_UTILITY__LONGITUDE_WEST_CHAR, lon_dir)
+        return latitude[has_fix], longitude[has_fix]
+
+
+def parse_all_vectorized(log_file=None, drop_invalid=True, stats=None):
+    """
+    @brief: memory-map a whole GPS log file and decode all GPGGA fixes with decode_gpgga().
+    @param:
+        log_file: Full path of the log file to be parsed.
+        drop_invalid, stats: checksum handling, see decode_gpgga().
+    @returns:
+        latitude, longitude: float64 arrays in signed degrees. The file is scanned in place,
+        without reading it into Python bytes or str objects first.
+    """
+    return decode_gpgga(map_log_file(log_file), drop_invalid, stats)
+
+
+def iter_gpgga_chunks(log_file=None, batch_size=GNSS_UTILITY__STREAM_BATCH_SIZE,
+                      read_size=GNSS_UTILITY__STREAM_READ_SIZE, drop_invalid=True, stats=None):
+    """
+    @brief: stream a GPS log and yield decoded GPGGA fixes in fixed-size batches.
+    @param:
+        log_file: Full path of the log file to be parsed.
+        batch_size: number of fixes per yielded batch; only the last batch may be shorter.
+        read_size: number of bytes read from the file at a time.
+        drop_invalid, stats: checksum handling, see decode_gpgga(); stats is updated as the
+                             batches are read.
+    @returns:
+        generator of (latitude, longitude) float64 array pairs. Peak memory is bounded by
+        read_size plus batch_size fixes, whatever the size of the file.
+    """
+    pending_latitude = []
+    pending_longitude = []
+    pending = 0
+    tail = b""
+    with open(log_file, 'rb') as lf:
+        end_of_file = False
+        while not end_of_file:
+            with stage(INSTRUMENT_UTILITY__STAGE_READ) as read_stage:
+                block = lf.read(read_size)
+                read_stage.add(nbytes=len(block))
+            end_of_file = not block
+            if end_of_file:
+                block, tail = tail, b""
+            else:
+                # only decode complete lines, keep the partial last line for the next read
+                block = tail + block
+                cut = block.rfind(b"\n") + 1
+                block, tail = block[:cut], block[cut:]
+            latitude, longitude = decode_gpgga(block, drop_invalid, stats)
+            pending_latitude.append(latitude)
+            pending_longitude.append(longitude)
+            pending += latitude.size
+            while pending >= batch_size or (end_of_file and pending):
+                with stage(INSTRUMENT_UTILITY__STAGE_BUILD):
+                    latitude = np.concatenate(pending_latitude)
+                    longitude = np.concatenate(pending_longitude)
+                yield latitude[:batch_size], longitude[:batch_size]
+                pending_latitude = [latitude[batch_size:]]
+                pending_longitude = [longitude[batch_size:]]
+                pending = pending_latitude[0].size
+
+
+class _Sentences:
+    """Field access for all sentences of one type found in a byte buffer."""
+
+    def __init__(self, buf, starts, ends, delimiters, header, drop_invalid, stats):
+        is_header = starts_with(buf, starts, header)
+        starts, ends = _check_sentences(buf, starts[is_header], ends[is_header],
+                                        drop_invalid, stats)
+        self.buf = buf
+        self.starts = starts
+        self.delimiters = delimiters
+        self.first = np.searchsorted(delimiters, starts)
+        # number of delimiters inside each sentence, the line end included
+        self.count = np.searchsorted(delimiters, ends, side="right") - self.first
+
+    def bounds(self, field: int):
+        """
+        @brief: [start, end) offsets of field; empty (start == end) where the field is missing.
+        """
+        present = self.count > field
+        index = np.where(present, self.first + field, 0)
+        start = np.where(present, self.delimiters[index - 1] + 1, 0)
+        end = np.where(present, self.delimiters[index], 0)
+        return start, end
+
+    def number(self, field: int):
+        """
+        @brief: float64 value of a numeric field, NaN where it is empty or missing.
+        """
+        start, end = self.bounds(field)
+        value = np.full(start.size, np.nan)
+        present = end > start
+        if present.any():
+            width = int((end - start)[present].max())
+            value[present] = parse_decimal(self.buf, start[present], end[present], width)
+        return value
+
+    def char(self, field: int):
+        """
+        @brief: first byte of a single character field, 0 where it is empty or missing.
+        """
+        start, end = self.bounds(field)
+        value = np.zeros(start.size, dtype=np.uint8)
+        # only read present fields: an empty last field of a cut off log starts at buf.size
+        present = end > start
+        value[present] = self.buf[start[present]]
+        return value
+
+    def utc_time(self, field: int):
+        """
+        @brief: hhmmss.ss field as seconds of the UTC day, NaN where it is empty.
+        """
+        start, end = self.bounds(field)
+        value = np.full(start.size, np.nan)
+        present = end - start > GNSS_UTILITY__UTC_SECONDS_IDX
+        if present.any():
+            start, end = start[present], end[present]
+            minutes = start + GNSS_UTILITY__UTC_MINUTES_IDX
+            seconds = start + GNSS_UTILITY__UTC_SECONDS_IDX
+            hours = parse_decimal(self.buf, start, minutes, GNSS_UTILITY__UTC_MINUTES_IDX)
+            mins = parse_decimal(self.buf, minutes, seconds,
+                                 GNSS_UTILITY__UTC_SECONDS_IDX - GNSS_UTILITY__UTC_MINUTES_IDX)
+            secs = parse_decimal(self.buf, seconds, end, int((end - seconds).max()))
+            value[present] = (hours * GNSS_UTILITY__SECONDS_PER_HOUR +
+                              mins * GNSS_UTILITY__SECONDS_PER_MINUTE + secs)
+        return value
+
+    def coordinate(self, field: int, direction_field: int, degree_digits: int, negative_char):
+        """
+        @brief: full precision ddmm.mmmm / dddmm.mmmm field in signed degrees, NaN if empty.
+        """
+        start, end = self.bounds(field)
+        value = np.full(start.size, np.nan)
+        present = end - start > degree_digits
+        if present.any():
+            start, end = start[present], end[present]
+            width = degree_digits + int((end - start).max())
+            value[present] = _convert_coordinate(self.buf, start, end, degree_digits, width,
+                                                 negative_char,
+                                                 self.char(direction_field)[present])
+        return value
+
+
+def _decode_gpgga_columns(sentences: _Sentences):
+    """
+    @brief: track columns carried by GPGGA sentences.
+    """
+    return sentences.utc_time(GNSS_UTILITY__GPGGA_FIELD__UTC), {
+        "latitude": sentences.coordinate(GNSS_UTILITY__GPGGA_FIELD__LATITUDE,
+                                         GNSS_UTILITY__GPGGA_FIELD__LATITUDE_DIRECTION,
+                                         GNSS_UTILITY__LATITUDE_MINUTES_START_IDX,
+                                         GNSS_UTILITY__LATITUDE_SOUTH_CHAR),
+        "longitude": sentences.coordinate(GNSS_UTILITY__GPGGA_FIELD__LONGITUDE,
+                                          GNSS_UTILITY__GPGGA_FIELD__LONGITUDE_DIRECTION,
+                                          GNSS_UTILITY__LONGITUDE_MINUTES_START_IDX,
+                                          GNSS_UTILITY__LONGITUDE_WEST_CHAR),
+        "altitude": sentences.number(GNSS_UTILITY__GPGGA_FIELD__ALTITUDE),
+        "undulation": sentences.number(GNSS_UTILITY__GPGGA_FIELD__UNDULATION),
+        "fix_quality": sentences.number(GNSS_UTILITY__GPGGA_FIELD__QUALITY),
+        "satellites": sentences.number(GNSS_UTILITY__GPGGA_FIELD__SATELLITES),
+        "hdop": sentences.number(GNSS_UTILITY__GPGGA_FIELD__HDOP),
+    }
+
+
+def _decode_gprmc_columns(sentences: _Sentences):
+    """
+    @brief: track columns carried by GPRMC sentences.
+    """
+    status = sentences.char(GNSS_UTILITY__GPRMC_FIELD__STATUS)
+    return sentences.utc_time(GNSS_UTILITY__GPRMC_FIELD__UTC), {
+        "date": sentences.number(GNSS_UTILITY__GPRMC_FIELD__DATE),
+        "latitude": sentences.coordinate(GNSS_UTILITY__GPRMC_FIELD__LATITUDE,
+                                         GNSS_UTILITY__GPRMC_FIELD__LATITUDE_DIRECTION,
+                                         GNSS_UTILITY__LATITUDE_MINUTES_START_IDX,
+                                         GNSS_UTILITY__LATITUDE_SOUTH_CHAR),
+        "longitude": sentences.coordinate(GNSS_UTILITY__GPRMC_FIELD__LONGITUDE,
+                                          GNSS_UTILITY__GPRMC_FIELD__LONGITUDE_DIRECTION,
+                                          GNSS_UTILITY__LONGITUDE_MINUTES_START_IDX,
+                                          GNSS_UTILITY__LONGITUDE_WEST_CHAR),
+        "rmc_valid": np.where(status > 0,
+                              (status == GNSS_UTILITY__GPRMC_STATUS_VALID_CHAR).astype(float),
+                              np.nan),
+        "speed_knots": sentences.number(GNSS_UTILITY__GPRMC_FIELD__SPEED_KNOTS),
+        "course_true": sentences.number(GNSS_UTILITY__GPRMC_FIELD__COURSE_TRUE),
+    }
+
+
+def _decode_gpvtg_columns(sentences: _Sentences):
+    """
+    @brief: track columns carried by GPVTG sentences. GPVTG has no time field, it belongs to
+    the epoch of the timed sentence before it.
+    """
+    speed_knots = sentences.number(GNSS_UTILITY__GPVTG_FIELD__SPEED_KNOTS)
+    course_true = sentences.number(GNSS_UTILITY__GPVTG_FIELD__COURSE_TRUE)
+    return None, {
+        "speed_knots": speed_knots,
+        "speed_kmh": sentences.number(GNSS_UTILITY__GPVTG_FIELD__SPEED_KMH),
+        "course_true": course_true,
+        "course_magnetic": sentences.number(GNSS_UTILITY__GPVTG_FIELD__COURSE_MAGNETIC),
+        # GPRMC overrides the shared columns, these keep what GPVTG reported
+        "vtg_speed_knots": speed_knots,
+        "vtg_course_true": course_true,
+    }
+
+
+# sentence dispatch table, in increasing priority: a column filled by a later sentence type
+# overrides the same column of an earlier one in the same epoch
+GNSS_UTILITY__SENTENCE_DECODERS = (
+    (GNSS_UTILITY__GPVTG_HEADER, _decode_gpvtg_columns),
+    (GNSS_UTILITY__GPRMC_HEADER, _decode_gprmc_columns),
+    (GNSS_UTILITY__GPGGA_HEADER, _decode_gpgga_columns),
+)
+
+
+def decode_track(buffer, drop_invalid=True, stats=None):
+    """
+    @brief: decode GPGGA, GPRMC and GPVTG sentences of an NMEA byte buffer into one columnar
+    track table, one row per UTC epoch in log order.
+    @param:
+        buffer: bytes, bytearray, memoryview or uint8 array holding whole NMEA lines.
+        drop_invalid, stats: checksum handling, see decode_gpgga().
+    @returns:
+        dict mapping every name of GNSS_UTILITY__TRACK_COLUMNS to a float64 array; values a
+        sentence did not provide are NaN. Latitude and longitude keep the full precision of
+        the log (decode_gpgga() reproduces parse() instead, which truncates the minutes).
+    """
+    buf = np.frombuffer(buffer, dtype=np.uint8)
+    with stage(INSTRUMENT_UTILITY__STAGE_PARSE) as parse_stage:
+        starts, ends = line_bounds(buf)
+        parse_stage.add(lines=starts.size, nbytes=buf.size)
+        # the line end closes the last field of sentences sent without a checksum
+        is_delimiter = ((buf == LOG_UTILITY__FIELD_DELIMITER) |
+                        (buf == GNSS_UTILITY__CHECKSUM_DELIMITER) |
+                        (buf == LOG_UTILITY__LINE_FEED))
+        delimiters = np.append(np.flatnonzero(is_delimiter), buf.size)
+    decoded = []
+    for header, decoder in GNSS_UTILITY__SENTENCE_DECODERS:
+        with stage(INSTRUMENT_UTILITY__STAGE_PARSE):
+            sentences = _Sentences(buf, starts, ends, delimiters, header, drop_invalid, stats)
+        with stage(INSTRUMENT_UTILITY__STAGE_CONVERT) as convert_stage:
+            convert_stage.add(lines=sentences.starts.size)
+            utc_time, columns = decoder(sentences)
+        decoded.append((sentences.starts, utc_time, columns))
+
+    with stage(INSTRUMENT_UTILITY__STAGE_BUILD):
+        # an epoch starts at every timed sentence whose time differs from the previous one
+        timed_offsets = np.concatenate([offsets[~np.isnan(utc)] for offsets, utc, _ in decoded
+                                        if utc is not None])
+        timed_utc = np.concatenate([utc[~np.isnan(utc)] for _, utc, _ in decoded
+                                    if utc is not None])
+        order = np.argsort(timed_offsets, kind="stable")
+        timed_offsets, timed_utc = timed_offsets[order], timed_utc[order]
+        new_epoch = np.ones(timed_utc.size, dtype=bool)
+        new_epoch[1:] = timed_utc[1:] != timed_utc[:-1]
+        timed_epoch = np.cumsum(new_epoch) - 1
+
+        track = {name: np.full(np.count_nonzero(new_epoch), np.nan)
+                 for name in GNSS_UTILITY__TRACK_COLUMNS}
+        track["utc_time"] = timed_utc[new_epoch]
+        for offsets, _, columns in decoded:
+            # every sentence belongs to the epoch of the last timed sentence at or before it
+            index = np.searchsorted(timed_offsets, offsets, side="right") - 1
+            for name, values in columns.items():
+                keep = (index >= 0) & ~np.isnan(values)
+                track[name][timed_epoch[index[keep]]] = values[keep]
+    return track
+
+
+def parse_track(log_file=None, drop_invalid=True, stats=None):
+    """
+    @brief: memory-map a GPS log file and decode it into a track table with decode_track().
+    @param:
+        log_file: Full path of the log file to be parsed.
+        drop_invalid, stats: checksum handling, see decode_gpgga().
+    @returns:
+        dict of float64 column arrays, see decode_track().
+    """
+    return decode_track(map_log_file(log_file), drop_invalid, stats)
+
+
+def decode_epochs(buffer, drop_invalid=True, stats=None):
+    """
+    @brief: find where every UTC epoch of an NMEA byte buffer starts, without decoding the
+    other fields.
+    @param:
+        buffer: bytes, bytearray, memoryview or uint8 array holding whole NMEA lines.
+        drop_invalid, stats: checksum handling, see decode_gpgga().
+    @returns:
+        offsets, utc_time: int64 byte offsets of the first timed sentence (GPGGA or GPRMC) of
+        each epoch, and the float64 seconds of the UTC day of the epochs, in log order.
+    """
+    buf = np.frombuffer(buffer, dtype=np.uint8)
+    with stage(INSTRUMENT_UTILITY__STAGE_PARSE) as parse_stage:
+        starts, ends = line_bounds(buf)
+        parse_stage.add(lines=starts.size, nbytes=buf.size)
+        is_delimiter = ((buf == LOG_UTILITY__FIELD_DELIMITER) |
+                        (buf == GNSS_UTILITY__CHECKSUM_DELIMITER) |
+                        (buf == LOG_UTILITY__LINE_FEED))
+        delimiters = np.append(np.flatnonzero(is_delimiter), buf.size)
+        offsets, utc_time = [], []
+        for header, field in ((GNSS_UTILITY__GPGGA_HEADER, GNSS_UTILITY__GPGGA_FIELD__UTC),
+                              (GNSS_UTILITY__GPRMC_HEADER, GNSS_UTILITY__GPRMC_FIELD__UTC)):
+            sentences = _Sentences(buf, starts, ends, delimiters, header, drop_invalid, stats)
+            offsets.append(sentences.starts)
+            utc_time.append(sentences.utc_time(field))
+    with stage(INSTRUMENT_UTILITY__STAGE_BUILD):
+        offsets = np.concatenate(offsets).astype(np.int64)
+        utc_time = np.concatenate(utc_time)
+        timed = ~np.isnan(utc_time)
+        order = np.argsort(offsets[timed], kind="stable")
+        offsets, utc_time = offsets[timed][order], utc_time[timed][order]
+        new_epoch = np.ones(utc_time.size, dtype=bool)
+        new_epoch[1:] = utc_time[1:] != utc_time[:-1]
+        return offsets[new_epoch], utc_time[new_epoch]
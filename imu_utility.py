@@ -0,0 +1,198 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for decoding binary NovAtel IMU logs (imu.dat) into numpy
+  *          structured arrays.
+  *
+  *          imu.dat holds CORRIMUDATAS messages, the CORRIMUDATA log with the short binary
+  *          HEADER (see resources/CORRIMUDATAS.pdf and resources/HEADER.pdf):
+  *
+  *            short header   12 bytes   sync AA 44 13, message length, message id, week, ms
+  *            CORRIMUDATA    60 bytes   week, seconds, 3 angular rates, 3 accelerations
+  *            CRC             4 bytes   NovAtel 32 bit CRC of header and message
+  *
+  *          The CRCs of all sync candidates are computed together, one byte column of the
+  *          candidate messages per numpy step, from a 256 entry table.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import numpy as np
+
+from crc_utility import CRC_UTILITY__CRC_32_REVERSED, CRC_UTILITY__TABLE_SIZE
+from crc_utility import CRC_UTILITY__BITS_PER_BYTE, CRC_UTILITY__CRC_8_MASK
+from log_utility import map_log_file
+
+# NovAtel binary sync bytes, the third one selects the header format
+IMU_UTILITY__SYNC = b"\xAA\x44"
+IMU_UTILITY__SYNC_LONG_HEADER = 0x12
+IMU_UTILITY__SYNC_SHORT_HEADER = 0x13
+IMU_UTILITY__SYNC_LENGTH = 3
+# header layout offsets
+IMU_UTILITY__SHORT_HEADER_LENGTH = 12
+IMU_UTILITY__SHORT_HEADER_MESSAGE_LENGTH_IDX = 3
+IMU_UTILITY__LONG_HEADER_LENGTH_IDX = 3
+IMU_UTILITY__LONG_HEADER_MESSAGE_LENGTH_IDX = 8
+IMU_UTILITY__MESSAGE_ID_IDX = 4
+IMU_UTILITY__CRC_LENGTH = 4
+# CORRIMUDATA message id, short header version
+IMU_UTILITY__CORRIMUDATAS_MESSAGE_ID = 813
+
+IMU_UTILITY__SHORT_HEADER_DTYPE = np.dtype([
+    ("sync", "u1", (IMU_UTILITY__SYNC_LENGTH,)),
+    ("message_length", "u1"),
+    ("message_id", "<u2"),
+    ("header_week", "<u2"),
+    ("header_milliseconds", "<i4"),
+])
+
+IMU_UTILITY__CORRIMUDATA_DTYPE = np.dtype([
+    ("week", "<u4"),
+    ("seconds", "<f8"),
+    ("pitch_rate", "<f8"),          # about x axis, rad/s
+    ("roll_rate", "<f8"),           # about y axis, rad/s
+    ("yaw_rate", "<f8"),            # about z axis, rad/s
+    ("lateral_acc", "<f8"),         # along x axis, m/s^2
+    ("longitudinal_acc", "<f8"),    # along y axis, m/s^2
+    ("vertical_acc", "<f8"),        # along z axis, m/s^2
+])
+
+# one complete CORRIMUDATAS message as stored in imu.dat
+IMU_UTILITY__CORRIMUDATAS_DTYPE = np.dtype(
+    IMU_UTILITY__SHORT_HEADER_DTYPE.descr + IMU_UTILITY__CORRIMUDATA_DTYPE.descr +
+    [("crc", "<u4")])
+
+
+def _crc32_table() -> np.ndarray:
+    """
+    @brief: lookup table of the NovAtel 32 bit CRC, table[i] is the register after byte i.
+    """
+    table = np.arange(CRC_UTILITY__TABLE_SIZE, dtype=np.uint32)
+    for _ in range(CRC_UTILITY__BITS_PER_BYTE):
+        table = np.where(table & 1, (table >> 1) ^ np.uint32(CRC_UTILITY__CRC_32_REVERSED),
+                         table >> 1)
+    return table
+
+
+_CRC_32_TABLE = _crc32_table()
+
+
+def _crc32_frames(buf: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    @brief: NovAtel 32 bit CRC (crc_utility.calculate_crc32) of every buf[start:start + length].
+    @returns:
+        uint32 array, one CRC per frame.
+    """
+    # longest frames first, so the frames still running at a byte column are a prefix
+    order = np.argsort(-lengths, kind="stable")
+    starts, lengths = starts[order], lengths[order]
+    crc = np.zeros(starts.size, dtype=np.uint32)
+    for column in range(int(lengths[0]) if lengths.size else 0):
+        running = np.searchsorted(-lengths, -column, side="left")
+        register = crc[:running]
+        index = (register ^ buf[starts[:running] + column]) & CRC_UTILITY__CRC_8_MASK
+        crc[:running] = _CRC_32_TABLE[index] ^ (register >> CRC_UTILITY__BITS_PER_BYTE)
+    result = np.empty_like(crc)
+    result[order] = crc
+    return result
+
+
+def _read_u16(buf: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    @brief: little endian unsigned 16 bit values at the given byte offsets.
+    """
+    return buf[offsets].astype(np.int64) | (buf[offsets + 1].astype(np.int64) << 8)
+
+
+def frame_messages(buffer, stats=None):
+    """
+    @brief: find the CRC-valid NovAtel binary messages (long or short header) in a buffer.
+    @param:
+        buffer: bytes, bytearray, memoryview or uint8 array of a binary log.
+        stats: optional dict, stats["rejected"] is increased by the number of sync patterns
+               that did not start a message with a valid CRC.
+    @returns:
+        starts, header_lengths, message_ids: int64 arrays, one entry per valid message.
+    """
+    buf = np.frombuffer(buffer, dtype=np.uint8)
+    empty = np.empty(0, dtype=np.int64)
+    if buf.size < IMU_UTILITY__SHORT_HEADER_LENGTH:
+        return empty, empty, empty
+    # sync candidates, vectorised; the header fields are read for all of them at once
+    candidates = np.flatnonzero((buf[:-2] == IMU_UTILITY__SYNC[0]) &
+                                (buf[1:-1] == IMU_UTILITY__SYNC[1]) &
+                                ((buf[2:] == IMU_UTILITY__SYNC_LONG_HEADER) |
+                                 (buf[2:] == IMU_UTILITY__SYNC_SHORT_HEADER)))
+    # both header formats carry their lengths within the first 12 bytes
+    candidates = candidates[candidates + IMU_UTILITY__SHORT_HEADER_LENGTH <= buf.size]
+    is_long = buf[candidates + 2] == IMU_UTILITY__SYNC_LONG_HEADER
+    header_lengths = np.where(is_long, buf[candidates + IMU_UTILITY__LONG_HEADER_LENGTH_IDX],
+                              IMU_UTILITY__SHORT_HEADER_LENGTH).astype(np.int64)
+    message_lengths = np.where(
+        is_long, _read_u16(buf, candidates + IMU_UTILITY__LONG_HEADER_MESSAGE_LENGTH_IDX),
+        buf[candidates + IMU_UTILITY__SHORT_HEADER_MESSAGE_LENGTH_IDX])
+    totals = header_lengths + message_lengths + IMU_UTILITY__CRC_LENGTH
+
+    # the CRC of a message followed by its own CRC is 0
+    valid = candidates + totals <= buf.size
+    valid[valid] = _crc32_frames(buf, candidates[valid], totals[valid]) == 0
+    accepted = np.flatnonzero(valid)
+    ends = candidates[accepted] + totals[accepted]
+    if np.any(candidates[accepted[1:]] < ends[:-1]):
+        # a sync pattern inside an accepted message is payload, even with a valid CRC (about
+        # 1 in 2**32): keep the first of overlapping messages
+        keep, next_free = [], 0
+        for index, end in zip(accepted.tolist(), ends.tolist()):
+            if candidates[index] >= next_free:
+                keep.append(index)
+                next_free = end
+        accepted = np.array(keep, dtype=np.int64)
+        ends = candidates[accepted] + totals[accepted]
+    if stats is not None:
+        # candidates inside accepted messages are payload bytes, not rejected messages
+        owner = np.searchsorted(candidates[accepted], candidates, side="right") - 1
+        inside = owner >= 0
+        inside[inside] = candidates[inside] < ends[owner[inside]]
+        stats["rejected"] = stats.get("rejected", 0) + int(np.count_nonzero(~inside))
+    return (candidates[accepted], header_lengths[accepted],
+            _read_u16(buf, candidates[accepted] + IMU_UTILITY__MESSAGE_ID_IDX))
+
+
+def decode_corrimudatas(buffer, stats=None):
+    """
+    @brief: decode all CRC-valid CORRIMUDATAS messages of a binary log in one pass.
+    @param:
+        buffer: bytes, bytearray, memoryview or uint8 array of a binary log.
+        stats: optional dict, see frame_messages().
+    @returns:
+        structured array of IMU_UTILITY__CORRIMUDATAS_DTYPE, one record per message. When
+        the messages are back to back (the usual imu.dat) the array is a view of the buffer.
+    """
+    buf = np.frombuffer(buffer, dtype=np.uint8)
+    starts, header_lengths, message_ids = frame_messages(buf, stats)
+    record_size = IMU_UTILITY__CORRIMUDATAS_DTYPE.itemsize
+    is_imu = ((message_ids == IMU_UTILITY__CORRIMUDATAS_MESSAGE_ID) &
+              (header_lengths == IMU_UTILITY__SHORT_HEADER_LENGTH) &
+              (buf[starts + IMU_UTILITY__SHORT_HEADER_MESSAGE_LENGTH_IDX] ==
+               IMU_UTILITY__CORRIMUDATA_DTYPE.itemsize))
+    starts = starts[is_imu]
+    if starts.size == 0:
+        return np.empty(0, dtype=IMU_UTILITY__CORRIMUDATAS_DTYPE)
+    if np.all(np.diff(starts) == record_size):
+        return np.frombuffer(buf, dtype=IMU_UTILITY__CORRIMUDATAS_DTYPE,
+                             count=starts.size, offset=int(starts[0]))
+    # interleaved with other logs: gather the messages into one contiguous block first
+    records = buf[starts[:, np.newaxis] + np.arange(record_size)]
+    return records.view(IMU_UTILITY__CORRIMUDATAS_DTYPE).ravel()
+
+
+def parse_imu_file(log_file=None, stats=None):
+    """
+    @brief: memory-map an imu.dat file and decode it with decode_corrimudatas().
+    @param:
+        log_file: Full path of the binary log file.
+        stats: optional dict, see frame_messages().
+    @returns:
+        structured array of IMU_UTILITY__CORRIMUDATAS_DTYPE.
+    """
+    return decode_corrimudatas(map_log_file(log_file), stats)
@@ -0,0 +1,277 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for measuring the hot path of the tools stage by stage, instead
+  *          of guessing where the time and memory go.
+  *
+  *          The decoders and plot functions wrap their work in stage() blocks:
+  *            read      mapping or reading the log file
+  *            parse     finding lines, sentence headers, checksums and field bounds
+  *            convert   turning fields into numbers (coordinates, samples)
+  *            build     assembling result arrays and tables
+  *            render    reducing and drawing the series
+  *            save      writing the image file
+  *          Each stage records calls, wall time, CPU time, lines and bytes handled (so
+  *          lines/s and bytes/s) and the peak of traced memory allocated while it ran.
+  *
+  *          Instrumentation is off by default and stage() is then a shared no-op context.
+  *          enable() switches it on for the process; report() / write_report() give the
+  *          numbers as a dict / JSON file. Memory is traced with tracemalloc, which numpy
+  *          allocations report to; pages of memory-mapped logs are not allocations and are
+  *          not counted. Note that a memory-mapped log is read lazily: its page faults are
+  *          paid by the stage that first touches the bytes (parse), not by read.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import contextlib
+import json
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows; the process peak is then left out of the report
+    resource = None
+
+INSTRUMENT_UTILITY__STAGE_READ = "read"
+INSTRUMENT_UTILITY__STAGE_PARSE = "parse"
+INSTRUMENT_UTILITY__STAGE_CONVERT = "convert"
+INSTRUMENT_UTILITY__STAGE_BUILD = "build"
+INSTRUMENT_UTILITY__STAGE_RENDER = "render"
+INSTRUMENT_UTILITY__STAGE_SAVE = "save"
+INSTRUMENT_UTILITY__STAGES = (INSTRUMENT_UTILITY__STAGE_READ, INSTRUMENT_UTILITY__STAGE_PARSE,
+                              INSTRUMENT_UTILITY__STAGE_CONVERT, INSTRUMENT_UTILITY__STAGE_BUILD,
+                              INSTRUMENT_UTILITY__STAGE_RENDER, INSTRUMENT_UTILITY__STAGE_SAVE)
+# "-" as report file writes the JSON report to stdout
+INSTRUMENT_UTILITY__STDOUT = "-"
+# ru_maxrss is in KiB on Linux and in bytes on macOS
+INSTRUMENT_UTILITY__MAXRSS_BYTES = 1 if sys.platform == "darwin" else 1024
+
+
+class _Stage:
+    """
+    @brief: one running stage() block; add() counts the lines and bytes it handled.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.lines = 0
+        self.bytes = 0
+        self.peak = 0
+        self.start_memory = 0
+
+    def add(self, lines=0, nbytes=0):
+        self.lines += int(lines)
+        self.bytes += int(nbytes)
+
+
+class _NullStage:
+    """
+    @brief: the stage of disabled instrumentation, a reusable no-op context.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add(self, lines=0, nbytes=0):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Instrumentation:
+    """
+    @brief: per-stage totals of wall time, CPU time, lines, bytes and peak traced memory.
+    Usage:
+        instrumentation = enable()
+        with stage(INSTRUMENT_UTILITY__STAGE_PARSE) as parse_stage:
+            ...
+            parse_stage.add(lines=starts.size, nbytes=buf.size)
+        write_report("profile.json")
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        # stages nest per thread, e.g. the channel loader threads of ppg_utility
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.started_tracing = False
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+    def stop(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    @property
+    def running(self) -> list:
+        if not hasattr(self.local, "running"):
+            self.local.running = []
+        return self.local.running
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        @brief: time the block as stage name; stages may nest, the outer one then includes
+        the inner one. Traced memory is process wide, so the peak of stages running in
+        parallel threads includes what the other threads allocated meanwhile.
+        """
+        current = _Stage(name)
+        if self.trace_memory and tracemalloc.is_tracing():
+            memory, peak = tracemalloc.get_traced_memory()
+            # the enclosing stage keeps its own peak before the counter is reset for this one
+            if self.running:
+                self.running[-1].peak = max(self.running[-1].peak, peak)
+            tracemalloc.reset_peak()
+            current.start_memory = current.peak = memory
+        self.running.append(current)
+        wall = time.perf_counter()
+        # CPU time of this thread only, so parallel loader threads are not counted twice
+        cpu = time.thread_time()
+        try:
+            yield current
+        finally:
+            cpu = time.thread_time() - cpu
+            wall = time.perf_counter() - wall
+            self.running.pop()
+            if self.trace_memory and tracemalloc.is_tracing():
+                current.peak = max(current.peak, tracemalloc.get_traced_memory()[1])
+                if self.running:
+                    self.running[-1].peak = max(self.running[-1].peak, current.peak)
+            self._record(current, wall, cpu)
+
+    def _record(self, current, wall, cpu):
+        with self.lock:
+            totals = self.stages.setdefault(current.name, {
+                "calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "lines": 0, "bytes": 0,
+                "peak_memory_bytes": 0})
+            totals["calls"] += 1
+            totals["wall_seconds"] += wall
+            totals["cpu_seconds"] += cpu
+            totals["lines"] += current.lines
+            totals["bytes"] += current.bytes
+            totals["peak_memory_bytes"] = max(totals["peak_memory_bytes"],
+                                              current.peak - current.start_memory)
+
+    def report(self) -> dict:
+        """
+        @brief: the measurements so far.
+        @returns:
+            dict with per stage calls, wall_seconds, cpu_seconds, lines, bytes,
+            lines_per_second, bytes_per_second and peak_memory_bytes (traced allocations
+            above what was allocated when the stage started), in INSTRUMENT_UTILITY__STAGES
+            order, plus the totals since enable() and the peak resident set of the process.
+        """
+        order = {name: index for index, name in enumerate(INSTRUMENT_UTILITY__STAGES)}
+        stages = {}
+        for name in sorted(self.stages, key=lambda name: order.get(name, len(order))):
+            totals = dict(self.stages[name])
+            wall = totals["wall_seconds"]
+            # None for stages that do not count lines or bytes
+            totals["lines_per_second"] = totals["lines"] / wall if wall and totals["lines"] \
+                else None
+            totals["bytes_per_second"] = totals["bytes"] / wall if wall and totals["bytes"] \
+                else None
+            stages[name] = totals
+        report = {
+            "stages": stages,
+            "wall_seconds": time.perf_counter() - self.wall_start,
+            "cpu_seconds": time.process_time() - self.cpu_start,
+            "peak_traced_memory_bytes": (tracemalloc.get_traced_memory()[1]
+                                         if tracemalloc.is_tracing() else None),
+            "max_rss_bytes": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss *
+                              INSTRUMENT_UTILITY__MAXRSS_BYTES if resource else None),
+        }
+        return report
+
+
+# the instrumentation of this process, None while disabled
+_instrumentation = None
+
+
+def enable(trace_memory=True) -> Instrumentation:
+    """
+    @brief: switch instrumentation on for the process, starting from empty totals.
+    @param:
+        trace_memory: also trace peak memory per stage with tracemalloc, which slows
+                      allocation heavy code down; False for timing only.
+    """
+    global _instrumentation
+    disable()
+    _instrumentation = Instrumentation(trace_memory)
+    _instrumentation.start()
+    return _instrumentation
+
+
+def disable():
+    global _instrumentation
+    if _instrumentation is not None:
+        _instrumentation.stop()
+    _instrumentation = None
+
+
+def enabled() -> bool:
+    return _instrumentation is not None
+
+
+def stage(name):
+    """
+    @brief: context manager timing a block as stage name, yielding an object whose
+    add(lines, nbytes) counts the work done. A no-op while instrumentation is disabled.
+    """
+    if _instrumentation is None:
+        return _NULL_STAGE
+    return _instrumentation.stage(name)
+
+
+def report() -> dict:
+    """
+    @brief: Instrumentation.report() of the process, None while disabled.
+    """
+    return None if _instrumentation is None else _instrumentation.report()
+
+
+def write_report(report_file=None):
+    """
+    @brief: write report() as JSON to report_file, or to stdout for "-".
+    """
+    text = json.dumps(report(), indent=2)
+    if report_file == INSTRUMENT_UTILITY__STDOUT:
+        print(text)
+        return
+    with open(report_file, 'w') as rf:
+        rf.write(text + "\n")
+
+
+def print_report(stream=None):
+    """
+    @brief: print report() as a table, one line per stage.
+    """
+    stream = stream or sys.stdout
+    measured = report()
+    if measured is None:
+        return
+    print(f"{'stage':<8} {'calls':>6} {'wall ms':>10} {'cpu ms':>10} {'lines/s':>12} "
+          f"{'MB/s':>9} {'peak MB':>9}", file=stream)
+    for name, totals in measured["stages"].items():
+        lines_per_second = totals["lines_per_second"] or 0
+        megabytes_per_second = (totals["bytes_per_second"] or 0) / 1e6
+        print(f"{name:<8} {totals['calls']:>6} {totals['wall_seconds'] * 1000:>10.1f} "
+              f"{totals['cpu_seconds'] * 1000:>10.1f} {lines_per_second:>12.0f} "
+              f"{megabytes_per_second:>9.1f} {totals['peak_memory_bytes'] / 1e6:>9.1f}",
+              file=stream)
@@ -0,0 +1,94 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for level-of-detail reduction of series before plotting.
+  *
+  *          A plot can only show as many points as the output has pixels, so long series are
+  *          reduced to a point budget that follows the output resolution:
+  *            - min/max per pixel bucket for sampled signals (PPG), which keeps every peak
+  *            - Largest-Triangle-Three-Buckets (LTTB) for paths (flight route)
+  *          Both return indices into the original series, so x and y stay paired.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import numpy as np
+
+# points drawn per output pixel along the longest figure side
+LOD_UTILITY__POINTS_PER_PIXEL = 2
+# both reductions always keep the first and last point
+LOD_UTILITY__LTTB_MINIMUM_POINTS = 3
+LOD_UTILITY__MIN_MAX_MINIMUM_POINTS = 4
+LOD_UTILITY__END_POINTS = 2
+
+
+def point_budget(fig) -> int:
+    """
+    @brief: number of points worth drawing on a matplotlib figure at its resolution.
+    """
+    width, height = fig.get_size_inches()
+    return int(max(width, height) * fig.dpi * LOD_UTILITY__POINTS_PER_PIXEL)
+
+
+def min_max_indices(y, budget: int) -> np.ndarray:
+    """
+    @brief: indices of the first and last point and of the minimum and maximum of y in
+    (budget - 2) // 2 buckets of (nearly) equal size, in order.
+    @param:
+        y: sampled signal.
+        budget: maximum number of points to keep.
+    @returns:
+        sorted int64 index array of at most budget indices; all indices if y already fits the
+        budget or the budget is below LOD_UTILITY__MIN_MAX_MINIMUM_POINTS.
+    """
+    y = np.asarray(y)
+    if y.size <= budget or budget < LOD_UTILITY__MIN_MAX_MINIMUM_POINTS:
+        return np.arange(y.size)
+    buckets = (budget - LOD_UTILITY__END_POINTS) // 2
+    width = y.size // buckets
+    # the first y.size % buckets buckets are one sample wider, so every bucket holds samples
+    split = (y.size % buckets) * (width + 1)
+    indices = [[0], [y.size - 1]]
+    for offset, part, part_width in ((0, y[:split], width + 1), (split, y[split:], width)):
+        if part.size:
+            rows = part.reshape(-1, part_width)
+            base = offset + np.arange(rows.shape[0]) * part_width
+            indices += [base + rows.argmin(axis=1), base + rows.argmax(axis=1)]
+    return np.unique(np.concatenate(indices))
+
+
+def lttb_indices(x, y, budget: int) -> np.ndarray:
+    """
+    @brief: Largest-Triangle-Three-Buckets down-sampling of the path (x, y).
+    @param:
+        x, y: path coordinates in drawing order.
+        budget: maximum number of points to keep.
+    @returns:
+        sorted int64 index array; all indices if the path already fits the budget.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if x.size <= budget or budget < LOD_UTILITY__LTTB_MINIMUM_POINTS:
+        return np.arange(x.size)
+    # the inner points are split into budget - 2 buckets; edges[i]:edges[i + 1] is bucket i
+    edges = (np.arange(budget - 1) * ((x.size - 2) / (budget - 2))).astype(np.int64) + 1
+    edges[-1] = x.size - 1
+    # average of every bucket, the last point stands in for the bucket after the last one
+    sum_x = np.concatenate(([0.0], np.cumsum(x)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))
+    counts = np.maximum(np.diff(edges), 1)
+    mean_x = np.append((sum_x[edges[1:]] - sum_x[edges[:-1]]) / counts, x[-1])
+    mean_y = np.append((sum_y[edges[1:]] - sum_y[edges[:-1]]) / counts, y[-1])
+
+    selected = np.empty(budget, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = x.size - 1
+    anchor = 0
+    for bucket in range(budget - 2):
+        start, end = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        # twice the area of the triangle anchor - candidate - next bucket average
+        area = np.abs((x[anchor] - mean_x[bucket + 1]) * (y[start:end] - y[anchor]) -
+                      (x[anchor] - x[start:end]) * (mean_y[bucket + 1] - y[anchor]))
+        anchor = start + int(area.argmax())
+        selected[bucket + 1] = anchor
+    return np.unique(selected)
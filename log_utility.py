@@ -0,0 +1,163 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for zero-copy access to ASCII log files as numpy byte buffers.
+  *
+  *          Line boundaries and numeric fields are found on the raw bytes, so no per-line str
+  *          objects are built. Shared by the GNSS and PPG decoders.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import mmap
+import os
+
+import numpy as np
+
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_READ, stage
+
+# ASCII characters used for scanning
+LOG_UTILITY__LINE_FEED = ord("\n")
+LOG_UTILITY__FIELD_DELIMITER = ord(",")
+LOG_UTILITY__DECIMAL_POINT = ord(".")
+LOG_UTILITY__MINUS_SIGN = ord("-")
+LOG_UTILITY__ASCII_ZERO = ord("0")
+LOG_UTILITY__ASCII_NINE = ord("9")
+
+
+def map_log_file(log_file=None) -> np.ndarray:
+    """
+    @brief: memory-map a log file read-only and expose it as a uint8 array without copying.
+    @param:
+        log_file: Full path of the log file.
+    @returns:
+        uint8 numpy array backed by the page cache. The array keeps the mapping alive; it is
+        unmapped once the array and every view of it have been released.
+    """
+    with stage(INSTRUMENT_UTILITY__STAGE_READ) as read_stage, open(log_file, 'rb') as lf:
+        size = os.fstat(lf.fileno()).st_size
+        read_stage.add(nbytes=size)
+        # mmap cannot map an empty file
+        if size == 0:
+            return np.empty(0, dtype=np.uint8)
+        return np.frombuffer(mmap.mmap(lf.fileno(), 0, access=mmap.ACCESS_READ), dtype=np.uint8)
+
+
+def line_bounds(buf: np.ndarray):
+    """
+    @brief: [start, end) byte offsets of every line in buf, end excluding the line feed.
+    """
+    line_feeds = np.flatnonzero(buf == LOG_UTILITY__LINE_FEED)
+    starts = np.concatenate(([0], line_feeds + 1))
+    ends = np.append(line_feeds, buf.size)
+    keep = starts < buf.size
+    return starts[keep], ends[keep]
+
+
+def starts_with(buf: np.ndarray, starts: np.ndarray, header: bytes) -> np.ndarray:
+    """
+    @brief: boolean mask of the offsets in starts whose bytes begin with header.
+    """
+    mask = starts + len(header) <= buf.size
+    for offset, char in enumerate(header):
+        mask[mask] = buf[starts[mask] + offset] == char
+    return mask
+
+
+def line_blocks(buf: np.ndarray, block_size):
+    """
+    @brief: yield (offset, block) of buf in blocks of about block_size bytes ending at a line
+    end, so a large log is decoded with bounded intermediate arrays.
+    """
+    offset = 0
+    while offset < buf.size:
+        end = min(offset + block_size, buf.size)
+        if end < buf.size:
+            # back up to the end of the last whole line; a line longer than the block extends it
+            line_feeds = np.flatnonzero(buf[offset:end] == LOG_UTILITY__LINE_FEED)
+            if line_feeds.size:
+                end = offset + int(line_feeds[-1]) + 1
+            else:
+                line_feeds = np.flatnonzero(buf[end:] == LOG_UTILITY__LINE_FEED)
+                end = end + int(line_feeds[0]) + 1 if line_feeds.size else buf.size
+        yield offset, buf[offset:end]
+        offset = end
+
+
+def _accumulate_digits(buf: np.ndarray, start: np.ndarray, end: np.ndarray, width: int,
+                       allow_point: bool):
+    """
+    @brief: digits of buf[start:end], at most width bytes each, accumulated one byte column at
+    a time, so only a few arrays of one element per number are allocated.
+    @returns:
+        mantissa: int64 integer value of the digits.
+        decimals: number of digits after the decimal point.
+        negative: True where the first byte is a minus sign.
+        well_formed: True where the number is an optional minus sign followed by at least one
+                     digit and, if allow_point, at most one decimal point; nothing else.
+    """
+    length = np.minimum(end - start, width)
+    last = max(buf.size - 1, 0)
+    mantissa = np.zeros(start.size, dtype=np.int64)
+    decimals = np.zeros(start.size, dtype=np.int64)
+    after_point = np.zeros(start.size, dtype=bool)
+    negative = np.zeros(start.size, dtype=bool)
+    has_digit = np.zeros(start.size, dtype=bool)
+    well_formed = np.ones(start.size, dtype=bool)
+    index = np.empty(start.size, dtype=np.int64)
+    for column in range(width):
+        valid = column < length
+        np.minimum(np.add(start, column, out=index), last, out=index)
+        chars = buf[index]
+        # bytes below "0" wrap around to large values
+        digits = chars - np.uint8(LOG_UTILITY__ASCII_ZERO)
+        is_digit = valid & (digits <= LOG_UTILITY__ASCII_NINE - LOG_UTILITY__ASCII_ZERO)
+        np.multiply(mantissa, 10, out=mantissa, where=is_digit)
+        np.add(mantissa, digits, out=mantissa, where=is_digit)
+        has_digit |= is_digit
+        decimals += is_digit & after_point
+        other = valid & ~is_digit
+        if column == 0:
+            negative = other & (chars == LOG_UTILITY__MINUS_SIGN)
+            other &= ~negative
+        if allow_point:
+            point = other & (chars == LOG_UTILITY__DECIMAL_POINT)
+            # a second point is not part of a number
+            well_formed &= ~(point & after_point)
+            after_point |= point
+            other &= ~point
+        well_formed &= ~other
+    return mantissa, decimals, negative, well_formed & has_digit
+
+
+def parse_decimal(buf: np.ndarray, start: np.ndarray, end: np.ndarray, width: int):
+    """
+    @brief: vectorised float() of the ASCII decimals buf[start:end], at most width bytes each.
+    @param:
+        buf: uint8 view of the log.
+        start, end: byte offsets of each number.
+        width: maximum number of bytes to read per number.
+    @returns:
+        float64 array; NaN where the bytes are not a decimal number. The digits are
+        accumulated as an integer mantissa and divided by a power of ten once, so the result
+        is rounded exactly like float() on the same text.
+    """
+    mantissa, decimals, negative, well_formed = _accumulate_digits(buf, start, end, width, True)
+    value = mantissa / 10.0 ** decimals
+    value = np.where(negative, -value, value)
+    value[~well_formed] = np.nan
+    return value
+
+
+def parse_integer(buf: np.ndarray, start: np.ndarray, end: np.ndarray, width: int):
+    """
+    @brief: vectorised int() of the ASCII integers buf[start:end], at most width bytes each.
+    @returns:
+        float64 array of the integer values, exact up to 2**53; NaN where the bytes are not
+        an optional minus sign followed by digits, so a corrupt field is never read as a
+        plausible value. Callers range-check before casting to an integer type.
+    """
+    mantissa, _, negative, well_formed = _accumulate_digits(buf, start, end, width, False)
+    value = np.where(negative, -mantissa, mantissa).astype(np.float64)
+    value[~well_formed] = np.nan
+    return value
@@ -0,0 +1,298 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for decoding one large log on all CPU cores.
+  *
+  *          The log is memory-mapped and split into byte ranges, each ending at a line end (or,
+  *          for track tables, in front of an epoch header). Every range is decoded by a worker
+  *          process, which maps the file itself, so no log bytes are sent to it. The worker
+  *          copies its result arrays into one shared memory segment and only returns the name
+  *          and layout of the segment; the parent copies the ranges into the output arrays in
+  *          log order and frees the segments. The decoded values are never pickled.
+  *
+  *          Small logs are decoded in process: starting the workers costs more than it saves.
+  *
+  *            latitude, longitude = parallel_parse_all("gps.txt", workers=8)
+  *            track = parallel_parse_track("gps.txt")
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import concurrent.futures
+import functools
+import os
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from gnss_utility import GNSS_UTILITY__GPGGA_HEADER, GNSS_UTILITY__GPRMC_HEADER
+from gnss_utility import decode_gpgga, decode_track
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_BUILD, stage
+from log_utility import map_log_file
+from ppg_utility import decode_ppg_raw
+
+# ranges are cut after a line end, or in front of the sentence opening an epoch
+PARALLEL_UTILITY__LINE_SEPARATORS = (b"\n",)
+PARALLEL_UTILITY__EPOCH_SEPARATORS = (b"\n" + GNSS_UTILITY__GPGGA_HEADER,
+                                      b"\n" + GNSS_UTILITY__GPRMC_HEADER)
+# smallest range worth a worker; logs smaller than two ranges are decoded in process
+PARALLEL_UTILITY__MIN_RANGE_BYTES = 16 * 1024 * 1024
+# a few ranges per worker even out workers finishing early
+PARALLEL_UTILITY__RANGES_PER_WORKER = 4
+# bytes searched at a time for the next separator
+PARALLEL_UTILITY__SEARCH_WINDOW = 64 * 1024
+# result array offsets in a segment are aligned for any dtype
+PARALLEL_UTILITY__ALIGNMENT = 64
+
+PARALLEL_UTILITY__KIND_ARRAY = "array"
+PARALLEL_UTILITY__KIND_TUPLE = "tuple"
+PARALLEL_UTILITY__KIND_DICT = "dict"
+
+
+def _next_boundary(buf: np.ndarray, position: int, separators=PARALLEL_UTILITY__LINE_SEPARATORS):
+    """
+    @brief: offset just behind the line feed of the first separator at or after position,
+    buf.size if there is none.
+    """
+    overlap = max(len(separator) for separator in separators) - 1
+    while position < buf.size:
+        window = buf[position:position + PARALLEL_UTILITY__SEARCH_WINDOW + overlap].tobytes()
+        found = [offset for offset in (window.find(separator) for separator in separators)
+                 if offset >= 0]
+        if found:
+            return position + min(found) + 1
+        position += PARALLEL_UTILITY__SEARCH_WINDOW
+    return buf.size
+
+
+def aligned_ranges(buf: np.ndarray, parts: int, separators=PARALLEL_UTILITY__LINE_SEPARATORS):
+    """
+    @brief: split a log buffer into about equal byte ranges starting at separators.
+    @param:
+        buf: uint8 array of the whole log.
+        parts: number of ranges wanted; fewer are returned when separators are scarce.
+        separators: byte strings starting with a line feed, a range starts right after it.
+    @returns:
+        list of (start, end) byte offsets, covering buf in order without gaps.
+    """
+    cuts = [0]
+    for part in range(1, parts):
+        target = max(part * buf.size // parts, cuts[-1])
+        cut = _next_boundary(buf, target, separators)
+        if cut >= buf.size:
+            break
+        if cut > cuts[-1]:
+            cuts.append(cut)
+    cuts.append(buf.size)
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def _flatten_result(result):
+    """
+    @brief: kind and (key, array) pairs of a decoder result.
+    """
+    if isinstance(result, np.ndarray):
+        return PARALLEL_UTILITY__KIND_ARRAY, [(None, result)]
+    if isinstance(result, dict):
+        return PARALLEL_UTILITY__KIND_DICT, list(result.items())
+    return PARALLEL_UTILITY__KIND_TUPLE, list(enumerate(result))
+
+
+def _to_shared_memory(result):
+    """
+    @brief: copy the arrays of a decoder result into a new shared memory segment.
+    @returns:
+        (segment name, kind, layout) with layout a list of (key, dtype, shape, offset).
+    """
+    kind, arrays = _flatten_result(result)
+    layout = []
+    size = 0
+    for key, array in arrays:
+        array = np.asarray(array)
+        layout.append((key, array.dtype.str, array.shape, size))
+        size += -(-array.nbytes // PARALLEL_UTILITY__ALIGNMENT) * PARALLEL_UTILITY__ALIGNMENT
+    segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for (_, array), (_, dtype, shape, offset) in zip(arrays, layout):
+        np.ndarray(shape, dtype, buffer=segment.buf, offset=offset)[...] = array
+    # the parent unlinks the segment; without this the worker's resource tracker would
+    # unlink it as leaked when the worker exits
+    resource_tracker.unregister(segment._name, "shared_memory")
+    segment.close()
+    return segment.name, kind, layout
+
+
+def _decode_range(log_file, start, end, decode, want_stats):
+    """
+    @brief: worker: decode one byte range of the log into shared memory.
+    @returns:
+        (segment name, kind, layout, stats), see _to_shared_memory().
+    """
+    buf = map_log_file(log_file)[start:end]
+    if want_stats:
+        stats = {}
+        result = decode(buf, stats=stats)
+    else:
+        stats = None
+        result = decode(buf)
+    return (*_to_shared_memory(result), stats)
+
+
+def _merge_split_epoch(previous: dict, current: dict) -> int:
+    """
+    @brief: merge an epoch split across two ranges (GPRMC ending one, GPGGA opening the next)
+    into the last row of the previous range, like stream_utility.TrackAccumulator.
+    @returns:
+        number of leading rows of current to skip.
+    """
+    if previous["utc_time"].size == 0 or current["utc_time"].size == 0 or \
+            current["utc_time"][0] != previous["utc_time"][-1]:
+        return 0
+    for name, values in previous.items():
+        if np.isnan(values[-1]):
+            values[-1] = current[name][0]
+    return 1
+
+
+def _concatenate(arrays, skips):
+    """
+    @brief: concatenate arrays into one new array, without the first skips[i] rows of arrays[i].
+    """
+    output = np.empty((sum(array.shape[0] - skip for array, skip in zip(arrays, skips)),) +
+                      arrays[0].shape[1:], arrays[0].dtype)
+    row = 0
+    for array, skip in zip(arrays, skips):
+        output[row:row + array.shape[0] - skip] = array[skip:]
+        row += array.shape[0] - skip
+    return output
+
+
+def _assemble(parts, merge=None):
+    """
+    @brief: copy the per-range results out of shared memory into one result, in range order.
+    """
+    segments = []
+    views = []
+    for name, _, layout, _ in parts:
+        segment = shared_memory.SharedMemory(name=name)
+        # the name is removed at once; the mapping stays valid until the segment is closed
+        segment.unlink()
+        segments.append(segment)
+        views.append({key: np.ndarray(shape, dtype, buffer=segment.buf, offset=offset)
+                      for key, dtype, shape, offset in layout})
+    # rows of every range to leave out, merged into the range before it
+    skips = [0] + [merge(previous, current) if merge else 0
+                   for previous, current in zip(views[:-1], views[1:])]
+    with stage(INSTRUMENT_UTILITY__STAGE_BUILD) as build_stage:
+        merged = {key: _concatenate([view[key] for view in views], skips)
+                  for key, *_ in parts[0][2]}
+        build_stage.add(nbytes=sum(array.nbytes for array in merged.values()))
+    # the views must be gone before the segments can be closed
+    del views
+    for segment in segments:
+        segment.close()
+    kind = parts[0][1]
+    if kind == PARALLEL_UTILITY__KIND_ARRAY:
+        return merged[None]
+    if kind == PARALLEL_UTILITY__KIND_TUPLE:
+        return tuple(merged[index] for index in range(len(merged)))
+    return merged
+
+
+def _release(futures):
+    """
+    @brief: unlink the segments of the ranges that were decoded when another one failed.
+    """
+    for future in futures:
+        if future.done() and not future.cancelled() and future.exception() is None:
+            name = future.result()[0]
+            segment = shared_memory.SharedMemory(name=name)
+            segment.close()
+            segment.unlink()
+
+
+def parallel_decode(log_file=None, decode=None, workers=None, stats=None,
+                    separators=PARALLEL_UTILITY__LINE_SEPARATORS, merge=None,
+                    min_range_bytes=None):
+    """
+    @brief: decode a log with decode() over byte ranges in worker processes.
+    @param:
+        log_file: Full path of the log file.
+        decode: picklable function(buffer) of whole lines returning an array, a tuple of
+                arrays or a dict of arrays, with rows in log order; called as
+                decode(buffer, stats=...) when stats is given.
+        workers: number of worker processes, None for one per CPU core.
+        stats: optional dict of counters; the counters of all ranges are added to it.
+        separators: where ranges may start, see aligned_ranges().
+        merge: optional function(previous, current) joining the rows of two adjacent range
+               results, returning the number of leading rows of current to drop.
+        min_range_bytes: smallest range given to a worker, None for
+                         PARALLEL_UTILITY__MIN_RANGE_BYTES.
+    @returns:
+        the result decode() would return for the whole log.
+    """
+    workers = workers or os.cpu_count() or 1
+    min_range_bytes = min_range_bytes or PARALLEL_UTILITY__MIN_RANGE_BYTES
+    buf = map_log_file(log_file)
+    parts = min(workers * PARALLEL_UTILITY__RANGES_PER_WORKER, buf.size // min_range_bytes)
+    ranges = aligned_ranges(buf, parts, separators) if workers > 1 and parts > 1 else []
+    if len(ranges) < 2:
+        return decode(buf) if stats is None else decode(buf, stats=stats)
+    del buf
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        futures = [pool.submit(_decode_range, log_file, start, end, decode, stats is not None)
+                   for start, end in ranges]
+        try:
+            results = [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            concurrent.futures.wait(futures)
+            _release(futures)
+            raise
+    if stats is not None:
+        for *_, range_stats in results:
+            for key, value in range_stats.items():
+                stats[key] = stats.get(key, 0) + value
+    return _assemble(results, merge)
+
+
+def parallel_parse_all(log_file=None, workers=None, drop_invalid=True, stats=None):
+    """
+    @brief: gnss_utility.parse_all_vectorized() on all cores.
+    @param:
+        log_file: Full path of the log file to be parsed.
+        workers: number of worker processes, None for one per CPU core.
+        drop_invalid, stats: checksum handling, see gnss_utility.decode_gpgga().
+    @returns:
+        latitude, longitude: float64 arrays in signed degrees, identical to
+        parse_all_vectorized().
+    """
+    return parallel_decode(log_file, functools.partial(decode_gpgga, drop_invalid=drop_invalid),
+                           workers, stats)
+
+
+def parallel_parse_track(log_file=None, workers=None, drop_invalid=True, stats=None):
+    """
+    @brief: gnss_utility.parse_track() on all cores. Ranges start at GPGGA / GPRMC sentences,
+    so sentences without a time (GPVTG) stay in the range of their epoch, and an epoch split
+    between two ranges is merged back into one row.
+    @param:
+        log_file: Full path of the log file to be parsed.
+        workers: number of worker processes, None for one per CPU core.
+        drop_invalid, stats: checksum handling, see gnss_utility.decode_gpgga().
+    @returns:
+        dict of float64 column arrays, see gnss_utility.decode_track().
+    """
+    return parallel_decode(log_file, functools.partial(decode_track, drop_invalid=drop_invalid),
+                           workers, stats, PARALLEL_UTILITY__EPOCH_SEPARATORS,
+                           _merge_split_epoch)
+
+
+def parallel_parse_ppg(log_file=None, workers=None):
+    """
+    @brief: ppg_utility.parse_all_raw_mmap() on all cores.
+    @returns:
+        PPG_UTILITY__RAW_DTYPE (uint32) array of the raw samples in log order.
+    """
+    return parallel_decode(log_file, decode_ppg_raw, workers)
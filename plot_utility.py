@@ -0,0 +1,124 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for headless rendering of flight routes and PPG traces, once
+  *          or live while a log is followed (LivePlot).
+  *
+  *          Figures are built with matplotlib.figure.Figure rather than pyplot, so no GUI
+  *          backend or global figure state is involved and worker processes can render in
+  *          parallel. Series are reduced to the figure's point budget first (lod_utility).
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_RENDER, INSTRUMENT_UTILITY__STAGE_SAVE
+from instrument_utility import stage
+from lod_utility import lttb_indices, min_max_indices, point_budget
+
+# Error Codes
+PLOT_UTILITY__TRUE = 1
+PLOT_UTILITY__FALSE = 0
+
+
+def render_flight_route(latitude=None, longitude=None, output_file=None):
+    """
+    @brief render the flight route the same way as data_plot in gnss-plots.py
+    @param:
+        latitude in array values
+        longitude in array values
+        output_file: image file to write, the format follows the extension
+    @returns:
+        PLOT_UTILITY__TRUE - Success
+        PLOT_UTILITY__FALSE - Failure
+    """
+    if len(latitude) == 0:
+        return PLOT_UTILITY__FALSE
+    with stage(INSTRUMENT_UTILITY__STAGE_RENDER) as render_stage:
+        render_stage.add(lines=len(latitude))
+        fig = Figure()
+        ax = fig.subplots()
+        # longitude on the x-axis, latitude on the y-axis
+        keep = lttb_indices(longitude, latitude, point_budget(fig))
+        ax.plot(np.asarray(longitude)[keep], np.asarray(latitude)[keep])
+        ax.set(xlabel='longitude (degree)', ylabel='latitude (degree)',
+               title='Plot of flight route')
+        ax.grid()
+    with stage(INSTRUMENT_UTILITY__STAGE_SAVE):
+        fig.savefig(output_file)
+    return PLOT_UTILITY__TRUE
+
+
+def render_ppg(t=None, ppg=None, output_file=None):
+    """
+    @brief render ppg raw data the same way as data_plot in ppg-raw-data-plots.py
+    @param:
+        t: time line in array values
+        ppg: ppg raw values in array values
+        output_file: image file to write, the format follows the extension
+    @returns:
+        PLOT_UTILITY__TRUE - Success
+        PLOT_UTILITY__FALSE - Failure
+    """
+    if len(ppg) == 0:
+        return PLOT_UTILITY__FALSE
+    with stage(INSTRUMENT_UTILITY__STAGE_RENDER) as render_stage:
+        render_stage.add(lines=len(ppg))
+        fig = Figure()
+        ax = fig.subplots()
+        keep = min_max_indices(ppg, point_budget(fig))
+        ax.plot(np.asarray(t)[keep], np.asarray(ppg)[keep])
+        ax.set(xlabel='time (discrete)', ylabel='ppg raw (adc steps)',
+               title='Plot of ppg raw data')
+        ax.grid()
+    with stage(INSTRUMENT_UTILITY__STAGE_SAVE):
+        fig.savefig(output_file)
+    return PLOT_UTILITY__TRUE
+
+
+class LivePlot:
+    """
+    @brief one figure and line artist kept across refreshes of a growing series (follow mode)
+    @param:
+        output_file: image file rewritten on every update, the format follows the extension
+        reduce: point selection function(x, y, budget) returning indices, e.g. lttb_indices
+        xlabel, ylabel, title: axes labels
+    """
+
+    def __init__(self, output_file=None, reduce=lttb_indices, xlabel=None, ylabel=None,
+                 title=None):
+        self.output_file = output_file
+        self.reduce = reduce
+        self.fig = Figure()
+        self.ax = self.fig.subplots()
+        self.line, = self.ax.plot([], [])
+        self.ax.set(xlabel=xlabel, ylabel=ylabel, title=title)
+        self.ax.grid()
+
+    def update(self, x=None, y=None):
+        """
+        @brief replace the data of the line artist in place, rescale and rewrite the image
+        @returns:
+            PLOT_UTILITY__TRUE - Success
+            PLOT_UTILITY__FALSE - Failure
+        """
+        if len(y) == 0:
+            return PLOT_UTILITY__FALSE
+        with stage(INSTRUMENT_UTILITY__STAGE_RENDER) as render_stage:
+            render_stage.add(lines=len(y))
+            keep = self.reduce(x, y, point_budget(self.fig))
+            self.line.set_data(np.asarray(x)[keep], np.asarray(y)[keep])
+            self.ax.relim()
+            self.ax.autoscale_view()
+        with stage(INSTRUMENT_UTILITY__STAGE_SAVE):
+            self.fig.savefig(self.output_file)
+        return PLOT_UTILITY__TRUE
+
+
+def ppg_min_max_indices(t=None, ppg=None, budget=None):
+    """
+    @brief min_max_indices() of a ppg trace, with the reduce signature of LivePlot
+    """
+    return min_max_indices(ppg, budget)
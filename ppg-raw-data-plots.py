@@ -20,15 +20,25 @@
 
 # for plotting function
 import numpy as np
-import matplotlib.pyplot as plt
+# matplotlib.pyplot is imported on first use by _pyplot(), on the non-interactive Agg backend
 
 # for data process function
+import argparse
 import logging as log
-import tkinter as tk
-from tkinter import filedialog as fd
-import openpyxl as xlsx
 import time
 import os
+import sys
+
+# for bulk data process function
+from ppg_utility import parse_channels, channel_number, decode_ppg_raw
+from follow_utility import LogFollower, follow, FOLLOW_UTILITY__POLL_INTERVAL_SECONDS
+from ppg_utility import PPG_UTILITY__ALIGN_INDEX, PPG_UTILITY__ALIGN_TIMESTAMP
+from ppg_dsp_utility import process_ppg, PPG_DSP_UTILITY__SAMPLE_RATE_HZ
+from ppg_dsp_utility import PPG_DSP_UTILITY__BLOCK_SIZE
+from lod_utility import min_max_indices, point_budget
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_RENDER, INSTRUMENT_UTILITY__STAGE_SAVE
+from instrument_utility import stage
+import instrument_utility
 
 # Error Codes
 GNSS__TRUE = 1
@@ -58,10 +68,10 @@ GNSS__USER_INTERACTIVE_SLEEP_BEFORE_QUIT_PROGRAM_SECOND = 2
 # PATH for data log and test data log
 class Const:
     """Constants used as gnss data inputs."""
-    TEST_DATA_INPUT_LOCAL_PATH = r"data\only_ppg-raw-data_test_input.TXT"
-    EXPECTED_TEST_DATA_OUTPUT_PATH = r"data\expected_only_ppg-raw-data_test_output.TXT"
-    # DATA_LOCAL_PATH = r"data\only_ppg-raw-data_test_input.TXT"
-    DATA_LOCAL_PATH = r"data\ppg-raw-data_ch3_6_12_2023_16-57-13.TXT"
+    TEST_DATA_INPUT_LOCAL_PATH = os.path.join("data", "only_ppg-raw-data_test_input.TXT")
+    EXPECTED_TEST_DATA_OUTPUT_PATH = os.path.join("data", "expected_only_ppg-raw-data_test_output.TXT")
+    # DATA_LOCAL_PATH = os.path.join("data", "only_ppg-raw-data_test_input.TXT")
+    DATA_LOCAL_PATH = os.path.join("data", "ppg-raw-data_ch3_6_12_2023_16-57-13.TXT")
 
 
 # Delimiters used to separate data and labels. Used for the parse_all function.
@@ -71,6 +81,9 @@ DEFAULT_DELIMS__GNSS_GPGGA_LOG_FIELD_DELIMITERS_INDEX = 0
 
 # Output plot file name.
 OUTPUT_FILE_NAME = "ppg_raw_plot.png"
+# Output plot formats; rendering is always headless.
+OUTPUT_FILE_FORMATS = ("png", "svg", "pdf")
+PLOT_BACKEND = "Agg"
 
 # ============================part of progressive solutions============================
 # following three functions contain progressive work during the task: 
@@ -210,12 +223,23 @@ def test_parse_all_raw_data(test_input=None, expected_test_input=None, delims=No
 
 
 
-def data_plot(latitude=None, longitude=None):   
+def _pyplot():
+    """
+    @brief import pyplot on first use, on the non-interactive Agg backend (no Tk, no display)
+    """
+    import matplotlib
+    matplotlib.use(PLOT_BACKEND)
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def data_plot(latitude=None, longitude=None, output_file=OUTPUT_FILE_NAME):   
     """
     @brief plot 2-D data
     @param: 
         latitude in array values 
         longitude in array values
+        output_file: image file to write, the format follows the extension
     @returns:
         GNSS__TRUE - Success
         GNSS__FALSE - Failure
@@ -233,15 +257,51 @@ def data_plot(latitude=None, longitude=None):
     # print(longitude)
     
     # plotting
-    fig, ax = plt.subplots()    
-    ax.plot(latitude, longitude)
-
-    ax.set(xlabel='time (discrete)', ylabel='ppg raw (adc steps)',
-           title='Plot of ppg raw data')
-    ax.grid()
+    plt = _pyplot()
+    with stage(INSTRUMENT_UTILITY__STAGE_RENDER) as render_stage:
+        fig, ax = plt.subplots()    
+        # only draw the min/max of each pixel column the output resolution can show
+        keep = min_max_indices(longitude, point_budget(fig))
+        render_stage.add(lines=len(longitude))
+        ax.plot(np.asarray(latitude)[keep], np.asarray(longitude)[keep])
+
+        ax.set(xlabel='time (discrete)', ylabel='ppg raw (adc steps)',
+               title='Plot of ppg raw data')
+        ax.grid()
+
+    with stage(INSTRUMENT_UTILITY__STAGE_SAVE):
+        fig.savefig(output_file)
+    plt.close(fig)
+    return GNSS__TRUE
 
-    fig.savefig(OUTPUT_FILE_NAME)
-    plt.show()
+def data_plot_channels(t=None, ppg_channels=None, labels=None, output_file=OUTPUT_FILE_NAME):
+    """
+    @brief plot several PPG channels in one figure, one subplot per channel on shared axes
+    @param:
+        t: sample timeline, one value per row of ppg_channels
+        ppg_channels: samples x channels array
+        labels: one name per channel
+        output_file: image file to write, the format follows the extension
+    @returns:
+        GNSS__TRUE - Success
+        GNSS__FALSE - Failure
+    """
+    plt = _pyplot()
+    with stage(INSTRUMENT_UTILITY__STAGE_RENDER) as render_stage:
+        fig, axes = plt.subplots(ppg_channels.shape[1], 1, sharex=True, sharey=True,
+                                 squeeze=False)
+        render_stage.add(lines=ppg_channels.size)
+        for ax, ppg, label in zip(axes[:, 0], ppg_channels.T, labels):
+            keep = min_max_indices(ppg, point_budget(fig))
+            ax.plot(np.asarray(t)[keep], ppg[keep])
+            ax.set(ylabel=label)
+            ax.grid()
+        axes[0, 0].set(title='Plot of ppg raw data (adc steps)')
+        axes[-1, 0].set(xlabel='time (discrete)')
+
+    with stage(INSTRUMENT_UTILITY__STAGE_SAVE):
+        fig.savefig(output_file)
+    plt.close(fig)
     return GNSS__TRUE
 
 def test_parse_all(test_input=None, expected_test_input=None, delims=None):
@@ -312,69 +372,133 @@ def test_parse_all(test_input=None, expected_test_input=None, delims=None):
     else:
         return GNSS__FALSE
 
-def generate_incrementing_array(num_elements):
-    return [i + 1 for i in range(num_elements)]
+def parse_arguments(argv=None):
+    """
+     @brief: command line of the tool
+     @param:
+         argv: argument list, None for sys.argv
+     @returns:
+         argparse namespace with input (list of files), output, format, align, sample_rate,
+         block_size, follow, interval, idle_timeout, export and profile
+    """
+    parser = argparse.ArgumentParser(
+        description="Plot Goodix GH3220 PPG raw data, one ADC value per line.")
+    parser.add_argument("input", nargs="*", default=[Const.DATA_LOCAL_PATH],
+                        help="PPG raw data log file, or one file per channel (default: %(default)s)")
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE_NAME,
+                        help="output plot file (default: %(default)s)")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FILE_FORMATS,
+                        help="plot file format (default: from the output file extension)")
+    parser.add_argument("-a", "--align", default=PPG_UTILITY__ALIGN_INDEX,
+                        choices=(PPG_UTILITY__ALIGN_INDEX, PPG_UTILITY__ALIGN_TIMESTAMP),
+                        help="how channel files are aligned (default: %(default)s)")
+    parser.add_argument("-r", "--sample-rate", type=float, default=PPG_DSP_UTILITY__SAMPLE_RATE_HZ,
+                        help="PPG sampling rate in Hz for beat detection (default: %(default)s)")
+    parser.add_argument("-b", "--block-size", type=int, default=PPG_DSP_UTILITY__BLOCK_SIZE,
+                        help="samples per DSP block, as a streaming feed (default: %(default)s)")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep following the (single) log as it grows and rewrite the plot "
+                             "on new samples, until Ctrl+C")
+    parser.add_argument("--interval", type=float, default=FOLLOW_UTILITY__POLL_INTERVAL_SECONDS,
+                        help="follow mode poll interval in seconds (default: %(default)s)")
+    parser.add_argument("--idle-timeout", type=float,
+                        help="stop following after this many seconds without new data")
+    parser.add_argument("-e", "--export",
+                        help="also write the samples (one column per channel) to this file; "
+                             "format from the extension: npz, parquet, feather, csv, xlsx, "
+                             "or none for a directory of .npy columns")
+    parser.add_argument("--profile", metavar="REPORT",
+                        help="measure time, throughput and peak memory of the read, parse, "
+                             "convert, build, render and save stages, print them and write "
+                             "them as JSON to REPORT ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+def write_profile(report_file=None):
+    """
+     @brief: print the stage measurements and write them as JSON, if profiling is on
+    """
+    if instrument_utility.enabled():
+        instrument_utility.print_report()
+        instrument_utility.write_report(report_file)
 
 
-# @brief    Main for gnss-plots (a tool which is plotting the flight route of a plane.) that does:
-#           Execute unit test code for parse_all function
+# @brief    Main for ppg-raw-data-plots (a tool which is plotting ppg raw data) that does:
 #           Decode data file
-#           Python 2D plot
+#           Python 2D plot, headless
+#           Follow mode, re-plotting a log that is still being written
 #           
-# @param    none
+# @param    see parse_arguments()
 #
 if __name__ == '__main__':
     log.basicConfig(level=log.CRITICAL)
-
-    root = tk.Tk()
-    root.withdraw()
-    data_dir = None    
-    # ++ this is an enhancement to ask user to choose directory where data file exist
-    # folder = fd.askdirectory(title="Choose a folder containing log files")        
-    # files = os.walk(folder)    
-    # for root, directories, filenames in os.walk(folder):
-    #     for filename in filenames:
-    #         if filename.endswith(".txt"):
-    #             log.debug(filename)
-    #             log_files.append(os.path.join(root, filename))
-    #     log.info(f"Number of log files to parse: {len(log_files)}")
-    log_files = []
-    results = []
-    test_result = None
-    data_file = os.path.abspath(Const.DATA_LOCAL_PATH)
-    test_data_input = os.path.abspath(Const.TEST_DATA_INPUT_LOCAL_PATH)
-    expected_test_input = os.path.abspath(Const.EXPECTED_TEST_DATA_OUTPUT_PATH)
-
-    # test_result = test_parse_all(
-    #     test_data_input, expected_test_input, DEFAULT_DELIMS)
-    
+    args = parse_arguments()
+    if args.profile:
+        instrument_utility.enable()
+
+    data_files = [os.path.abspath(data_file) for data_file in args.input]
+    output_file = args.output
+    if args.format:
+        output_file = os.path.splitext(output_file)[0] + "." + args.format
+    if args.follow:
+        if len(data_files) != 1:
+            print("ERROR:follow mode takes a single log.")
+            sys.exit(1)
+        # only the bytes appended since the last poll are decoded, and the same line
+        # artist is updated in place
+        from plot_utility import LivePlot, ppg_min_max_indices
+        live_plot = LivePlot(output_file, ppg_min_max_indices, 'time (discrete)',
+                             'ppg raw (adc steps)', 'Plot of ppg raw data')
+        print("following", data_files[0], "- Ctrl+C to stop")
+        samples = follow(LogFollower(data_files[0], decode_ppg_raw),
+                         lambda ppg: live_plot.update(np.arange(1, ppg.size + 1), ppg),
+                         args.interval, args.idle_timeout)
+        print("samples decoded:", samples)
+        write_profile(args.profile)
+        sys.exit(0)
+    if not all(os.path.isfile(data_file) for data_file in data_files):
+        print("ERROR:Could not find data log for use.")
+        sys.exit(1)
 
     print("proceed to main tool feature.")
-    ppg_raw_list = parse_all_raw(
-        data_file)
-
-    """
-    Reviewer feedback:A lot of overhead in the code such as copying and moving data.
-    """
-    # convert list to array
-    ppg_array = np.array(ppg_raw_list)
-    
-    # using loop Converting all strings in list to integers Naive Method
-    for i in range(0, len(ppg_raw_list)):
-        ppg_raw_list[i] = int(ppg_raw_list[i])
-    print(ppg_raw_list)
-
-    # generating time line for plotting
-    # t = np.arange(0.0, 2.0, 1)    
+    # decode adc values straight out of the memory-mapped files, no per-line strings;
+    # several files are channels of one capture, loaded concurrently
+    ppg_channels = parse_channels(data_files, args.align)
+    labels = [f"ch{channel_number(data_file)}" if channel_number(data_file) is not None
+              else os.path.basename(data_file) for data_file in data_files]
+
+    # filter, detect beats and estimate heart rate
+    for label, ppg_array in zip(labels, ppg_channels.T):
+        beats, heart_rate, throughput = process_ppg(ppg_array, args.sample_rate, args.block_size)
+        if beats.size > 1:
+            print(f"{label}: beats: {beats.size}, median heart rate: "
+                  f"{np.nanmedian(heart_rate):.1f} bpm")
+        else:
+            print(f"{label}: beats: {beats.size}, no heart rate")
+        for dsp_stage, samples_per_second in throughput.items():
+            print(f"  {dsp_stage:10} {samples_per_second:14.0f} samples/s")
 
-    # generating time line for plotting
-    t = generate_incrementing_array(ppg_array.size)
+    # generating time line for plotting, sample numbers from 1
+    t = np.arange(1, ppg_channels.shape[0] + 1, dtype=np.int32)
 
-    # Print the result
-    print(t)
-    if data_plot(t, ppg_array) == GNSS__TRUE:
-        print("Plotting successfully")
+    if ppg_channels.shape[1] == 1:
+        plotted = data_plot(t, ppg_channels[:, 0], output_file)
+    else:
+        plotted = data_plot_channels(t, ppg_channels, labels, output_file)
+    if plotted == GNSS__TRUE:
+        print("Plotting successfully:", output_file)
     else:
         print("Plotting failed")
+    if args.export:
+        # columns are written in bulk, not cell by cell
+        from export_utility import export_columns
+        columns = {"sample": t}
+        columns.update(zip(labels, ppg_channels.T))
+        try:
+            print(f"Exported {t.size} samples as {export_columns(columns, args.export)}:",
+                  args.export)
+        except (ImportError, ValueError) as error:
+            print("ERROR:", error)
+            sys.exit(1)
+    write_profile(args.profile)
     print("------------------main end---------------------------")
-
@@ -0,0 +1,244 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for block-wise PPG signal processing on numpy arrays: baseline
+  *          wander removal, band-pass filtering, beat detection and heart rate estimation.
+  *
+  *          PpgPipeline keeps the filter history between calls to process(), so a capture can be
+  *          fed in blocks of any size as it streams in and gives the same beats as one call on
+  *          the whole array. All filters are linear phase (centred windows); their delay is
+  *          compensated so beat indices refer to the raw samples.
+  *
+  *            baseline   raw - rolling median over PPG_DSP_UTILITY__BASELINE_WINDOW_SECONDS
+  *            bandpass   difference of two box filters, pass band ~LOW_CUT_HZ .. HIGH_CUT_HZ
+  *            beats      local maxima above an adaptive threshold, with a refractory period
+  *            heart rate 60 / inter-beat interval
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from gnss_utility import GNSS_UTILITY__SECONDS_PER_MINUTE
+
+# GH3x2x HR algorithm log rate, 36 ppg_rawdata lines per second
+PPG_DSP_UTILITY__SAMPLE_RATE_HZ = 36.0
+# rolling median window of the baseline estimate
+PPG_DSP_UTILITY__BASELINE_WINDOW_SECONDS = 1.5
+# pass band of the band-pass filter, 30 .. 240 bpm
+PPG_DSP_UTILITY__LOW_CUT_HZ = 0.5
+PPG_DSP_UTILITY__HIGH_CUT_HZ = 4.0
+# beats closer than this are one beat (240 bpm)
+PPG_DSP_UTILITY__REFRACTORY_SECONDS = 0.25
+# a beat peak must reach this fraction of the recent peak amplitude
+PPG_DSP_UTILITY__THRESHOLD_RATIO = 0.5
+# time constant of the recent peak amplitude
+PPG_DSP_UTILITY__AMPLITUDE_WINDOW_SECONDS = 3.0
+# samples per block of process_ppg(); the rolling median holds a block x window matrix of
+# float64 values, ~7 MB at 36 Hz
+PPG_DSP_UTILITY__BLOCK_SIZE = 16384
+# processing stages, in order
+PPG_DSP_UTILITY__STAGES = ("baseline", "bandpass", "beats", "heart_rate")
+
+
+class _Window:
+    """
+    @brief: centred sliding window over a stream. The last width - 1 samples are kept between
+    blocks, so output sample i of a block is the window around input sample i - delay.
+    """
+
+    def __init__(self, width: int):
+        self.width = max(int(width), 1)
+        self.delay = (self.width - 1) // 2
+        self.history = None
+
+    def extend(self, block: np.ndarray) -> np.ndarray:
+        """
+        @brief: history followed by block; block.size + width - 1 samples.
+        """
+        if self.history is None:
+            # start as if the first sample had always been there, no start-up transient
+            self.history = np.full(self.width - 1, block[0], dtype=np.float64)
+        samples = np.concatenate((self.history, block))
+        self.history = samples[block.size:]
+        return samples
+
+    def delayed(self, samples: np.ndarray) -> np.ndarray:
+        """
+        @brief: the input samples aligned with the window outputs of extend(block).
+        """
+        first = self.width - 1 - self.delay
+        return samples[first:samples.size - self.delay]
+
+    def mean(self, samples: np.ndarray) -> np.ndarray:
+        """
+        @brief: box filter output of extend(block), one value per block sample.
+        """
+        # offset by the first sample so the running sum stays small for 24 bit adc values
+        sums = np.concatenate(([0.0], np.cumsum(samples - samples[0])))
+        return (sums[self.width:] - sums[:-self.width]) / self.width + samples[0]
+
+    def median(self, samples: np.ndarray) -> np.ndarray:
+        """
+        @brief: rolling median output of extend(block), one value per block sample.
+        """
+        return np.median(sliding_window_view(samples, self.width), axis=1)
+
+
+class _Delay:
+    """
+    @brief: delay line over a stream, delay samples long.
+    """
+
+    def __init__(self, delay: int):
+        self.window = _Window(delay + 1)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        return self.window.extend(block)[:block.size]
+
+
+class PpgPipeline:
+    """
+    @brief: streaming baseline removal, band-pass filter, beat detector and heart rate.
+    @param:
+        sample_rate: sampling rate in Hz.
+    Usage:
+        pipeline = PpgPipeline()
+        for block in blocks:
+            beats, heart_rate = pipeline.process(block)
+        pipeline.throughput()
+    """
+
+    def __init__(self, sample_rate=PPG_DSP_UTILITY__SAMPLE_RATE_HZ):
+        self.sample_rate = float(sample_rate)
+        self.baseline = _Window(round(PPG_DSP_UTILITY__BASELINE_WINDOW_SECONDS * self.sample_rate))
+        # a box filter of width n is a low-pass with its first zero at sample_rate / n
+        self.low_pass = _Window(round(self.sample_rate / PPG_DSP_UTILITY__HIGH_CUT_HZ))
+        self.high_cut = _Window(round(self.sample_rate / PPG_DSP_UTILITY__LOW_CUT_HZ))
+        # the narrow box filter is delayed to stay aligned with the wide one
+        self.align = _Delay(self.high_cut.delay - self.low_pass.delay)
+        self.delay = self.baseline.delay + self.high_cut.delay
+        self.refractory = max(int(PPG_DSP_UTILITY__REFRACTORY_SECONDS * self.sample_rate), 1)
+        self.decay = np.exp(-1.0 / (PPG_DSP_UTILITY__AMPLITUDE_WINDOW_SECONDS * self.sample_rate))
+        # detector state carried between blocks
+        self.samples_in = 0
+        self.tail = np.empty(0)
+        self.amplitude = 0.0
+        self.amplitude_index = 0
+        self.last_beat = None
+        self.seconds = dict.fromkeys(PPG_DSP_UTILITY__STAGES, 0.0)
+
+    def remove_baseline(self, block: np.ndarray) -> np.ndarray:
+        """
+        @brief: raw samples minus their rolling median; delayed by baseline.delay samples.
+        """
+        samples = self.baseline.extend(np.asarray(block, dtype=np.float64))
+        return self.baseline.delayed(samples) - self.baseline.median(samples)
+
+    def band_pass(self, block: np.ndarray) -> np.ndarray:
+        """
+        @brief: narrow minus wide box filter; delayed by high_cut.delay samples.
+        """
+        narrow = self.low_pass.mean(self.low_pass.extend(block))
+        wide = self.high_cut.mean(self.high_cut.extend(block))
+        return self.align.process(narrow) - wide
+
+    def detect_beats(self, filtered: np.ndarray) -> np.ndarray:
+        """
+        @brief: raw sample indices of the beats (systolic peaks) in a band-passed block.
+        The last sample of a block is held back until the next block shows it is a peak.
+        """
+        # raw sample index of signal[0]
+        first = self.samples_in - filtered.size - self.delay - self.tail.size
+        signal = np.concatenate((self.tail, filtered))
+        self.tail = signal[-2:]
+        if signal.size < 3:
+            return np.empty(0, dtype=np.int64)
+        middle = signal[1:-1]
+        candidates = np.flatnonzero((middle > signal[:-2]) & (middle >= signal[2:]) &
+                                    (middle > 0)) + 1
+        # the first samples only see the start-up padding of the filters
+        candidates = candidates[first + candidates >= 0]
+        beats = []
+        # few candidates per second, the adaptive threshold is evaluated per candidate
+        for candidate in candidates.tolist():
+            index = first + candidate
+            peak = signal[candidate]
+            self.amplitude *= self.decay ** (index - self.amplitude_index)
+            self.amplitude_index = index
+            if peak < PPG_DSP_UTILITY__THRESHOLD_RATIO * self.amplitude:
+                continue
+            self.amplitude = max(self.amplitude, peak)
+            if self.last_beat is not None and index - self.last_beat < self.refractory:
+                continue
+            beats.append(index)
+            self.last_beat = index
+        return np.asarray(beats, dtype=np.int64)
+
+    def heart_rate(self, beats: np.ndarray, previous_beat) -> np.ndarray:
+        """
+        @brief: beats per minute at each beat, from the interval to the beat before it;
+        NaN for the first beat of the stream.
+        """
+        times = np.concatenate(([np.nan if previous_beat is None else previous_beat], beats))
+        return GNSS_UTILITY__SECONDS_PER_MINUTE * self.sample_rate / np.diff(times)
+
+    def process(self, block):
+        """
+        @brief: run one block of raw samples through all stages.
+        @param:
+            block: raw ppg values (adc steps) following the previous block.
+        @returns:
+            beats: int64 raw sample indices of the beats found in this block.
+            heart_rate: float64 beats per minute at each of those beats.
+        """
+        block = np.asarray(block)
+        if block.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        self.samples_in += block.size
+        previous_beat = self.last_beat
+        detrended = self._timed("baseline", self.remove_baseline, block)
+        filtered = self._timed("bandpass", self.band_pass, detrended)
+        beats = self._timed("beats", self.detect_beats, filtered)
+        heart_rate = self._timed("heart_rate", self.heart_rate, beats, previous_beat)
+        return beats, heart_rate
+
+    def _timed(self, stage, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.seconds[stage] += time.perf_counter() - start
+        return result
+
+    def throughput(self) -> dict:
+        """
+        @brief: samples per second achieved by each stage so far, and by the whole pipeline.
+        """
+        total = sum(self.seconds.values())
+        rates = {stage: self.samples_in / seconds if seconds else float("inf")
+                 for stage, seconds in self.seconds.items()}
+        rates["total"] = self.samples_in / total if total else float("inf")
+        return rates
+
+
+def process_ppg(ppg_array=None, sample_rate=PPG_DSP_UTILITY__SAMPLE_RATE_HZ,
+                block_size=PPG_DSP_UTILITY__BLOCK_SIZE):
+    """
+    @brief: run a whole capture through PpgPipeline, block by block.
+    @param:
+        ppg_array: raw ppg values (adc steps).
+        sample_rate: sampling rate in Hz.
+        block_size: samples per block; peak memory grows with it, None for one block.
+    @returns:
+        beats, heart_rate, throughput; see PpgPipeline.process() and .throughput().
+    """
+    pipeline = PpgPipeline(sample_rate)
+    block_size = block_size or max(ppg_array.size, 1)
+    results = [pipeline.process(ppg_array[start:start + block_size])
+               for start in range(0, ppg_array.size, block_size)]
+    if not results:
+        return np.empty(0, dtype=np.int64), np.empty(0), pipeline.throughput()
+    beats, heart_rate = (np.concatenate(columns) for columns in zip(*results))
+    return beats, heart_rate, pipeline.throughput()
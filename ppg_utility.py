@@ -0,0 +1,230 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for bulk decoding of GH3220 PPG raw data logs into numpy arrays.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import concurrent.futures
+import logging as log
+import os
+import re
+
+import numpy as np
+
+from gnss_utility import GNSS_UTILITY__SECONDS_PER_DAY, GNSS_UTILITY__SECONDS_PER_HOUR
+from gnss_utility import GNSS_UTILITY__SECONDS_PER_MINUTE
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_PARSE, INSTRUMENT_UTILITY__STAGE_CONVERT
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_BUILD, stage
+from log_utility import LOG_UTILITY__FIELD_DELIMITER
+from log_utility import map_log_file, line_bounds, line_blocks, parse_integer, parse_decimal
+
+# blanks around a value: "ppg_rawdata = 8414014", CRLF line endings
+PPG_UTILITY__BLANKS = (ord(" "), ord("\t"), ord("\r"))
+# separator of "ppg_rawdata = N" in the full GH3220 algorithm log
+PPG_UTILITY__VALUE_ASSIGNMENT = ord("=")
+# GH3220 raw samples are 24 bit unsigned adc steps
+PPG_UTILITY__RAW_DTYPE = np.uint32
+# bytes decoded at a time; bounds the offset and digit arrays of the decoder to a few
+# times this size, whatever the size of the log
+PPG_UTILITY__BLOCK_SIZE = 4 * 1024 * 1024
+# full algorithm log line: "53|000d 00:00:01.304|[GH3x2xHrAlgoExe]ppg_rawdata = ..."
+PPG_UTILITY__TIMESTAMP_DELIMITER = ord("|")
+# timestamp field offsets after the first "|": days "000d", then "HH:MM:SS.mmm"
+PPG_UTILITY__TIMESTAMP_DAYS = (0, 3)
+PPG_UTILITY__TIMESTAMP_HOURS = (5, 7)
+PPG_UTILITY__TIMESTAMP_MINUTES = (8, 10)
+PPG_UTILITY__TIMESTAMP_SECONDS = (11, 17)
+# channel number in capture file names such as ppg-raw-data_ch3_6_12_2023_16-57-13.TXT
+PPG_UTILITY__CHANNEL_PATTERN = re.compile(r"_ch(\d+)_", re.IGNORECASE)
+# multi-channel alignment
+PPG_UTILITY__ALIGN_INDEX = "index"
+PPG_UTILITY__ALIGN_TIMESTAMP = "timestamp"
+
+
+def _is_blank(chars: np.ndarray) -> np.ndarray:
+    blank = chars == PPG_UTILITY__BLANKS[0]
+    for char in PPG_UTILITY__BLANKS[1:]:
+        blank |= chars == char
+    return blank
+
+
+def _sample_bounds(buf: np.ndarray):
+    """
+    @brief: line start and [start, end) of the value of every sample line in buf.
+    """
+    lines, ends = line_bounds(buf)
+    # the value ends at the first delimiter of the line, or at the line end
+    commas = np.flatnonzero(buf == LOG_UTILITY__FIELD_DELIMITER)
+    first_comma = np.append(commas, buf.size)[np.searchsorted(commas, lines)]
+    ends = np.minimum(ends, first_comma)
+    # and starts after the last "=" in front of it, if the line has one
+    assignments = np.flatnonzero(buf == PPG_UTILITY__VALUE_ASSIGNMENT)
+    last_assignment = np.append(-1, assignments)[np.searchsorted(assignments, ends)]
+    starts = np.where(last_assignment >= lines, last_assignment + 1, lines)
+    # strip the blanks around the value, one byte per pass; values have one or two
+    while True:
+        leading = _is_blank(buf[np.minimum(starts, buf.size - 1)]) & (starts < ends)
+        trailing = _is_blank(buf[np.maximum(ends - 1, 0)]) & (starts < ends)
+        if not (leading.any() or trailing.any()):
+            break
+        starts = starts + leading
+        ends = ends - (trailing & (starts < ends))
+    non_empty = ends > starts
+    return lines[non_empty], starts[non_empty], ends[non_empty]
+
+
+def _valid_samples(buf: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+    """
+    @brief: ADC values of the sample fields buf[starts:ends], and which of them are valid:
+    integers within the range of PPG_UTILITY__RAW_DTYPE. Lines with a corrupt value are not
+    samples.
+    """
+    values = parse_integer(buf, starts, ends, int((ends - starts).max()))
+    # NaN compares False
+    valid = (values >= 0) & (values <= np.iinfo(PPG_UTILITY__RAW_DTYPE).max)
+    return values, valid
+
+
+def _decode_block(buf: np.ndarray):
+    """
+    @brief: ADC values of the sample lines of one block of whole lines.
+    """
+    with stage(INSTRUMENT_UTILITY__STAGE_PARSE) as parse_stage:
+        _, starts, ends = _sample_bounds(buf)
+        parse_stage.add(lines=starts.size, nbytes=buf.size)
+    if starts.size == 0:
+        return np.empty(0, dtype=PPG_UTILITY__RAW_DTYPE)
+    with stage(INSTRUMENT_UTILITY__STAGE_CONVERT) as convert_stage:
+        convert_stage.add(lines=starts.size)
+        values, valid = _valid_samples(buf, starts, ends)
+        if not valid.all():
+            log.warning(f"{valid.size - np.count_nonzero(valid)} PPG lines without a valid "
+                        f"sample value skipped")
+            values = values[valid]
+        return values.astype(PPG_UTILITY__RAW_DTYPE)
+
+
+def decode_ppg_raw(buffer, block_size=PPG_UTILITY__BLOCK_SIZE):
+    """
+    @brief: decode the ADC value of every non-empty line of a PPG raw data buffer.
+    @param:
+        buffer: bytes, bytearray, memoryview or uint8 array holding whole log lines, one
+                sample per line, optionally followed by ",gain_adj_flg = ..." fields. Lines
+                of the full algorithm log ("...]ppg_rawdata = N,gain_adj_flg = ...") are
+                decoded from the value after the "=".
+        block_size: bytes decoded at a time.
+    @returns:
+        PPG_UTILITY__RAW_DTYPE array of ppg raw values (adc steps). Lines whose value is not
+        an integer in the range of the dtype are skipped with a warning.
+    """
+    buf = np.frombuffer(buffer, dtype=np.uint8)
+    values = [_decode_block(block) for _, block in line_blocks(buf, block_size)]
+    if not values:
+        return np.empty(0, dtype=PPG_UTILITY__RAW_DTYPE)
+    return values[0] if len(values) == 1 else np.concatenate(values)
+
+
+def _decode_block_timestamps(buf: np.ndarray):
+    """
+    @brief: timestamps of the sample lines of one block of whole lines.
+    """
+    lines, starts, ends = _sample_bounds(buf)
+    if lines.size == 0:
+        return np.empty(0)
+    # one timestamp per sample decode_ppg_raw() keeps
+    valid = _valid_samples(buf, starts, ends)[1]
+    lines, starts = lines[valid], starts[valid]
+    timestamps = np.full(lines.size, np.nan)
+    bars = np.flatnonzero(buf == PPG_UTILITY__TIMESTAMP_DELIMITER)
+    first_bar = np.append(bars, buf.size)[np.searchsorted(bars, lines)]
+    stamped = first_bar + PPG_UTILITY__TIMESTAMP_SECONDS[1] < starts
+    field = first_bar[stamped] + 1
+
+    def number(bounds, parse):
+        return parse(buf, field + bounds[0], field + bounds[1], bounds[1] - bounds[0])
+
+    timestamps[stamped] = (
+        number(PPG_UTILITY__TIMESTAMP_DAYS, parse_integer) * GNSS_UTILITY__SECONDS_PER_DAY +
+        number(PPG_UTILITY__TIMESTAMP_HOURS, parse_integer) * GNSS_UTILITY__SECONDS_PER_HOUR +
+        number(PPG_UTILITY__TIMESTAMP_MINUTES, parse_integer) * GNSS_UTILITY__SECONDS_PER_MINUTE +
+        number(PPG_UTILITY__TIMESTAMP_SECONDS, parse_decimal))
+    return timestamps
+
+
+def decode_ppg_timestamps(buffer, block_size=PPG_UTILITY__BLOCK_SIZE):
+    """
+    @brief: log timestamp of every sample decoded by decode_ppg_raw().
+    @param:
+        buffer, block_size: as for decode_ppg_raw().
+    @returns:
+        float64 array of seconds since the start of the log ("000d 00:00:01.304" is 1.304),
+        one per sample; NaN for samples without a timestamp (plain value logs).
+    """
+    buf = np.frombuffer(buffer, dtype=np.uint8)
+    timestamps = [_decode_block_timestamps(block) for _, block in line_blocks(buf, block_size)]
+    if not timestamps:
+        return np.empty(0)
+    return timestamps[0] if len(timestamps) == 1 else np.concatenate(timestamps)
+
+
+def parse_all_raw_mmap(log_file=None):
+    """
+    @brief: memory-map a PPG raw data log and decode it with decode_ppg_raw().
+    @param:
+        log_file: Full path of the log file to be parsed.
+    @returns:
+        PPG_UTILITY__RAW_DTYPE array of ppg raw values, parsed straight out of the mapped file.
+    """
+    return decode_ppg_raw(map_log_file(log_file))
+
+
+def channel_number(log_file=None):
+    """
+    @brief: channel number from a capture file name ("..._ch3_..." is 3), None if absent.
+    """
+    match = PPG_UTILITY__CHANNEL_PATTERN.search(os.path.basename(log_file))
+    return int(match.group(1)) if match else None
+
+
+def _load_channel(log_file, align):
+    buf = map_log_file(log_file)
+    timestamps = decode_ppg_timestamps(buf) if align == PPG_UTILITY__ALIGN_TIMESTAMP else None
+    return decode_ppg_raw(buf), timestamps
+
+
+def parse_channels(log_files=None, align=PPG_UTILITY__ALIGN_INDEX, workers=None):
+    """
+    @brief: load one PPG capture per channel concurrently into a samples x channels array.
+    @param:
+        log_files: capture files, one per channel, in column order.
+        align: PPG_UTILITY__ALIGN_INDEX pairs samples by their number in each file;
+               PPG_UTILITY__ALIGN_TIMESTAMP first drops the samples outside the time span
+               all channels cover (full algorithm logs only, plain logs fall back to index).
+        workers: number of loader threads, None for one per file.
+    @returns:
+        PPG_UTILITY__RAW_DTYPE array of shape (samples, channels), cut to the shortest channel.
+    """
+    if align not in (PPG_UTILITY__ALIGN_INDEX, PPG_UTILITY__ALIGN_TIMESTAMP):
+        raise ValueError(f"unknown channel alignment: {align}")
+    if not log_files:
+        return np.empty((0, 0), dtype=PPG_UTILITY__RAW_DTYPE)
+    # decoding runs in numpy, which releases the GIL, so threads load channels in parallel
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers or len(log_files)) as pool:
+        channels = list(pool.map(_load_channel, log_files, [align] * len(log_files)))
+
+    if align == PPG_UTILITY__ALIGN_TIMESTAMP:
+        if all(t.size and not np.isnan(t).any() for _, t in channels):
+            first = max(t[0] for _, t in channels)
+            last = min(t[-1] for _, t in channels)
+            channels = [(ppg[(t >= first) & (t <= last)], t) for ppg, t in channels]
+        else:
+            log.warning("channel logs without timestamps, aligned by sample index")
+    if len(channels) == 1:
+        # a single channel is returned as a view, without copying
+        return channels[0][0][:, np.newaxis]
+    samples = min(ppg.size for ppg, _ in channels)
+    with stage(INSTRUMENT_UTILITY__STAGE_BUILD) as build_stage:
+        build_stage.add(lines=samples * len(channels))
+        return np.column_stack([ppg[:samples] for ppg, _ in channels])
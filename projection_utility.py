@@ -0,0 +1,142 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for projecting whole arrays of fixes from signed degrees to
+  *          map coordinates in metres, one vectorised call per track:
+  *            web_mercator()   EPSG:3857, the projection of web map tiles
+  *            utm()            Universal Transverse Mercator on WGS84, Krueger series to 6th
+  *                             order (accurate to well below a millimetre inside a zone)
+  *
+  *          A track is projected into a single UTM zone, that of its first fix unless one is
+  *          given, so the projected route stays continuous where it crosses a zone border.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import numpy as np
+
+from geodesy_utility import GEODESY_UTILITY__WGS84_A, GEODESY_UTILITY__WGS84_F
+
+PROJECTION_UTILITY__DEGREES = "degrees"
+PROJECTION_UTILITY__WEB_MERCATOR = "mercator"
+PROJECTION_UTILITY__UTM = "utm"
+PROJECTION_UTILITY__PROJECTIONS = (PROJECTION_UTILITY__DEGREES, PROJECTION_UTILITY__WEB_MERCATOR,
+                                   PROJECTION_UTILITY__UTM)
+
+# Web Mercator works on a sphere of the WGS84 semi-major axis and ends at about 85.05 degrees
+PROJECTION_UTILITY__MERCATOR_RADIUS = GEODESY_UTILITY__WGS84_A
+PROJECTION_UTILITY__MERCATOR_MAX_LATITUDE = 85.05112877980659
+PROJECTION_UTILITY__MERCATOR_HALF_WORLD = np.pi * PROJECTION_UTILITY__MERCATOR_RADIUS
+
+PROJECTION_UTILITY__UTM_SCALE = 0.9996
+PROJECTION_UTILITY__UTM_FALSE_EASTING = 500000.0
+PROJECTION_UTILITY__UTM_FALSE_NORTHING_SOUTH = 10000000.0
+PROJECTION_UTILITY__UTM_ZONE_WIDTH = 6
+PROJECTION_UTILITY__UTM_ZONES = 60
+
+# Krueger series coefficients of the WGS84 ellipsoid
+_N = GEODESY_UTILITY__WGS84_F / (2 - GEODESY_UTILITY__WGS84_F)
+_RECTIFYING_RADIUS = GEODESY_UTILITY__WGS84_A / (1 + _N) * (1 + _N ** 2 / 4 + _N ** 4 / 64)
+_ALPHA = (
+    _N / 2 - 2 * _N ** 2 / 3 + 5 * _N ** 3 / 16 + 41 * _N ** 4 / 180 - 127 * _N ** 5 / 288 +
+    7891 * _N ** 6 / 37800,
+    13 * _N ** 2 / 48 - 3 * _N ** 3 / 5 + 557 * _N ** 4 / 1440 + 281 * _N ** 5 / 630 -
+    1983433 * _N ** 6 / 1935360,
+    61 * _N ** 3 / 240 - 103 * _N ** 4 / 140 + 15061 * _N ** 5 / 26880 +
+    167603 * _N ** 6 / 181440,
+    49561 * _N ** 4 / 161280 - 179 * _N ** 5 / 168 + 6601661 * _N ** 6 / 7257600,
+    34729 * _N ** 5 / 80640 - 3418889 * _N ** 6 / 1995840,
+    212378941 * _N ** 6 / 319334400,
+)
+_ECCENTRICITY = np.sqrt(GEODESY_UTILITY__WGS84_F * (2 - GEODESY_UTILITY__WGS84_F))
+
+
+def web_mercator(latitude=None, longitude=None):
+    """
+    @brief: project signed degrees to Web Mercator (EPSG:3857).
+    @returns:
+        x, y: float64 arrays of metres east / north of (0, 0); latitudes beyond the square
+        Web Mercator world are clamped to its edges, NaN stays NaN.
+    """
+    latitude = np.clip(latitude, -PROJECTION_UTILITY__MERCATOR_MAX_LATITUDE,
+                       PROJECTION_UTILITY__MERCATOR_MAX_LATITUDE)
+    x = PROJECTION_UTILITY__MERCATOR_RADIUS * np.radians(longitude)
+    y = PROJECTION_UTILITY__MERCATOR_RADIUS * np.arcsinh(np.tan(np.radians(latitude)))
+    return np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+
+
+def inverse_web_mercator(x=None, y=None):
+    """
+    @brief: signed degrees of Web Mercator metres.
+    @returns:
+        latitude, longitude: float64 arrays.
+    """
+    return (np.degrees(np.arctan(np.sinh(np.divide(y, PROJECTION_UTILITY__MERCATOR_RADIUS)))),
+            np.degrees(np.divide(x, PROJECTION_UTILITY__MERCATOR_RADIUS)))
+
+
+def utm_zone(longitude=None):
+    """
+    @brief: UTM zone number (1..60) of longitudes in signed degrees.
+    """
+    zone = np.floor((np.add(longitude, 180) / PROJECTION_UTILITY__UTM_ZONE_WIDTH)) + 1
+    return np.clip(zone, 1, PROJECTION_UTILITY__UTM_ZONES).astype(np.int64)
+
+
+def utm(latitude=None, longitude=None, zone=None, south=None):
+    """
+    @brief: project signed degrees to UTM coordinates of one zone.
+    @param:
+        latitude, longitude: arrays in signed degrees.
+        zone: UTM zone number, None for the zone of the first fix with a position.
+        south: use the false northing of the southern hemisphere, None for the hemisphere
+               of the first fix with a position.
+    @returns:
+        easting, northing: float64 arrays of metres (NaN where the fix has no position),
+        zone, south: the zone and hemisphere used.
+    """
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    located = np.flatnonzero(~np.isnan(latitude) & ~np.isnan(longitude))
+    reference = located[0] if located.size else None
+    if zone is None:
+        zone = int(utm_zone(longitude.flat[reference])) if reference is not None else 1
+    if south is None:
+        south = bool(latitude.flat[reference] < 0) if reference is not None else False
+    central_meridian = zone * PROJECTION_UTILITY__UTM_ZONE_WIDTH - 180 - \
+        PROJECTION_UTILITY__UTM_ZONE_WIDTH / 2
+    phi = np.radians(latitude)
+    dlambda = np.radians((longitude - central_meridian + 180) % 360 - 180)
+    sin_phi = np.sin(phi)
+    t = np.sinh(np.arctanh(sin_phi) - _ECCENTRICITY * np.arctanh(_ECCENTRICITY * sin_phi))
+    xi = np.arctan2(t, np.cos(dlambda))
+    eta = np.arctanh(np.sin(dlambda) / np.sqrt(1 + t ** 2))
+    xi_sum, eta_sum = xi.copy(), eta.copy()
+    for order, alpha in enumerate(_ALPHA, start=1):
+        xi_sum += alpha * np.sin(2 * order * xi) * np.cosh(2 * order * eta)
+        eta_sum += alpha * np.cos(2 * order * xi) * np.sinh(2 * order * eta)
+    scale = PROJECTION_UTILITY__UTM_SCALE * _RECTIFYING_RADIUS
+    easting = PROJECTION_UTILITY__UTM_FALSE_EASTING + scale * eta_sum
+    northing = scale * xi_sum + (PROJECTION_UTILITY__UTM_FALSE_NORTHING_SOUTH if south else 0.0)
+    return easting, northing, zone, south
+
+
+def project(latitude=None, longitude=None, projection=PROJECTION_UTILITY__DEGREES):
+    """
+    @brief: x, y plot coordinates of fixes in one of PROJECTION_UTILITY__PROJECTIONS.
+    @returns:
+        x, y, xlabel, ylabel: arrays of longitude / latitude in degrees or easting / northing
+        in metres, and their axis labels.
+    """
+    if projection == PROJECTION_UTILITY__DEGREES:
+        return (np.asarray(longitude), np.asarray(latitude), 'longitude (degree)',
+                'latitude (degree)')
+    if projection == PROJECTION_UTILITY__WEB_MERCATOR:
+        x, y = web_mercator(latitude, longitude)
+        return x, y, 'Web Mercator x (m)', 'Web Mercator y (m)'
+    if projection == PROJECTION_UTILITY__UTM:
+        easting, northing, zone, south = utm(latitude, longitude)
+        hemisphere = "S" if south else "N"
+        return (easting, northing, f'UTM {zone}{hemisphere} easting (m)',
+                f'UTM {zone}{hemisphere} northing (m)')
+    raise ValueError(f"unknown projection: {projection}")
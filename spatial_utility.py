@@ -0,0 +1,290 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for spatial queries over decoded fixes: which fixes, and which
+  *          time ranges, fall in a bounding box, a radius or a slippy-map (XYZ) tile.
+  *
+  *          GridIndex buckets the fixes into the XYZ tiles of one zoom level (the grid). The
+  *          fix numbers are sorted by tile key, so the fixes of a tile are one contiguous run
+  *          (keys, starts and order arrays, as in a CSR matrix). A query selects the grid
+  *          tiles it touches with one vectorised test over the occupied tiles, gathers their
+  *          fixes and filters them exactly; no Python loop runs over tiles or fixes.
+  *
+  *          The index is a dict of arrays, so cached_grid_index() stores it in the decoded log
+  *          cache (cache_utility) next to the track table it was built from:
+  *            index = cached_grid_index("gps.txt")
+  *            fixes = index.bbox(-34.0, -33.8, 150.9, 151.1)
+  *            ranges = time_ranges(fixes, index.utc_time)
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import functools
+
+import numpy as np
+
+from cache_utility import cached_parse
+from geodesy_utility import GEODESY_UTILITY__EARTH_RADIUS_M, haversine_distance
+from gnss_utility import parse_track
+
+# grid tiles of zoom 14 are about 2.4 km wide at the equator
+SPATIAL_UTILITY__GRID_ZOOM = 14
+# tile keys x * 2**zoom + y must fit an int64
+SPATIAL_UTILITY__MAX_ZOOM = 30
+# the square Web Mercator world ends at these latitudes
+SPATIAL_UTILITY__MAX_LATITUDE = 85.05112877980659
+SPATIAL_UTILITY__FULL_LONGITUDE = 360.0
+SPATIAL_UTILITY__HALF_LONGITUDE = 180.0
+SPATIAL_UTILITY__CACHE_NAME = "grid-z{zoom}"
+
+
+def tile_xy(latitude, longitude, zoom):
+    """
+    @brief: XYZ (slippy-map) tile of positions in signed degrees.
+    @returns:
+        x, y: int64 arrays, x growing east from the antimeridian, y growing south from the
+        north edge of the Web Mercator square. Latitudes beyond it fall in its edge tiles.
+    """
+    tiles = 1 << zoom
+    latitude = np.radians(np.clip(latitude, -SPATIAL_UTILITY__MAX_LATITUDE,
+                                  SPATIAL_UTILITY__MAX_LATITUDE))
+    x = (np.add(longitude, SPATIAL_UTILITY__HALF_LONGITUDE) / SPATIAL_UTILITY__FULL_LONGITUDE *
+         tiles)
+    y = (1 - np.arcsinh(np.tan(latitude)) / np.pi) / 2 * tiles
+    return (np.clip(np.floor(x), 0, tiles - 1).astype(np.int64),
+            np.clip(np.floor(y), 0, tiles - 1).astype(np.int64))
+
+
+def tile_bounds(x, y, zoom):
+    """
+    @brief: latitude_min, latitude_max, longitude_min, longitude_max of XYZ tiles in degrees.
+    """
+    tiles = 1 << zoom
+    longitude_min = np.divide(x, tiles) * SPATIAL_UTILITY__FULL_LONGITUDE - \
+        SPATIAL_UTILITY__HALF_LONGITUDE
+    longitude_max = np.divide(np.add(x, 1), tiles) * SPATIAL_UTILITY__FULL_LONGITUDE - \
+        SPATIAL_UTILITY__HALF_LONGITUDE
+    latitude_max = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.divide(y, tiles)))))
+    latitude_min = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.divide(np.add(y, 1),
+                                                                             tiles)))))
+    return latitude_min, latitude_max, longitude_min, longitude_max
+
+
+def _gather_runs(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    @brief: concatenation of the integer ranges [starts[i], ends[i]).
+    """
+    lengths = ends - starts
+    nonempty = lengths > 0
+    starts, ends, lengths = starts[nonempty], ends[nonempty], lengths[nonempty]
+    if starts.size == 0:
+        return np.empty(0, dtype=np.int64)
+    # a running sum of steps of one, jumping from the end of a range to the next start
+    steps = np.ones(int(lengths.sum()), dtype=np.int64)
+    steps[0] = starts[0]
+    steps[np.cumsum(lengths)[:-1]] = starts[1:] - ends[:-1] + 1
+    return np.cumsum(steps)
+
+
+def _wrap_longitude(longitude):
+    return ((longitude + SPATIAL_UTILITY__HALF_LONGITUDE) % SPATIAL_UTILITY__FULL_LONGITUDE -
+            SPATIAL_UTILITY__HALF_LONGITUDE)
+
+
+class GridIndex:
+    """
+    @brief: fixes bucketed by the XYZ tile of one zoom level.
+    Usage:
+        index = GridIndex.build(track["latitude"], track["longitude"], track["utc_time"])
+        fixes = index.radius(-33.9, 151.0, 500.0)
+    """
+
+    def __init__(self, zoom, keys, starts, order, latitude, longitude, utc_time=None):
+        self.zoom = int(zoom)
+        self.keys = keys
+        self.starts = starts
+        self.order = order
+        self.latitude = latitude
+        self.longitude = longitude
+        self.utc_time = utc_time
+
+    @classmethod
+    def build(cls, latitude, longitude, utc_time=None, zoom=SPATIAL_UTILITY__GRID_ZOOM):
+        """
+        @brief: index fixes in signed degrees; fixes without a position are left out.
+        @param:
+            latitude, longitude: float64 arrays of the fixes.
+            utc_time: optional float64 array of the fix times, for time_ranges().
+            zoom: grid zoom level, up to SPATIAL_UTILITY__MAX_ZOOM.
+        """
+        if not 0 <= zoom <= SPATIAL_UTILITY__MAX_ZOOM:
+            raise ValueError(f"grid zoom must be 0..{SPATIAL_UTILITY__MAX_ZOOM}: {zoom}")
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        located = np.flatnonzero(~np.isnan(latitude) & ~np.isnan(longitude))
+        x, y = tile_xy(latitude[located], longitude[located], zoom)
+        cell = (x << zoom) | y
+        sort = np.argsort(cell, kind="stable")
+        order = located[sort]
+        keys, starts = np.unique(cell[sort], return_index=True)
+        starts = np.append(starts, order.size).astype(np.int64)
+        return cls(zoom, keys, starts, order, latitude, longitude,
+                   None if utc_time is None else np.asarray(utc_time, dtype=np.float64))
+
+    def arrays(self) -> dict:
+        """
+        @brief: the index as a dict of arrays, for cache_utility or np.savez().
+        """
+        arrays = {"zoom": np.array(self.zoom), "keys": self.keys, "starts": self.starts,
+                  "order": self.order, "latitude": self.latitude, "longitude": self.longitude}
+        if self.utc_time is not None:
+            arrays["utc_time"] = self.utc_time
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        @brief: index of arrays(), e.g. loaded from the cache or an .npz file.
+        """
+        return cls(int(arrays["zoom"]), arrays["keys"], arrays["starts"], arrays["order"],
+                   arrays["latitude"], arrays["longitude"],
+                   arrays["utc_time"] if "utc_time" in arrays else None)
+
+    @property
+    def size(self) -> int:
+        return int(self.order.size)
+
+    def _cells(self, selected: np.ndarray) -> np.ndarray:
+        """
+        @brief: fix numbers of the grid tiles selected by a mask over keys.
+        """
+        cells = np.flatnonzero(selected)
+        return self.order[_gather_runs(self.starts[cells], self.starts[cells + 1])]
+
+    def bbox(self, latitude_min, latitude_max, longitude_min, longitude_max) -> np.ndarray:
+        """
+        @brief: fixes inside a bounding box in signed degrees, edges included. A box with
+        longitude_min > longitude_max crosses the antimeridian.
+        @returns:
+            int64 array of fix numbers (rows of the indexed arrays), in log order.
+        """
+        x_min, y_max = tile_xy(latitude_min, longitude_min, self.zoom)
+        x_max, y_min = tile_xy(latitude_max, longitude_max, self.zoom)
+        x = self.keys >> self.zoom
+        y = self.keys & ((1 << self.zoom) - 1)
+        wraps = longitude_min > longitude_max
+        in_x = ((x >= x_min) | (x <= x_max)) if wraps else ((x >= x_min) & (x <= x_max))
+        fixes = self._cells(in_x & (y >= y_min) & (y <= y_max))
+        latitude, longitude = self.latitude[fixes], self.longitude[fixes]
+        in_longitude = ((longitude >= longitude_min) | (longitude <= longitude_max)) if wraps \
+            else ((longitude >= longitude_min) & (longitude <= longitude_max))
+        return np.sort(fixes[(latitude >= latitude_min) & (latitude <= latitude_max) &
+                             in_longitude])
+
+    def radius(self, latitude, longitude, radius_m) -> np.ndarray:
+        """
+        @brief: fixes within radius_m metres (great circle) of a position.
+        @returns:
+            int64 array of fix numbers, in log order.
+        """
+        delta = np.degrees(radius_m / GEODESY_UTILITY__EARTH_RADIUS_M)
+        latitude_min, latitude_max = latitude - delta, latitude + delta
+        if latitude_min <= -90 or latitude_max >= 90:
+            # the circle reaches a pole: every longitude
+            candidates = self.bbox(max(latitude_min, -90), min(latitude_max, 90),
+                                   -SPATIAL_UTILITY__HALF_LONGITUDE,
+                                   SPATIAL_UTILITY__HALF_LONGITUDE)
+        else:
+            delta_longitude = min(delta / np.cos(np.radians(max(abs(latitude_min),
+                                                                abs(latitude_max)))),
+                                  SPATIAL_UTILITY__HALF_LONGITUDE)
+            if delta_longitude >= SPATIAL_UTILITY__HALF_LONGITUDE:
+                longitude_min, longitude_max = (-SPATIAL_UTILITY__HALF_LONGITUDE,
+                                                SPATIAL_UTILITY__HALF_LONGITUDE)
+            else:
+                longitude_min = _wrap_longitude(longitude - delta_longitude)
+                longitude_max = _wrap_longitude(longitude + delta_longitude)
+            candidates = self.bbox(latitude_min, latitude_max, longitude_min, longitude_max)
+        distance = haversine_distance(latitude, longitude, self.latitude[candidates],
+                                      self.longitude[candidates])
+        return candidates[distance <= radius_m]
+
+    def tile(self, x, y, zoom) -> np.ndarray:
+        """
+        @brief: fixes inside XYZ tile (x, y) of any zoom level.
+        @returns:
+            int64 array of fix numbers, in log order.
+        """
+        if zoom <= self.zoom:
+            # whole grid tiles: those whose parent at zoom is the tile
+            shift = self.zoom - zoom
+            selected = (((self.keys >> self.zoom) >> shift) == x) & \
+                (((self.keys & ((1 << self.zoom) - 1)) >> shift) == y)
+            return np.sort(self._cells(selected))
+        latitude_min, latitude_max, longitude_min, longitude_max = tile_bounds(x, y, zoom)
+        candidates = self.bbox(latitude_min, latitude_max, longitude_min, longitude_max)
+        # tiles share their edges, a fix on one belongs to a single tile
+        fix_x, fix_y = tile_xy(self.latitude[candidates], self.longitude[candidates], zoom)
+        return candidates[(fix_x == x) & (fix_y == y)]
+
+    def coverage(self, zoom=None):
+        """
+        @brief: the XYZ tiles of a zoom level the fixes fall in.
+        @returns:
+            x, y, count: int64 arrays, one entry per occupied tile, sorted by x then y.
+        """
+        zoom = self.zoom if zoom is None else zoom
+        if zoom <= self.zoom:
+            # grid tiles aggregate into their parents without touching the fixes
+            shift = self.zoom - zoom
+            parent = ((self.keys >> self.zoom >> shift) << zoom) | \
+                ((self.keys & ((1 << self.zoom) - 1)) >> shift)
+            counts = np.diff(self.starts)
+        else:
+            x, y = tile_xy(self.latitude[self.order], self.longitude[self.order], zoom)
+            parent = (x << zoom) | y
+            counts = np.ones(parent.size, dtype=np.int64)
+        keys, inverse = np.unique(parent, return_inverse=True)
+        count = np.bincount(inverse.ravel(), weights=counts, minlength=keys.size).astype(np.int64)
+        return keys >> zoom, keys & ((1 << zoom) - 1), count
+
+
+def time_ranges(fixes=None, utc_time=None):
+    """
+    @brief: runs of consecutive fixes as time ranges, e.g. the passes of a track over a tile.
+    @param:
+        fixes: sorted int64 fix numbers, as returned by the GridIndex queries.
+        utc_time: float64 times of all fixes of the index.
+    @returns:
+        float64 array of shape (passes, 2), the first and last time of every run.
+    """
+    fixes = np.asarray(fixes)
+    if fixes.size == 0:
+        return np.empty((0, 2))
+    breaks = np.flatnonzero(np.diff(fixes) != 1) + 1
+    first = np.concatenate(([0], breaks))
+    last = np.concatenate((breaks - 1, [fixes.size - 1]))
+    return np.column_stack((utc_time[fixes[first]], utc_time[fixes[last]]))
+
+
+def _build_track_index(log_file=None, zoom=SPATIAL_UTILITY__GRID_ZOOM, cache_dir=None):
+    track = cached_parse(log_file, "track", parse_track, cache_dir=cache_dir)
+    return GridIndex.build(track["latitude"], track["longitude"], track["utc_time"],
+                           zoom).arrays()
+
+
+def cached_grid_index(log_file=None, zoom=SPATIAL_UTILITY__GRID_ZOOM, cache_dir=None):
+    """
+    @brief: GridIndex of the track table of a GPS log, stored in the decoded log cache next
+    to the track table and rebuilt when the log changes.
+    @param:
+        log_file: Full path of the log file.
+        zoom: grid zoom level.
+        cache_dir: cache directory, None for cache_utility.cache_directory().
+    @returns:
+        GridIndex whose fix numbers are rows of gnss_utility.parse_track(log_file).
+    """
+    return GridIndex.from_arrays(cached_parse(
+        log_file, SPATIAL_UTILITY__CACHE_NAME.format(zoom=zoom),
+        functools.partial(_build_track_index, zoom=zoom, cache_dir=cache_dir),
+        cache_dir=cache_dir))
@@ -0,0 +1,423 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for asyncio ingestion of live NMEA streams from a receiver: a TCP
+  *          or UDP endpoint, or a pipe / pty (serial-style device).
+  *
+  *          The source task cuts the incoming bytes into batches of whole sentences and puts them
+  *          on a bounded queue; the consumer decodes each batch with gnss_utility.decode_track()
+  *          in a worker thread, so the event loop keeps reading while a batch is decoded, and
+  *          appends it to growable column buffers. When the consumer falls behind, the queue fills up and
+  *          the TCP / pipe reader stops reading, so the sender is throttled by flow control
+  *          (backpressure). UDP has no flow control: batches arriving at a full queue are
+  *          dropped and counted.
+  *
+  *          replay_server() streams a recorded log over TCP at N x its real time rate and is
+  *          used as a stand-in receiver:
+  *            python stream_utility.py data/gps.txt --port 10110 --speed 10
+  *            python gnss-plots.py tcp://127.0.0.1:10110
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+import numpy as np
+
+from follow_utility import GrowableBuffer
+from gnss_utility import GNSS_UTILITY__GPGGA_HEADER, GNSS_UTILITY__GPRMC_HEADER
+from gnss_utility import GNSS_UTILITY__TRACK_COLUMNS, decode_track
+from gnss_utility import GNSS_UTILITY__SECONDS_PER_HOUR, GNSS_UTILITY__SECONDS_PER_MINUTE
+
+# source schemes, e.g. tcp://127.0.0.1:10110, udp://0.0.0.0:10110, pipe:///dev/ttyUSB0
+STREAM_UTILITY__SCHEME_TCP = "tcp"
+STREAM_UTILITY__SCHEME_UDP = "udp"
+STREAM_UTILITY__SCHEME_PIPE = "pipe"
+STREAM_UTILITY__SCHEME_SEPARATOR = "://"
+# "-" as pipe path reads standard input
+STREAM_UTILITY__STDIN = "-"
+# batches waiting for the decoder before the source is throttled
+STREAM_UTILITY__QUEUE_SIZE = 8
+# bytes per batch handed to the decoder, and per socket read
+STREAM_UTILITY__BATCH_SIZE = 64 * 1024
+STREAM_UTILITY__READ_SIZE = 16 * 1024
+# largest UDP payload
+STREAM_UTILITY__DATAGRAM_SIZE = 65507
+STREAM_UTILITY__LINE_FEED = b"\n"
+# sentences opening an epoch; batches are cut in front of them so a GPVTG is never
+# separated from the timed sentence before it
+STREAM_UTILITY__EPOCH_HEADERS = tuple(STREAM_UTILITY__LINE_FEED + header
+                                      for header in (GNSS_UTILITY__GPGGA_HEADER,
+                                                     GNSS_UTILITY__GPRMC_HEADER))
+# UTC time field of GPGGA / GPRMC, hhmmss.ss
+STREAM_UTILITY__UTC_FIELD_IDX = 1
+STREAM_UTILITY__UTC_HOURS = slice(0, 2)
+STREAM_UTILITY__UTC_MINUTES = slice(2, 4)
+STREAM_UTILITY__UTC_SECONDS = slice(4, None)
+# replay server defaults
+STREAM_UTILITY__REPLAY_HOST = "127.0.0.1"
+STREAM_UTILITY__REPLAY_PORT = 10110
+STREAM_UTILITY__REPLAY_SPEED = 1.0
+
+
+class _Batcher:
+    """
+    @brief: cut a byte stream into batches of whole sentences, ending in front of an epoch.
+    """
+
+    def __init__(self, batch_size=STREAM_UTILITY__BATCH_SIZE):
+        self.batch_size = batch_size
+        self.pending = bytearray()
+
+    def feed(self, data: bytes) -> list:
+        """
+        @brief: add received bytes; returns the batches that are complete.
+        """
+        self.pending += data
+        batches = []
+        while len(self.pending) >= self.batch_size:
+            # the cut is at the last epoch start, or the last line end if there is none
+            cut = max(self.pending.rfind(header) for header in STREAM_UTILITY__EPOCH_HEADERS) + 1
+            if cut <= 0:
+                cut = self.pending.rfind(STREAM_UTILITY__LINE_FEED) + 1
+            if cut <= 0:
+                break
+            batches.append(bytes(self.pending[:cut]))
+            del self.pending[:cut]
+        return batches
+
+    def flush(self) -> list:
+        """
+        @brief: the remaining bytes at the end of the stream, as a last batch.
+        """
+        batches = [bytes(self.pending)] if self.pending else []
+        self.pending = bytearray()
+        return batches
+
+
+class TrackAccumulator:
+    """
+    @brief: track table grown batch by batch from decode_track() results.
+    """
+
+    def __init__(self):
+        self.buffers = {name: GrowableBuffer(np.float64) for name in GNSS_UTILITY__TRACK_COLUMNS}
+
+    def append(self, track: dict) -> int:
+        """
+        @brief: append the rows of a decoded batch.
+        @returns:
+            number of rows appended. An epoch split across two batches (GPGGA in one, GPRMC
+            in the next) is merged into the existing row.
+        """
+        utc_time = self.buffers["utc_time"]
+        first = 0
+        if utc_time.size and track["utc_time"].size and \
+                track["utc_time"][0] == utc_time.data[utc_time.size - 1]:
+            for name, buffer in self.buffers.items():
+                last = buffer.size - 1
+                if np.isnan(buffer.data[last]):
+                    buffer.data[last] = track[name][0]
+            first = 1
+        for name, buffer in self.buffers.items():
+            buffer.append(track[name][first:])
+        return track["utc_time"].size - first
+
+    def columns(self) -> dict:
+        """
+        @brief: the track so far, one float64 array view per column.
+        """
+        return {name: buffer.view() for name, buffer in self.buffers.items()}
+
+
+def parse_source(source=None):
+    """
+    @brief: split a source string into scheme and address.
+    @param:
+        source: "tcp://host:port", "udp://host:port" or "pipe://path" ("pipe://-" is stdin).
+    @returns:
+        (scheme, (host, port)) for sockets, (scheme, path) for pipes.
+    @raises:
+        ValueError if the source is not one of the forms above.
+    """
+    scheme, separator, address = source.partition(STREAM_UTILITY__SCHEME_SEPARATOR)
+    if not separator:
+        raise ValueError(f"not a stream source: {source}")
+    if scheme == STREAM_UTILITY__SCHEME_PIPE:
+        return scheme, address
+    if scheme in (STREAM_UTILITY__SCHEME_TCP, STREAM_UTILITY__SCHEME_UDP):
+        host, _, port = address.rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"stream source needs host:port: {source}")
+        return scheme, (host, int(port))
+    raise ValueError(f"unknown stream scheme: {scheme}")
+
+
+async def _read_stream(reader, queue, batch_size):
+    """
+    @brief: forward a StreamReader to the queue in batches; await put() is the backpressure.
+    """
+    batcher = _Batcher(batch_size)
+    while True:
+        data = await reader.read(STREAM_UTILITY__READ_SIZE)
+        if not data:
+            break
+        for batch in batcher.feed(data):
+            await queue.put(batch)
+    for batch in batcher.flush():
+        await queue.put(batch)
+
+
+async def _read_tcp(address, queue, batch_size):
+    reader, writer = await asyncio.open_connection(*address)
+    try:
+        await _read_stream(reader, queue, batch_size)
+    finally:
+        writer.close()
+
+
+async def _read_pipe(path, queue, batch_size):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=STREAM_UTILITY__BATCH_SIZE)
+    pipe = sys.stdin.buffer if path == STREAM_UTILITY__STDIN else open(path, 'rb', buffering=0)
+    transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    try:
+        await _read_stream(reader, queue, batch_size)
+    finally:
+        transport.close()
+
+
+class _DatagramReceiver(asyncio.DatagramProtocol):
+    """
+    @brief: batches NMEA datagrams onto the queue, dropping batches while it is full.
+    """
+
+    def __init__(self, queue, batch_size, stats):
+        self.queue = queue
+        self.batcher = _Batcher(batch_size)
+        self.stats = stats
+        self.received = 0
+
+    def datagram_received(self, data, address):
+        self.received += len(data)
+        for batch in self.batcher.feed(data):
+            try:
+                self.queue.put_nowait(batch)
+            except asyncio.QueueFull:
+                if self.stats is not None:
+                    self.stats["dropped"] = self.stats.get("dropped", 0) + 1
+
+
+async def _read_udp(address, queue, batch_size, stats, idle_timeout):
+    loop = asyncio.get_running_loop()
+    transport, receiver = await loop.create_datagram_endpoint(
+        lambda: _DatagramReceiver(queue, batch_size, stats), local_addr=address)
+    try:
+        # a datagram stream has no end, it is over once the sender has been quiet long enough
+        while True:
+            received = receiver.received
+            await asyncio.sleep(idle_timeout)
+            if received and receiver.received == received:
+                break
+        for batch in receiver.batcher.flush():
+            await queue.put(batch)
+    finally:
+        transport.close()
+
+
+async def _produce(scheme, address, queue, batch_size, stats, idle_timeout):
+    """
+    @brief: read the source into the queue, then put None as end of stream.
+    """
+    if scheme == STREAM_UTILITY__SCHEME_TCP:
+        await _read_tcp(address, queue, batch_size)
+    elif scheme == STREAM_UTILITY__SCHEME_UDP:
+        await _read_udp(address, queue, batch_size, stats, idle_timeout or 1.0)
+    else:
+        await _read_pipe(address, queue, batch_size)
+    await queue.put(None)
+
+
+async def _consume(queue, accumulator, drop_invalid, stats, on_batch):
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = await queue.get()
+        if batch is None:
+            return
+        # decoding runs off the event loop; its counters are merged back on the loop, where
+        # the reader updates stats too
+        batch_stats = None if stats is None else {}
+        track = await loop.run_in_executor(None, decode_track, batch, drop_invalid,
+                                           batch_stats)
+        for key, value in (batch_stats or {}).items():
+            stats[key] = stats.get(key, 0) + value
+        if accumulator.append(track) and on_batch:
+            on_batch(accumulator.columns())
+
+
+async def ingest(source=None, queue_size=STREAM_UTILITY__QUEUE_SIZE,
+                 batch_size=STREAM_UTILITY__BATCH_SIZE, drop_invalid=True, stats=None,
+                 on_batch=None, idle_timeout=None):
+    """
+    @brief: read an NMEA stream until it ends and decode it into a track table.
+    @param:
+        source: see parse_source().
+        queue_size: batches buffered between reader and decoder.
+        batch_size: bytes per decoded batch.
+        drop_invalid, stats: checksum handling, see gnss_utility.decode_gpgga();
+               stats["dropped"] also counts UDP batches lost to a full queue.
+        on_batch: optional callback taking the track columns after every batch; it runs on
+               the event loop, batches are decoded in the default executor.
+        idle_timeout: UDP only, seconds without datagrams that end the stream (default 1 s).
+    @returns:
+        dict of float64 column arrays, as gnss_utility.decode_track().
+    @raises:
+        the first exception of the reader, the decoder or on_batch; the other side is
+        cancelled.
+    """
+    scheme, address = parse_source(source)
+    queue = asyncio.Queue(maxsize=queue_size)
+    accumulator = TrackAccumulator()
+    producer = asyncio.create_task(_produce(scheme, address, queue, batch_size, stats,
+                                            idle_timeout))
+    consumer = asyncio.create_task(_consume(queue, accumulator, drop_invalid, stats, on_batch))
+    try:
+        # a failing consumer would leave the producer blocked on the full queue: stop at the
+        # first exception of either task and raise it
+        done, _ = await asyncio.wait((producer, consumer),
+                                     return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    finally:
+        for task in (producer, consumer):
+            task.cancel()
+        await asyncio.gather(producer, consumer, return_exceptions=True)
+    return accumulator.columns()
+
+
+def _epoch_seconds(line: bytes):
+    """
+    @brief: UTC time of day in seconds of a GPGGA / GPRMC line, None for other lines.
+    """
+    if not line.startswith(tuple(header[1:] for header in STREAM_UTILITY__EPOCH_HEADERS)):
+        return None
+    fields = line.split(b",")
+    try:
+        utc = fields[STREAM_UTILITY__UTC_FIELD_IDX]
+        return (int(utc[STREAM_UTILITY__UTC_HOURS]) * GNSS_UTILITY__SECONDS_PER_HOUR +
+                int(utc[STREAM_UTILITY__UTC_MINUTES]) * GNSS_UTILITY__SECONDS_PER_MINUTE +
+                float(utc[STREAM_UTILITY__UTC_SECONDS]))
+    except (IndexError, ValueError):
+        return None
+
+
+def _replay_epochs(log_file):
+    """
+    @brief: the lines of a log grouped by epoch, with the UTC time of each group.
+    """
+    epochs = []
+    with open(log_file, 'rb') as lf:
+        for line in lf:
+            seconds = _epoch_seconds(line)
+            if not epochs or (seconds is not None and seconds != epochs[-1][0]):
+                epochs.append((seconds, []))
+            epochs[-1][1].append(line)
+    return [(seconds, b"".join(lines)) for seconds, lines in epochs]
+
+
+async def _replay(epochs, send, speed):
+    """
+    @brief: call send(data) for every epoch, spaced by the log time divided by speed.
+    """
+    loop = asyncio.get_running_loop()
+    # epochs are scheduled against the start, so sleep overshoot does not add up
+    start = first = None
+    for seconds, data in epochs:
+        if speed and seconds is not None:
+            if first is None or seconds < first:
+                # first epoch, or the log passed midnight
+                start, first = loop.time(), seconds
+            await asyncio.sleep(max(start + (seconds - first) / speed - loop.time(), 0))
+        await send(data)
+
+
+async def replay_server(log_file=None, host=STREAM_UTILITY__REPLAY_HOST,
+                        port=STREAM_UTILITY__REPLAY_PORT, speed=STREAM_UTILITY__REPLAY_SPEED):
+    """
+    @brief: serve a recorded NMEA log over TCP, to every client from the start, at speed x
+    its real time rate (0 for as fast as the client reads), closing the connection at the end.
+    @returns:
+        the asyncio.Server, already listening; port 0 picks a free port, see
+        server.sockets[0].getsockname().
+    """
+    epochs = _replay_epochs(log_file)
+
+    async def handle_client(reader, writer):
+        async def send(data):
+            writer.write(data)
+            await writer.drain()
+        try:
+            await _replay(epochs, send, speed)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle_client, host, port)
+
+
+async def replay_udp(log_file=None, host=STREAM_UTILITY__REPLAY_HOST,
+                     port=STREAM_UTILITY__REPLAY_PORT, speed=STREAM_UTILITY__REPLAY_SPEED):
+    """
+    @brief: send a recorded NMEA log as UDP datagrams, one epoch per datagram, at speed x its
+    real time rate.
+    """
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol,
+                                                       remote_addr=(host, port))
+
+    async def send(data):
+        for start in range(0, len(data), STREAM_UTILITY__DATAGRAM_SIZE):
+            transport.sendto(data[start:start + STREAM_UTILITY__DATAGRAM_SIZE])
+        # yield so the receiver on the same loop keeps up at full speed
+        await asyncio.sleep(0)
+
+    try:
+        await _replay(_replay_epochs(log_file), send, speed)
+    finally:
+        transport.close()
+
+
+def parse_arguments(argv=None):
+    """
+     @brief: command line of the replay server
+    """
+    parser = argparse.ArgumentParser(
+        description="Replay an NMEA log over TCP as a stand-in for a live receiver.")
+    parser.add_argument("input", help="NMEA log file to replay")
+    parser.add_argument("--host", default=STREAM_UTILITY__REPLAY_HOST,
+                        help="address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=STREAM_UTILITY__REPLAY_PORT,
+                        help="TCP port to listen on (default: %(default)s)")
+    parser.add_argument("--speed", type=float, default=STREAM_UTILITY__REPLAY_SPEED,
+                        help="replay rate as a multiple of real time, 0 for unthrottled "
+                             "(default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+async def _serve_forever(args):
+    server = await replay_server(os.path.abspath(args.input), args.host, args.port, args.speed)
+    print("replaying", args.input, "on", server.sockets[0].getsockname(), "- Ctrl+C to stop")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(_serve_forever(parse_arguments()))
+    except KeyboardInterrupt:
+        pass
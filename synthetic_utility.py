@@ -0,0 +1,490 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for generating synthetic GNSS and PPG logs of any size, for load
+  *          testing the parsers and for benchmarks.
+  *
+  *          NMEA logs hold one GPGGA, GPRMC and GPVTG sentence per epoch with correct
+  *          checksums. The track is a vehicle driving from an origin with a random walk of
+  *          speed and course, reported with gaussian position noise. Options add corrupt
+  *          sentences (one digit changed after the checksum was computed) and legs starting
+  *          from SYNTHETIC_UTILITY__EDGE_CASE_ORIGINS, which cover all four hemispheres,
+  *          longitudes beyond 100 degrees and crossings of the equator, prime meridian and
+  *          antimeridian.
+  *
+  *          PPG logs hold GH3220 like raw samples: a pulse wave with heart rate variability on
+  *          top of a DC level, respiratory baseline wander and noise, written either as one
+  *          value per line or as lines of the full GH3x2x algorithm log.
+  *
+  *          Lines are rendered from fixed width byte templates: every numeric field is written
+  *          as columns of digits into a uint8 matrix of a chunk of lines, and the checksums
+  *          are one XOR-reduce per sentence, so the cost per chunk is a few numpy operations
+  *          and GB size logs take seconds. Numeric fields are zero padded to their width
+  *          (e.g. 005.123 knots), which NMEA readers accept.
+  *
+  *          Command line:
+  *            python synthetic_utility.py nmea gps_1g.txt --size 1G --corrupt 0.001 --edge-cases
+  *            python synthetic_utility.py ppg ppg_10m.txt --lines 10000000 --line-format log
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import argparse
+import math
+
+import numpy as np
+
+from log_utility import LOG_UTILITY__ASCII_ZERO, LOG_UTILITY__DECIMAL_POINT
+
+SYNTHETIC_UTILITY__SENTENCE_START = ord("$")
+SYNTHETIC_UTILITY__CHECKSUM_DELIMITER = ord("*")
+SYNTHETIC_UTILITY__HEX_DIGITS = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+# lines rendered per numpy pass and written per file write
+SYNTHETIC_UTILITY__CHUNK_LINES = 65536
+SYNTHETIC_UTILITY__SIZE_SUFFIXES = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+# NMEA track
+SYNTHETIC_UTILITY__EARTH_RADIUS_M = 6371000.0
+SYNTHETIC_UTILITY__KNOTS_PER_MPS = 3600 / 1852
+SYNTHETIC_UTILITY__KMH_PER_MPS = 3.6
+SYNTHETIC_UTILITY__MINUTES_PER_DEGREE = 60
+SYNTHETIC_UTILITY__SECONDS_PER_DAY = 86400
+SYNTHETIC_UTILITY__NMEA_RATE_HZ = 1.0
+SYNTHETIC_UTILITY__MAX_LATITUDE = 89.0
+# start of the track of data/gps.txt
+SYNTHETIC_UTILITY__DEFAULT_ORIGIN = (-33.91665, 150.99344)
+SYNTHETIC_UTILITY__DEFAULT_START = np.datetime64("2019-05-22T01:13:10")
+# leg origins of edge_cases=True, the track restarts at each one
+SYNTHETIC_UTILITY__EDGE_CASE_ORIGINS = (
+    (-33.91665, 150.99344),     # S, E beyond 100 degrees
+    (37.80000, -122.40000),     # N, W beyond 100 degrees
+    (-22.90000, -43.20000),     # S, W
+    (51.47780, -0.00050),       # prime meridian
+    (-0.00050, 100.00000),      # equator
+    (-16.50000, 179.99950),     # antimeridian
+)
+SYNTHETIC_UTILITY__SPEED_STEP_MPS = 0.5
+SYNTHETIC_UTILITY__MAX_SPEED_MPS = 40.0
+SYNTHETIC_UTILITY__COURSE_STEP_DEGREES = 5.0
+SYNTHETIC_UTILITY__ALTITUDE_M = 14.0
+SYNTHETIC_UTILITY__ALTITUDE_STEP_M = 0.1
+SYNTHETIC_UTILITY__UNDULATION_M = 22.6
+SYNTHETIC_UTILITY__SATELLITES = (12, 20)
+SYNTHETIC_UTILITY__HDOP = (0.5, 1.5)
+SYNTHETIC_UTILITY__POSITION_NOISE_M = 0.5
+
+# PPG trace
+SYNTHETIC_UTILITY__PPG_RATE_HZ = 36
+SYNTHETIC_UTILITY__PPG_DC = 8400000
+SYNTHETIC_UTILITY__PPG_AMPLITUDE = 20000
+SYNTHETIC_UTILITY__PPG_WANDER = 2000
+SYNTHETIC_UTILITY__PPG_NOISE = 300
+SYNTHETIC_UTILITY__PPG_RESPIRATION_HZ = 0.25
+SYNTHETIC_UTILITY__HEART_RATE_BPM = 72.0
+SYNTHETIC_UTILITY__HEART_RATE_STEP_BPM = 0.05
+SYNTHETIC_UTILITY__HEART_RATE_LIMITS_BPM = (40.0, 180.0)
+# pulse shape over one beat: systolic peak and dicrotic wave as (phase, width, height)
+SYNTHETIC_UTILITY__PULSE_WAVES = ((0.2, 0.07, 1.0), (0.5, 0.1, 0.4))
+SYNTHETIC_UTILITY__PPG_FORMAT_VALUES = "values"
+SYNTHETIC_UTILITY__PPG_FORMAT_LOG = "log"
+SYNTHETIC_UTILITY__PPG_FORMATS = (SYNTHETIC_UTILITY__PPG_FORMAT_VALUES,
+                                  SYNTHETIC_UTILITY__PPG_FORMAT_LOG)
+SYNTHETIC_UTILITY__PPG_LOG_PREFIX = b"|[GH3x2xHrAlgoExe]ppg_rawdata = "
+SYNTHETIC_UTILITY__PPG_LOG_SUFFIX = b",gain_adj_flg = 0,cur_adj_flg = 0\n"
+
+# template fields: (name, digits, decimals) is a zero padded number, (name,) one character
+SYNTHETIC_UTILITY__GPGGA_TEMPLATE = (
+    b"$GPGGA,", ("utc", 6, 2), b",", ("latitude", 4, 4), b",", ("latitude_hemisphere",),
+    b",", ("longitude", 5, 4), b",", ("longitude_hemisphere",), b",1,", ("satellites", 2, 0),
+    b",", ("hdop", 1, 1), b",", ("altitude", 4, 2), b",M,", ("undulation", 2, 2),
+    b",M,,*00\n")
+SYNTHETIC_UTILITY__GPRMC_TEMPLATE = (
+    b"$GPRMC,", ("utc", 6, 2), b",A,", ("latitude_precise", 4, 7), b",",
+    ("latitude_hemisphere",), b",", ("longitude_precise", 5, 7), b",",
+    ("longitude_hemisphere",), b",", ("speed_knots", 3, 3), b",", ("course", 3, 1), b",",
+    ("date", 6, 0), b",0.0,E,A*00\n")
+SYNTHETIC_UTILITY__GPVTG_TEMPLATE = (
+    b"$GPVTG,", ("course", 3, 3), b",T,", ("course", 3, 3), b",M,", ("speed_knots", 3, 3),
+    b",N,", ("speed_kmh", 4, 3), b",K,A*00\n")
+SYNTHETIC_UTILITY__NMEA_TEMPLATES = {
+    "GPGGA": SYNTHETIC_UTILITY__GPGGA_TEMPLATE,
+    "GPRMC": SYNTHETIC_UTILITY__GPRMC_TEMPLATE,
+    "GPVTG": SYNTHETIC_UTILITY__GPVTG_TEMPLATE,
+}
+SYNTHETIC_UTILITY__NMEA_SENTENCES = tuple(SYNTHETIC_UTILITY__NMEA_TEMPLATES)
+
+
+class _Template:
+    """
+    @brief: fixed width line template whose fields are filled for many lines at once.
+    """
+
+    def __init__(self, items):
+        text = bytearray()
+        self.fields = []
+        for item in items:
+            if isinstance(item, bytes):
+                text += item
+                continue
+            self.fields.append((item, len(text)))
+            if len(item) == 1:
+                text += b" "
+            else:
+                _, digits, decimals = item
+                text += b"0" * digits + (b"." + b"0" * decimals if decimals else b"")
+        self.line = np.frombuffer(bytes(text), dtype=np.uint8)
+        # [start, star) of every NMEA sentence, the checksum covers the bytes between
+        self.sentences = list(zip(np.flatnonzero(self.line == SYNTHETIC_UTILITY__SENTENCE_START),
+                                  np.flatnonzero(self.line ==
+                                                 SYNTHETIC_UTILITY__CHECKSUM_DELIMITER)))
+        # digit columns of each sentence, the bytes corrupt() may change
+        is_digit = np.zeros(self.line.size, dtype=bool)
+        for item, offset in self.fields:
+            if len(item) > 1:
+                is_digit[offset:offset + item[1] + item[2] + bool(item[2])] = True
+        is_digit[self.line == LOG_UTILITY__DECIMAL_POINT] = False
+        self.digit_columns = [np.flatnonzero(is_digit[start:star]) + start
+                              for start, star in self.sentences]
+
+    @property
+    def width(self) -> int:
+        return self.line.size
+
+    def render(self, values: dict, rows: int) -> np.ndarray:
+        """
+        @brief: (rows, width) uint8 matrix of the lines filled with values.
+        @param:
+            values: per field name, an array of rows numbers (rounded to the field's decimals
+                    and clipped to its width) or character codes.
+            rows: number of lines.
+        """
+        out = np.tile(self.line, (rows, 1))
+        for item, offset in self.fields:
+            if len(item) == 1:
+                out[:, offset] = values[item[0]]
+                continue
+            name, digits, decimals = item
+            scaled = np.clip(np.rint(np.asarray(values[name], dtype=np.float64) *
+                                     10 ** decimals), 0, 10 ** (digits + decimals) - 1)
+            scaled = scaled.astype(np.int64)
+            columns = list(range(offset, offset + digits))
+            if decimals:
+                columns += range(offset + digits + 1, offset + digits + 1 + decimals)
+            for column in reversed(columns):
+                out[:, column] = LOG_UTILITY__ASCII_ZERO + scaled % 10
+                scaled //= 10
+        for start, star in self.sentences:
+            checksum = np.bitwise_xor.reduce(out[:, start + 1:star], axis=1)
+            out[:, star + 1] = SYNTHETIC_UTILITY__HEX_DIGITS[checksum >> 4]
+            out[:, star + 2] = SYNTHETIC_UTILITY__HEX_DIGITS[checksum & 0xF]
+        return out
+
+    def corrupt(self, out: np.ndarray, ratio: float, rng) -> int:
+        """
+        @brief: change one digit of a ratio of the sentences in out, after their checksum was
+        written, so they fail the checksum check.
+        @returns:
+            number of corrupted sentences.
+        """
+        corrupted = 0
+        for columns in self.digit_columns:
+            rows = np.flatnonzero(rng.random(out.shape[0]) < ratio)
+            picked = columns[rng.integers(0, columns.size, rows.size)]
+            # flipping the lowest bit keeps a digit a digit
+            out[rows, picked] ^= 1
+            corrupted += rows.size
+        return corrupted
+
+
+def parse_size(size) -> int:
+    """
+    @brief: byte count of a size such as 1048576, "500M" or "2G".
+    """
+    size = str(size).strip().upper().rstrip("B")
+    factor = SYNTHETIC_UTILITY__SIZE_SUFFIXES.get(size[-1:], 1)
+    return int(float(size[:-1] if factor > 1 else size) * factor)
+
+
+def _line_count(lines, size, line_width):
+    if lines is None and size is None:
+        raise ValueError("give the number of lines or the size of the log")
+    return lines if lines is not None else math.ceil(parse_size(size) / line_width)
+
+
+def _nmea_coordinate(degrees: np.ndarray, decimals: int) -> np.ndarray:
+    """
+    @brief: |degrees| as an NMEA dddmm.mmmm number, minutes rounded to decimals without ever
+    reaching 60.
+    """
+    units = np.rint(np.abs(degrees) * SYNTHETIC_UTILITY__MINUTES_PER_DEGREE * 10 ** decimals)
+    whole, minutes = np.divmod(units, SYNTHETIC_UTILITY__MINUTES_PER_DEGREE * 10 ** decimals)
+    return whole * 100 + minutes / 10 ** decimals
+
+
+def _nmea_utc(seconds: np.ndarray) -> np.ndarray:
+    """
+    @brief: seconds of the day as an NMEA hhmmss.ss number.
+    """
+    centiseconds = np.rint(seconds * 100) % (SYNTHETIC_UTILITY__SECONDS_PER_DAY * 100)
+    hours, rest = np.divmod(centiseconds, 360000)
+    minutes, rest = np.divmod(rest, 6000)
+    return hours * 10000 + minutes * 100 + rest / 100
+
+
+def _nmea_date(days: np.ndarray) -> np.ndarray:
+    """
+    @brief: datetime64[D] days as NMEA ddmmyy numbers.
+    """
+    years = days.astype("datetime64[Y]")
+    months = days.astype("datetime64[M]")
+    day = (days - months).astype(np.int64) + 1
+    month = (months - years).astype(np.int64) + 1
+    year = (years.astype(np.int64) + 1970) % 100
+    return day * 10000 + month * 100 + year
+
+
+class _Track:
+    """
+    @brief: random walk of a vehicle, continued chunk by chunk.
+    """
+
+    def __init__(self, origin, start, rate, noise, rng):
+        self.latitude, self.longitude = origin
+        self.start = start
+        self.step = 1 / rate
+        self.noise = noise
+        self.rng = rng
+        self.epoch = 0
+        self.speed = 0.0
+        self.course = rng.uniform(0, 360)
+        self.altitude = SYNTHETIC_UTILITY__ALTITUDE_M
+
+    def restart(self, origin):
+        self.latitude, self.longitude = origin
+
+    def _walk(self, last, step, rows, low=None, high=None):
+        walk = last + np.cumsum(self.rng.normal(0, step, rows))
+        return walk if low is None else np.clip(walk, low, high)
+
+    def advance(self, rows: int) -> dict:
+        """
+        @brief: template values of the next rows epochs.
+        """
+        speed = self._walk(self.speed, SYNTHETIC_UTILITY__SPEED_STEP_MPS, rows, 0,
+                           SYNTHETIC_UTILITY__MAX_SPEED_MPS)
+        course = self._walk(self.course, SYNTHETIC_UTILITY__COURSE_STEP_DEGREES, rows) % 360
+        altitude = self._walk(self.altitude, SYNTHETIC_UTILITY__ALTITUDE_STEP_M, rows, 0, None)
+        distance = speed * self.step / SYNTHETIC_UTILITY__EARTH_RADIUS_M
+        latitude = np.clip(self.latitude + np.degrees(np.cumsum(distance *
+                                                                np.cos(np.radians(course)))),
+                           -SYNTHETIC_UTILITY__MAX_LATITUDE, SYNTHETIC_UTILITY__MAX_LATITUDE)
+        longitude = self.longitude + np.degrees(np.cumsum(
+            distance * np.sin(np.radians(course)) / np.cos(np.radians(latitude))))
+        longitude = (longitude + 180) % 360 - 180
+        self.speed, self.course, self.altitude = speed[-1], course[-1], altitude[-1]
+        self.latitude, self.longitude = latitude[-1], longitude[-1]
+
+        # reported position: the true one plus receiver noise
+        noise = np.degrees(self.rng.normal(0, self.noise, (2, rows)) /
+                           SYNTHETIC_UTILITY__EARTH_RADIUS_M)
+        latitude = latitude + noise[0]
+        longitude = longitude + noise[1] / np.cos(np.radians(latitude))
+        seconds = self.start.astype("datetime64[ms]").astype(np.int64) / 1000 + \
+            (self.epoch + np.arange(rows)) * self.step
+        days = (seconds // SYNTHETIC_UTILITY__SECONDS_PER_DAY).astype("datetime64[D]")
+        self.epoch += rows
+        knots = speed * SYNTHETIC_UTILITY__KNOTS_PER_MPS
+        return {
+            "utc": _nmea_utc(seconds % SYNTHETIC_UTILITY__SECONDS_PER_DAY),
+            "date": _nmea_date(days),
+            "latitude": _nmea_coordinate(latitude, 4),
+            "longitude": _nmea_coordinate(longitude, 4),
+            "latitude_precise": _nmea_coordinate(latitude, 7),
+            "longitude_precise": _nmea_coordinate(longitude, 7),
+            "latitude_hemisphere": np.where(latitude < 0, ord("S"), ord("N")),
+            "longitude_hemisphere": np.where(longitude < 0, ord("W"), ord("E")),
+            "satellites": self.rng.integers(*SYNTHETIC_UTILITY__SATELLITES, rows,
+                                            endpoint=True),
+            "hdop": self.rng.uniform(*SYNTHETIC_UTILITY__HDOP, rows),
+            "altitude": altitude,
+            "undulation": np.full(rows, SYNTHETIC_UTILITY__UNDULATION_M),
+            "speed_knots": knots,
+            "speed_kmh": speed * SYNTHETIC_UTILITY__KMH_PER_MPS,
+            "course": course,
+        }
+
+
+def generate_nmea(output_file=None, epochs=None, size=None,
+                  sentences=SYNTHETIC_UTILITY__NMEA_SENTENCES, corrupt=0.0, edge_cases=False,
+                  origin=SYNTHETIC_UTILITY__DEFAULT_ORIGIN,
+                  start=SYNTHETIC_UTILITY__DEFAULT_START, rate=SYNTHETIC_UTILITY__NMEA_RATE_HZ,
+                  noise=SYNTHETIC_UTILITY__POSITION_NOISE_M, seed=None):
+    """
+    @brief: write a synthetic NMEA log.
+    @param:
+        output_file: log file to write.
+        epochs: number of epochs, or
+        size: approximate file size in bytes ("500M", "2G", ...), rounded up to whole epochs.
+        sentences: sentence types written per epoch, in order (subset of GPGGA, GPRMC, GPVTG).
+        corrupt: ratio of sentences with a wrong checksum.
+        edge_cases: split the log into legs starting at SYNTHETIC_UTILITY__EDGE_CASE_ORIGINS
+                    instead of one track from origin.
+        origin: (latitude, longitude) of the track in signed degrees.
+        start: UTC time of the first epoch (numpy datetime64).
+        rate: epochs per second.
+        noise: standard deviation of the reported position in metres.
+        seed: random seed, the same seed writes the same log.
+    @returns:
+        dict with the number of "epochs", "lines", "corrupt" sentences and "bytes" written.
+    """
+    template = _Template(tuple(item for sentence in sentences
+                               for item in SYNTHETIC_UTILITY__NMEA_TEMPLATES[sentence]))
+    epochs = _line_count(epochs, size, template.width)
+    rng = np.random.default_rng(seed)
+    origins = SYNTHETIC_UTILITY__EDGE_CASE_ORIGINS if edge_cases else (origin,)
+    legs = np.linspace(0, epochs, len(origins) + 1).astype(np.int64)
+    track = _Track(origins[0], np.datetime64(start), rate, noise, rng)
+    corrupted = 0
+    with open(output_file, 'wb') as of:
+        for leg_origin, leg_start, leg_end in zip(origins, legs[:-1], legs[1:]):
+            track.restart(leg_origin)
+            for chunk_start in range(leg_start, leg_end, SYNTHETIC_UTILITY__CHUNK_LINES):
+                rows = min(SYNTHETIC_UTILITY__CHUNK_LINES, leg_end - chunk_start)
+                out = template.render(track.advance(rows), rows)
+                if corrupt:
+                    corrupted += template.corrupt(out, corrupt, rng)
+                of.write(out.data)
+    return {"epochs": epochs, "lines": epochs * len(sentences), "corrupt": corrupted,
+            "bytes": epochs * template.width}
+
+
+def _ppg_values(rng, start, rows, sample_rate, heart_rate, dc, amplitude, wander, noise,
+                state):
+    """
+    @brief: the next rows raw samples of the PPG trace; state carries the beat phase and the
+    heart rate from one chunk to the next.
+    """
+    low, high = SYNTHETIC_UTILITY__HEART_RATE_LIMITS_BPM
+    bpm = np.clip(state["bpm"] + np.cumsum(rng.normal(0, SYNTHETIC_UTILITY__HEART_RATE_STEP_BPM,
+                                                      rows)), low, high)
+    phase = state["phase"] + np.cumsum(bpm / 60 / sample_rate)
+    state["bpm"], state["phase"] = bpm[-1], phase[-1] % 1
+    beat = phase % 1
+    pulse = sum(height * np.exp(-((beat - centre) / width) ** 2)
+                for centre, width, height in SYNTHETIC_UTILITY__PULSE_WAVES)
+    seconds = (start + np.arange(rows)) / sample_rate
+    # more blood in the tissue absorbs more light, the raw value drops with the pulse
+    return (dc - amplitude * pulse +
+            wander * np.sin(2 * np.pi * SYNTHETIC_UTILITY__PPG_RESPIRATION_HZ * seconds) +
+            rng.normal(0, noise, rows))
+
+
+def _ppg_log_template(digits, counter_digits):
+    return _Template((("line", counter_digits, 0), b"|", ("days", 3, 0), b"d ",
+                      ("hours", 2, 0), b":", ("minutes", 2, 0), b":", ("seconds", 2, 3),
+                      SYNTHETIC_UTILITY__PPG_LOG_PREFIX, ("ppg", digits, 0),
+                      SYNTHETIC_UTILITY__PPG_LOG_SUFFIX))
+
+
+def generate_ppg(output_file=None, samples=None, size=None,
+                 line_format=SYNTHETIC_UTILITY__PPG_FORMAT_VALUES,
+                 sample_rate=SYNTHETIC_UTILITY__PPG_RATE_HZ,
+                 heart_rate=SYNTHETIC_UTILITY__HEART_RATE_BPM, dc=SYNTHETIC_UTILITY__PPG_DC,
+                 amplitude=SYNTHETIC_UTILITY__PPG_AMPLITUDE, wander=SYNTHETIC_UTILITY__PPG_WANDER,
+                 noise=SYNTHETIC_UTILITY__PPG_NOISE, seed=None):
+    """
+    @brief: write a synthetic GH3220 PPG raw data log.
+    @param:
+        output_file: log file to write.
+        samples: number of samples (lines), or
+        size: approximate file size in bytes ("500M", "2G", ...).
+        line_format: "values" for one value per line, "log" for lines of the full
+                     GH3x2x algorithm log with line counter and timestamp.
+        sample_rate: samples per second.
+        heart_rate: heart rate at the start in beats per minute, it drifts slowly.
+        dc, amplitude, wander, noise: DC level, pulse height, respiratory baseline wander
+                     and gaussian noise in adc steps. Values are clipped to the digit count
+                     of dc, so every value line has the same width.
+        seed: random seed, the same seed writes the same log.
+    @returns:
+        dict with the number of "samples" and "bytes" written.
+    """
+    if line_format not in SYNTHETIC_UTILITY__PPG_FORMATS:
+        raise ValueError(f"unknown PPG line format: {line_format}")
+    digits = len(str(int(dc)))
+    values_template = _Template((("ppg", digits, 0), b"\n"))
+    # the log template is only an estimate of the line width, the counter grows
+    width = (values_template.width if line_format == SYNTHETIC_UTILITY__PPG_FORMAT_VALUES
+             else _ppg_log_template(digits, 1).width + 6)
+    samples = _line_count(samples, size, width)
+    rng = np.random.default_rng(seed)
+    state = {"bpm": float(heart_rate), "phase": 0.0}
+    log_templates = {}
+    written = 0
+    with open(output_file, 'wb') as of:
+        for start in range(0, samples, SYNTHETIC_UTILITY__CHUNK_LINES):
+            rows = min(SYNTHETIC_UTILITY__CHUNK_LINES, samples - start)
+            values = {"ppg": np.clip(_ppg_values(rng, start, rows, sample_rate, heart_rate, dc,
+                                                 amplitude, wander, noise, state),
+                                     10 ** (digits - 1), 10 ** digits - 1)}
+            if line_format == SYNTHETIC_UTILITY__PPG_FORMAT_VALUES:
+                out = values_template.render(values, rows)
+                of.write(out.data)
+                written += out.size
+                continue
+            line = start + 1 + np.arange(rows)
+            milliseconds = np.floor((line - 1) * 1000 / sample_rate)
+            values["days"], rest = np.divmod(milliseconds, SYNTHETIC_UTILITY__SECONDS_PER_DAY * 1000)
+            values["hours"], rest = np.divmod(rest, 3600000)
+            values["minutes"], rest = np.divmod(rest, 60000)
+            values["seconds"] = rest / 1000
+            values["line"] = line
+            # the line counter is not padded, lines of one counter width share a template
+            counter_digits = np.floor(np.log10(line)).astype(np.int64) + 1
+            for part_digits in np.unique(counter_digits):
+                part = counter_digits == part_digits
+                if part_digits not in log_templates:
+                    log_templates[part_digits] = _ppg_log_template(digits, part_digits)
+                out = log_templates[part_digits].render(
+                    {name: value[part] for name, value in values.items()},
+                    np.count_nonzero(part))
+                of.write(out.data)
+                written += out.size
+    return {"samples": samples, "bytes": written}
+
+
+def parse_arguments(argv=None):
+    """
+     @brief: command line of the log generator
+    """
+    parser = argparse.ArgumentParser(
+        description="Write synthetic NMEA or PPG logs of any size for load tests.")
+    parser.add_argument("kind", choices=("nmea", "ppg"), help="log to write")
+    parser.add_argument("output", help="log file to write")
+    length = parser.add_mutually_exclusive_group(required=True)
+    length.add_argument("-n", "--lines", type=int,
+                        help="number of epochs (nmea) or samples (ppg)")
+    length.add_argument("-s", "--size", help="approximate file size, e.g. 500M or 2G")
+    parser.add_argument("--corrupt", type=float, default=0.0,
+                        help="nmea: ratio of sentences with a wrong checksum (default: "
+                             "%(default)s)")
+    parser.add_argument("--edge-cases", action="store_true",
+                        help="nmea: legs in all hemispheres and across the equator, prime "
+                             "meridian and antimeridian")
+    parser.add_argument("--line-format", choices=SYNTHETIC_UTILITY__PPG_FORMATS,
+                        default=SYNTHETIC_UTILITY__PPG_FORMAT_VALUES,
+                        help="ppg: one value per line or full algorithm log lines "
+                             "(default: %(default)s)")
+    parser.add_argument("--seed", type=int, help="random seed")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    if args.kind == "nmea":
+        written = generate_nmea(args.output, args.lines, args.size, corrupt=args.corrupt,
+                                edge_cases=args.edge_cases, seed=args.seed)
+    else:
+        written = generate_ppg(args.output, args.lines, args.size, line_format=args.line_format,
+                               seed=args.seed)
+    print(args.output, written)
@@ -0,0 +1,182 @@
+"""
+  **************************************************************************************************
+  * @brief   Shared fixtures of the parser test and benchmark suite.
+  *
+  *          Tests and benchmarks run from the repository root (python -m pytest -q):
+  *            tests/test_gnss_golden.py   GNSS parsers against the data/*expected* golden files
+  *            tests/test_ppg_golden.py    PPG loader against the golden files
+  *            tests/test_benchmarks.py    parse, parse_all, PPG loader and data_plot timing
+  *
+  *          Benchmarks use the pytest-benchmark fixture when the plugin is installed. Without it
+  *          the `benchmark` fixture below stands in with the same call interface and options:
+  *            --benchmark-lines N             largest synthetic log, 1k .. 10M lines
+  *            --benchmark-json PATH           write the timings as JSON
+  *            --benchmark-baseline PATH       fail benchmarks slower than a saved JSON ...
+  *            --benchmark-max-slowdown RATIO  ... by more than this ratio (default 1.5)
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import time
+
+import pytest
+
+REPO_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIRECTORY = os.path.join(REPO_DIRECTORY, "data")
+PPG_EXERCISE_DIRECTORY = os.path.join(DATA_DIRECTORY, "ppg data  plotting exercise")
+sys.path.insert(0, REPO_DIRECTORY)
+
+# synthetic log sizes, capped by --benchmark-lines
+BENCHMARK_LINES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+BENCHMARK_DEFAULT_MAX_LINES = 100_000
+# fallback benchmark fixture: rounds run until both limits are reached, at most MAX_ROUNDS
+BENCHMARK_MIN_ROUNDS = 3
+BENCHMARK_MAX_ROUNDS = 20
+BENCHMARK_MIN_SECONDS = 0.5
+BENCHMARK_MAX_SLOWDOWN = 1.5
+
+HAVE_PYTEST_BENCHMARK = importlib.util.find_spec("pytest_benchmark") is not None
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("parser benchmarks")
+    group.addoption("--benchmark-lines", type=int, default=BENCHMARK_DEFAULT_MAX_LINES,
+                    help="largest synthetic log in lines (default: %(default)s)")
+    if not HAVE_PYTEST_BENCHMARK:
+        group.addoption("--benchmark-json", help="write the benchmark timings as JSON")
+        group.addoption("--benchmark-baseline",
+                        help="JSON of an earlier --benchmark-json run to compare against")
+        group.addoption("--benchmark-max-slowdown", type=float, default=BENCHMARK_MAX_SLOWDOWN,
+                        help="fail a benchmark slower than the baseline by more than this "
+                             "ratio (default: %(default)s)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: timing benchmark, deselect with "
+                                       "-m 'not benchmark'")
+    config.benchmark_results = {}
+
+
+def pytest_generate_tests(metafunc):
+    if "lines" in metafunc.fixturenames:
+        max_lines = metafunc.config.getoption("--benchmark-lines")
+        metafunc.parametrize("lines", [lines for lines in BENCHMARK_LINES if lines <= max_lines])
+
+
+def load_script(file_name):
+    """
+    @brief: import one of the command line scripts, whose file names are not module names.
+    """
+    module_name = os.path.splitext(file_name)[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name,
+                                                  os.path.join(REPO_DIRECTORY, file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def gnss_plots():
+    return load_script("gnss-plots.py")
+
+
+@pytest.fixture(scope="session")
+def ppg_plots():
+    return load_script("ppg-raw-data-plots.py")
+
+
+@pytest.fixture(scope="session")
+def synthetic_log(tmp_path_factory):
+    """
+    @brief: factory of synthetic logs of a given kind ("gnss" or "ppg") and line count,
+    written once per session with synthetic_utility.
+    """
+    from synthetic_utility import generate_nmea, generate_ppg, SYNTHETIC_UTILITY__NMEA_SENTENCES
+    directory = tmp_path_factory.mktemp("synthetic")
+    written = {}
+
+    def make(kind, lines):
+        if (kind, lines) not in written:
+            path = str(directory / f"{kind}_{lines}.txt")
+            if kind == "gnss":
+                generate_nmea(path, -(-lines // len(SYNTHETIC_UTILITY__NMEA_SENTENCES)), seed=0)
+            else:
+                generate_ppg(path, lines, seed=0)
+            written[kind, lines] = path
+        return written[kind, lines]
+
+    return make
+
+
+class _Benchmark:
+    """
+    @brief: minimal stand-in for the pytest-benchmark fixture: benchmark(function, *args),
+    benchmark.pedantic(...) and benchmark.extra_info.
+    """
+
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+        self.extra_info = {}
+        self.stats = None
+
+    def _run(self, function, args, kwargs, rounds):
+        runs = []
+        result = None
+        while len(runs) < (rounds or BENCHMARK_MAX_ROUNDS):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            runs.append(time.perf_counter() - start)
+            if rounds is None and len(runs) >= BENCHMARK_MIN_ROUNDS and \
+                    sum(runs) >= BENCHMARK_MIN_SECONDS:
+                break
+        self.stats = {"min": min(runs), "median": statistics.median(runs),
+                      "rounds": len(runs), "extra_info": self.extra_info}
+        self.config.benchmark_results[self.name] = self.stats
+        self._compare()
+        return result
+
+    def __call__(self, function, *args, **kwargs):
+        return self._run(function, args, kwargs, None)
+
+    def pedantic(self, function, args=(), kwargs=None, rounds=1, iterations=1):
+        return self._run(function, args, kwargs or {}, rounds * iterations)
+
+    def _compare(self):
+        baseline_file = self.config.getoption("--benchmark-baseline")
+        if not baseline_file:
+            return
+        with open(baseline_file) as bf:
+            baseline = json.load(bf).get(self.name)
+        if baseline is None:
+            return
+        ratio = self.stats["min"] / baseline["min"]
+        if ratio > self.config.getoption("--benchmark-max-slowdown"):
+            pytest.fail(f"{self.name}: {self.stats['min'] * 1000:.1f} ms is {ratio:.2f}x the "
+                        f"baseline {baseline['min'] * 1000:.1f} ms")
+
+
+if not HAVE_PYTEST_BENCHMARK:
+    @pytest.fixture
+    def benchmark(request):
+        return _Benchmark(request.node.nodeid, request.config)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = getattr(config, "benchmark_results", {})
+    if not results:
+        return
+    terminalreporter.section("benchmarks (min / median of rounds)")
+    for name, stats in sorted(results.items()):
+        terminalreporter.write_line(f"{stats['min'] * 1000:12.3f} ms {stats['median'] * 1000:12.3f}"
+                                    f" ms  x{stats['rounds']:<3} {name}")
+    json_file = None if HAVE_PYTEST_BENCHMARK else config.getoption("--benchmark-json")
+    if json_file:
+        with open(json_file, 'w') as jf:
+            json.dump(results, jf, indent=2)
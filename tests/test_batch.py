@@ -0,0 +1,109 @@
+"""
+  **************************************************************************************************
+  * @brief   Batch mode over a directory tree of flight and PPG logs.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import json
+import os
+import shutil
+from functools import reduce
+from operator import xor
+
+import numpy as np
+import pytest
+
+import batch_utility
+from batch_utility import batch_process, collect_log_files, process_log_file
+from conftest import DATA_DIRECTORY
+from gnss_utility import parse_track
+
+GPS_LOG = os.path.join(DATA_DIRECTORY, "gps.txt")
+GPS_TEST_INPUT = os.path.join(DATA_DIRECTORY, "gps_test_input.txt")
+PPG_LOG = os.path.join(DATA_DIRECTORY, "ppg-raw-data_ch3_6_12_2023_16-57-13.TXT")
+
+
+def nmea(body):
+    checksum = reduce(xor, body.encode(), 0)
+    return f"${body}*{checksum:02X}\n"
+
+
+@pytest.fixture
+def log_tree(tmp_path, monkeypatch):
+    """
+    @brief: two flight logs of the same name in different directories, a PPG log, a flight
+    log without altitudes and a file that is neither.
+    """
+    monkeypatch.setenv("LOG_CACHE_DIR", str(tmp_path / "cache"))
+    root = tmp_path / "logs"
+    for directory in ("a", "b", "b/c"):
+        (root / directory).mkdir(parents=True)
+    shutil.copy(GPS_LOG, root / "a" / "gps.txt")
+    shutil.copy(GPS_TEST_INPUT, root / "b" / "gps.txt")
+    shutil.copy(PPG_LOG, root / "b" / "c" / "ppg.TXT")
+    (root / "b" / "c" / "no_altitude.txt").write_text(
+        nmea("GPGGA,011310.00,3354.9990,S,15059.6067,E,1,19,0.6,,M,22.60,M,,") +
+        nmea("GPGGA,011311.00,3354.9991,S,15059.6068,E,1,19,0.6,,M,22.60,M,,"))
+    (root / "notes.txt").write_text("not a log\n")
+    (root / "image.png").write_bytes(b"")
+    return root
+
+
+def test_collect_log_files(log_tree):
+    expected = sorted(str(log_tree / name) for name in
+                      ("a/gps.txt", "b/gps.txt", "b/c/ppg.TXT", "b/c/no_altitude.txt",
+                       "notes.txt"))
+    assert collect_log_files(str(log_tree)) == expected
+    assert collect_log_files(str(log_tree / "**" / "gps.txt")) == \
+        [str(log_tree / "a" / "gps.txt"), str(log_tree / "b" / "gps.txt")]
+    assert collect_log_files(str(log_tree / "a" / "gps.txt")) == [str(log_tree / "a" / "gps.txt")]
+
+
+def test_batch_keeps_subdirectories(log_tree, tmp_path):
+    output_dir = tmp_path / "output"
+    results = {os.path.relpath(result["log_file"], log_tree): result
+               for result in batch_process(str(log_tree), str(output_dir), workers=2)}
+    assert results["notes.txt"]["error"] == "not a GNSS or PPG log"
+    # same basename, separate outputs
+    for name, epochs in (("a/gps", parse_track(GPS_LOG)["utc_time"].size), ("b/gps", 1)):
+        result = results[name + ".txt"]
+        assert result["summary_file"] == str(output_dir / (name + ".summary.json"))
+        assert result["plot_file"] == str(output_dir / (name + ".png"))
+        assert os.path.getsize(result["plot_file"]) > 0
+        with open(result["summary_file"]) as sf:
+            summary = json.load(sf)
+        assert summary["epochs"] == epochs
+        assert summary["log_file"] == str(log_tree / (name + ".txt"))
+    summary = results["b/c/ppg.TXT"]["summary"]
+    assert summary["type"] == "ppg" and summary["samples"] > 0
+    assert os.path.isfile(output_dir / "b" / "c" / "ppg.png")
+
+
+def test_summary_without_altitude_is_valid_json(log_tree, tmp_path):
+    result = process_log_file(str(log_tree / "b" / "c" / "no_altitude.txt"), str(tmp_path),
+                              use_cache=False, input_root=str(log_tree))
+    with open(result["summary_file"]) as sf:
+        summary = json.loads(sf.read(), parse_constant=pytest.fail)
+    assert summary["fixes"] == 2 and summary["altitude_max"] is None
+    assert summary["latitude_min"] == pytest.approx(-33.916651666666667)
+
+
+def test_summary_positions_come_from_the_track(log_tree, tmp_path):
+    result = process_log_file(str(log_tree / "a" / "gps.txt"), str(tmp_path), use_cache=False)
+    track = parse_track(GPS_LOG)
+    assert result["summary_file"] == str(tmp_path / "gps.summary.json")
+    assert result["summary"]["fixes"] == track["latitude"].size
+    assert result["summary"]["longitude_max"] == np.nanmax(track["longitude"])
+    assert result["summary"]["altitude_max"] == np.nanmax(track["altitude"])
+
+
+def test_decoder_errors_are_recorded_per_file(log_tree, tmp_path, monkeypatch):
+    def broken(log_file, **kwargs):
+        raise IndexError("corrupt sentence")
+
+    monkeypatch.setattr(batch_utility, "parse_track", broken)
+    result = process_log_file(str(log_tree / "a" / "gps.txt"), str(tmp_path), use_cache=False)
+    assert result["error"] == "IndexError: corrupt sentence"
+    assert "total" in result["timing"]
@@ -0,0 +1,112 @@
+"""
+  **************************************************************************************************
+  * @brief   Benchmarks of parse, parse_all, the bulk decoders, track analytics, the PPG loader
+  *          and data_plot on synthetic logs of 1k lines up to --benchmark-lines (10M at most).
+  *
+  *          python -m pytest -q tests/test_benchmarks.py --benchmark-lines 1000000
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from benchmark_utility import benchmark_cold_start, BENCHMARK_UTILITY__TOOLS
+from geodesy_utility import summarize_track
+from gnss_utility import parse_all_vectorized, parse_track
+from ppg_utility import PPG_UTILITY__BLOCK_SIZE, parse_all_raw_mmap
+
+pytestmark = pytest.mark.benchmark
+
+COLD_START_ROUNDS = 3
+# working set of the PPG loader per decoded block, in block sizes
+PPG_LOADER_BLOCK_WORKING_SET = 12
+
+
+def _fixes(log_file):
+    with open(log_file, 'rb') as lf:
+        return lf.read().count(b"$GPGGA")
+
+
+def test_parse(benchmark, gnss_plots, synthetic_log, lines):
+    log_file = synthetic_log("gnss", lines)
+    with open(log_file) as lf:
+        log_lines = lf.readlines()
+
+    def parse_lines():
+        return [gnss_plots.parse(line, gnss_plots.DEFAULT_DELIMS) for line in log_lines]
+
+    fixes = benchmark(parse_lines)
+    assert sum(fix[0] == gnss_plots.GNSS__TRUE for fix in fixes) == _fixes(log_file)
+
+
+def test_parse_all(benchmark, gnss_plots, synthetic_log, lines):
+    log_file = synthetic_log("gnss", lines)
+    latitude, _ = benchmark(gnss_plots.parse_all, log_file, gnss_plots.DEFAULT_DELIMS)
+    assert len(latitude) == _fixes(log_file)
+
+
+def test_parse_all_vectorized(benchmark, synthetic_log, lines):
+    log_file = synthetic_log("gnss", lines)
+    latitude, _ = benchmark(parse_all_vectorized, log_file)
+    assert latitude.size == _fixes(log_file)
+
+
+def test_parse_track(benchmark, synthetic_log, lines):
+    track = benchmark(parse_track, synthetic_log("gnss", lines))
+    assert track["utc_time"].size > 0
+
+
+def test_summarize_track(benchmark, synthetic_log, lines):
+    track = parse_track(synthetic_log("gnss", lines))
+    summary = benchmark(summarize_track, track)
+    assert summary["fixes"] == track["utc_time"].size
+
+
+def test_ppg_loader(benchmark, synthetic_log, lines):
+    ppg = benchmark(parse_all_raw_mmap, synthetic_log("ppg", lines))
+    assert ppg.size == lines
+
+
+def test_ppg_loader_peak_memory(benchmark, synthetic_log, lines):
+    log_file = synthetic_log("ppg", lines)
+
+    def load():
+        tracemalloc.start()
+        try:
+            return parse_all_raw_mmap(log_file), tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    ppg, peak = benchmark.pedantic(load, rounds=1)
+    benchmark.extra_info["peak_bytes"] = peak
+    benchmark.extra_info["peak_bytes_per_sample"] = peak / lines
+    # the samples and their copy joining the blocks, plus the working set of one block; it
+    # does not grow with the log, as (samples x digits) matrices would
+    block = min(os.path.getsize(log_file), PPG_UTILITY__BLOCK_SIZE)
+    assert peak <= 2 * ppg.nbytes + PPG_LOADER_BLOCK_WORKING_SET * block
+
+
+def test_data_plot(benchmark, gnss_plots, synthetic_log, lines, tmp_path):
+    latitude, longitude = parse_all_vectorized(synthetic_log("gnss", lines))
+    output_file = str(tmp_path / "flight_route.png")
+    assert benchmark(gnss_plots.data_plot, latitude, longitude, output_file) == \
+        gnss_plots.GNSS__TRUE
+
+
+def test_ppg_data_plot(benchmark, ppg_plots, synthetic_log, lines, tmp_path):
+    ppg = parse_all_raw_mmap(synthetic_log("ppg", lines))
+    output_file = str(tmp_path / "ppg_raw_plot.png")
+    assert benchmark(ppg_plots.data_plot, np.arange(1, ppg.size + 1), ppg, output_file) == \
+        ppg_plots.GNSS__TRUE
+
+
+@pytest.mark.parametrize("tool", BENCHMARK_UTILITY__TOOLS)
+def test_cold_start(benchmark, tool):
+    timing = benchmark.pedantic(benchmark_cold_start, args=((tool,), 1),
+                                rounds=COLD_START_ROUNDS)
+    assert timing[tool]["runs"]
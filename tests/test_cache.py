@@ -0,0 +1,172 @@
+"""
+  **************************************************************************************************
+  * @brief   Decoded log cache: hits, invalidation, decoder options, atomic entries and eviction.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import cache_utility
+from cache_utility import CACHE_UTILITY__META_FILE, cached_parse, evict
+from conftest import DATA_DIRECTORY
+from gnss_utility import parse_all_vectorized
+
+GPS_TEST_INPUT = os.path.join(DATA_DIRECTORY, "gps_test_input.txt")
+
+
+class CountingParse:
+    def __init__(self, parse=parse_all_vectorized):
+        self.parse = parse
+        self.calls = 0
+
+    def __call__(self, log_file, **kwargs):
+        self.calls += 1
+        return self.parse(log_file, **kwargs)
+
+
+@pytest.fixture
+def gps_log(tmp_path):
+    # one valid and one corrupt GPGGA sentence
+    with open(GPS_TEST_INPUT, 'rb') as tf:
+        sentence = tf.readline()
+    log_file = str(tmp_path / "gps.txt")
+    with open(log_file, 'wb') as lf:
+        lf.write(sentence + sentence.replace(b"3354.9990", b"3354.9991"))
+    return log_file
+
+
+def _entries(cache_dir):
+    return sorted(os.listdir(cache_dir))
+
+
+def test_miss_then_hit(gps_log, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    parse = CountingParse()
+    stats = {}
+    latitude, longitude = cached_parse(gps_log, "gpgga", parse, stats, cache_dir)
+    assert parse.calls == 1 and stats == {"rejected": 1}
+    cached_latitude, cached_longitude = cached_parse(gps_log, "gpgga", parse, stats, cache_dir)
+    assert parse.calls == 1 and stats == {"rejected": 2}
+    assert isinstance(cached_latitude, np.memmap)
+    np.testing.assert_array_equal(cached_latitude, latitude)
+    np.testing.assert_array_equal(cached_longitude, longitude)
+    # one entry, written through a staging directory that is gone
+    assert len(_entries(cache_dir)) == 1
+
+
+def test_changed_log_is_parsed_again(gps_log, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    parse = CountingParse()
+    cached_parse(gps_log, "gpgga", parse, cache_dir=cache_dir)
+    status = os.stat(gps_log)
+    # touched, same content: the hash matches and the entry is used
+    os.utime(gps_log, ns=(status.st_atime_ns, status.st_mtime_ns + 10 ** 9))
+    cached_parse(gps_log, "gpgga", parse, cache_dir=cache_dir)
+    assert parse.calls == 1
+    # same size, new content
+    with open(gps_log, 'r+b') as lf:
+        lf.write(b"$GPGGA,011312.00")
+    os.utime(gps_log, ns=(status.st_atime_ns, status.st_mtime_ns + 2 * 10 ** 9))
+    cached_parse(gps_log, "gpgga", parse, cache_dir=cache_dir)
+    assert parse.calls == 2
+    # new size, same mtime
+    mtime_ns = os.stat(gps_log).st_mtime_ns
+    with open(gps_log, 'ab') as lf:
+        lf.write(b"\n")
+    os.utime(gps_log, ns=(status.st_atime_ns, mtime_ns))
+    cached_parse(gps_log, "gpgga", parse, cache_dir=cache_dir)
+    assert parse.calls == 3
+    assert len(_entries(cache_dir)) == 1
+
+
+def test_decoder_options_are_part_of_the_key(gps_log, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    parse = CountingParse()
+    for _ in range(2):
+        checked, _ = cached_parse(gps_log, "gpgga", parse, cache_dir=cache_dir)
+        unchecked, _ = cached_parse(gps_log, "gpgga", parse, cache_dir=cache_dir,
+                                    options={"drop_invalid": False})
+        assert (checked.size, unchecked.size) == (1, 2)
+    assert parse.calls == 2 and len(_entries(cache_dir)) == 2
+
+
+def test_decoder_version_is_part_of_the_key(gps_log, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    parse = CountingParse()
+    cached_parse(gps_log, "track", parse, cache_dir=cache_dir)
+    grid_version = cache_utility.decoder_version("grid-z16")
+    # a new track decoder with the same layout rebuilds the track and the grids built from it
+    monkeypatch.setitem(cache_utility.CACHE_UTILITY__DECODER_VERSIONS, "track", 3)
+    assert cache_utility.decoder_version("grid-z16") != grid_version
+    cached_parse(gps_log, "track", parse, cache_dir=cache_dir)
+    cached_parse(gps_log, "track", parse, cache_dir=cache_dir)
+    assert parse.calls == 2 and len(_entries(cache_dir)) == 2
+
+
+def test_failed_store_leaves_the_cache_unchanged(gps_log, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    parse = CountingParse()
+    cached_parse(gps_log, "gpgga", parse, cache_dir=cache_dir)
+    entries = _entries(cache_dir)
+    with open(gps_log, 'ab') as lf:
+        lf.write(b"\n")
+
+    def failing_save(*args, **kwargs):
+        raise OSError("no space left on device")
+
+    monkeypatch.setattr(cache_utility.np, "save", failing_save)
+    latitude, _ = cached_parse(gps_log, "gpgga", parse, cache_dir=cache_dir)
+    assert latitude.size == 1 and parse.calls == 2
+    # no half written entry or staging directory is left behind
+    assert _entries(cache_dir) == entries
+    monkeypatch.undo()
+    cached_parse(gps_log, "gpgga", parse, cache_dir=cache_dir)
+    cached_parse(gps_log, "gpgga", parse, cache_dir=cache_dir)
+    assert parse.calls == 3
+
+
+def test_unreadable_entry_is_rebuilt(gps_log, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    parse = CountingParse()
+    cached_parse(gps_log, "gpgga", parse, cache_dir=cache_dir)
+    entry = os.path.join(cache_dir, _entries(cache_dir)[0])
+    with open(os.path.join(entry, "0.npy"), 'wb') as af:
+        af.write(b"not an array")
+    latitude, _ = cached_parse(gps_log, "gpgga", parse, cache_dir=cache_dir)
+    assert latitude.size == 1 and parse.calls == 2
+
+
+def _entry_log(cache_dir, entry_name):
+    return cache_utility._read_meta(os.path.join(cache_dir, entry_name))["log_file"]
+
+
+def test_least_recently_used_entries_are_evicted(gps_log, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    for number in range(3):
+        log_file = str(tmp_path / f"gps{number}.txt")
+        shutil.copyfile(gps_log, log_file)
+        cached_parse(log_file, "gpgga", parse_all_vectorized, cache_dir=cache_dir)
+    names = _entries(cache_dir)
+    for used, entry_name in enumerate(names):
+        meta_file = os.path.join(cache_dir, entry_name, CACHE_UTILITY__META_FILE)
+        os.utime(meta_file, (1000 + used, 1000 + used))
+    sizes = [cache_utility._entry_size(os.path.join(cache_dir, name)) for name in names]
+    assert evict(cache_dir, sum(sizes)) == 0
+    # the least recently used entry goes first, until the cache fits
+    assert evict(cache_dir, sum(sizes) - 1) == 1
+    assert _entries(cache_dir) == names[1:]
+    # a cache hit marks the entry as used, so it outlives the more recent one
+    parse = CountingParse()
+    cached_parse(_entry_log(cache_dir, names[1]), "gpgga", parse, cache_dir=cache_dir)
+    assert parse.calls == 0
+    assert evict(cache_dir, sizes[1]) == 1
+    assert _entries(cache_dir) == [names[1]]
+    # and cached_parse() keeps the cache within its cap when it stores an entry
+    cached_parse(gps_log, "gpgga", parse, cache_dir=cache_dir, max_bytes=sizes[1])
+    assert [_entry_log(cache_dir, name) for name in _entries(cache_dir)] == [gps_log]
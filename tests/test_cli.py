@@ -0,0 +1,131 @@
+"""
+  **************************************************************************************************
+  * @brief   Command lines of gnss-plots.py and ppg-raw-data-plots.py: argument parsing, and
+  *          headless (Agg) runs of the batch, summary and export modes.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import json
+import os
+import runpy
+import sys
+
+import numpy as np
+import pytest
+
+from conftest import DATA_DIRECTORY, PPG_EXERCISE_DIRECTORY, REPO_DIRECTORY
+from export_utility import load_npy
+from gnss_utility import parse_track
+from ppg_dsp_utility import PPG_DSP_UTILITY__BLOCK_SIZE, PPG_DSP_UTILITY__SAMPLE_RATE_HZ
+from ppg_utility import parse_all_raw_mmap
+
+GPS_LOG = os.path.join(DATA_DIRECTORY, "gps.txt")
+CH0_LOG = os.path.join(PPG_EXERCISE_DIRECTORY, "ppg-raw-data_ch0_6_12_2023_15-37-29.TXT")
+CH3_LOG = os.path.join(DATA_DIRECTORY, "ppg-raw-data_ch3_6_12_2023_16-57-13.TXT")
+
+
+@pytest.fixture
+def run_script(monkeypatch, tmp_path, capsys):
+    """
+    @brief: run a command line script as __main__ with the given arguments in tmp_path;
+    returns its exit code and standard output.
+    """
+    monkeypatch.setenv("MPLBACKEND", "Agg")
+    monkeypatch.setenv("LOG_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+
+    def run(file_name, *argv):
+        monkeypatch.setattr(sys, "argv", [file_name, *argv])
+        try:
+            runpy.run_path(os.path.join(REPO_DIRECTORY, file_name), run_name="__main__")
+            code = 0
+        except SystemExit as exit_:
+            code = exit_.code
+        return code, capsys.readouterr().out
+
+    return run
+
+
+def test_gnss_defaults(gnss_plots):
+    args = gnss_plots.parse_arguments([])
+    assert args.input == os.path.join("data", "gps.txt")
+    assert (args.output, args.format, args.workers, args.export, args.window) == \
+        (None, None, None, None, None)
+    assert not (args.follow or args.no_cache or args.summary)
+    assert args.projection == "degrees"
+    assert gnss_plots.output_file_name(args.output, args.format) == "flight_route.png"
+
+
+def test_gnss_options(gnss_plots):
+    args = gnss_plots.parse_arguments(["logs", "-o", "out/route", "-f", "svg", "-j", "3",
+                                       "--no-cache", "--summary", "-e", "track.csv",
+                                       "--projection", "utm", "--tiles", "tiles",
+                                       "--tile-zooms", "8-10", "--window", "01:13:10",
+                                       "01:20:00"])
+    assert (args.input, args.workers, args.export, args.tiles) == \
+        ("logs", 3, "track.csv", "tiles")
+    assert args.no_cache and args.summary
+    assert args.tile_zooms == [8, 9, 10]
+    assert args.window == [4390.0, 4800.0]
+    assert gnss_plots.output_file_name(args.output, args.format) == "out/route.svg"
+    with pytest.raises(SystemExit):
+        gnss_plots.parse_arguments(["--projection", "lambert"])
+    with pytest.raises(SystemExit):
+        gnss_plots.parse_arguments(["--window", "noon", "01:20:00"])
+
+
+def test_ppg_arguments(ppg_plots):
+    args = ppg_plots.parse_arguments([])
+    assert args.input == [os.path.join("data", "ppg-raw-data_ch3_6_12_2023_16-57-13.TXT")]
+    assert (args.align, args.sample_rate, args.block_size) == \
+        ("index", PPG_DSP_UTILITY__SAMPLE_RATE_HZ, PPG_DSP_UTILITY__BLOCK_SIZE)
+    args = ppg_plots.parse_arguments([CH0_LOG, CH3_LOG, "-a", "timestamp", "-r", "25",
+                                      "-b", "256", "-e", "ppg.npz", "--follow",
+                                      "--idle-timeout", "2"])
+    assert args.input == [CH0_LOG, CH3_LOG]
+    assert (args.align, args.sample_rate, args.block_size, args.export) == \
+        ("timestamp", 25.0, 256, "ppg.npz")
+    assert args.follow and args.idle_timeout == 2.0
+    with pytest.raises(SystemExit):
+        ppg_plots.parse_arguments(["-a", "nearest"])
+
+
+def test_gnss_summary_and_export(run_script, tmp_path):
+    code, out = run_script("gnss-plots.py", GPS_LOG, "-o", "route.png", "--summary",
+                           "-e", "track")
+    assert code == 0
+    assert "Plotting successfully: route.png" in out
+    assert os.path.getsize(tmp_path / "route.png") > 0
+    assert "path_length_m" in out
+    columns = load_npy(str(tmp_path / "track"))
+    track = parse_track(GPS_LOG)
+    assert set(columns) == set(track)
+    np.testing.assert_array_equal(columns["latitude"], track["latitude"])
+
+
+def test_gnss_batch(run_script, tmp_path):
+    code, out = run_script("gnss-plots.py", os.path.join(DATA_DIRECTORY, "gps*.txt"),
+                           "-o", "batch", "-j", "1", "--no-cache")
+    assert code == 0
+    assert "processed 3 of 3 log files" in out
+    with open(tmp_path / "batch" / "gps.summary.json") as sf:
+        assert json.load(sf)["type"] == "gnss"
+
+
+def test_gnss_missing_log(run_script, tmp_path):
+    code, out = run_script("gnss-plots.py", str(tmp_path / "missing.txt"))
+    assert code == 1 and "ERROR" in out
+
+
+def test_ppg_channels_summary_and_export(run_script, tmp_path):
+    code, out = run_script("ppg-raw-data-plots.py", CH0_LOG, CH3_LOG, "-o", "ppg.svg",
+                           "-e", "ppg.npz")
+    assert code == 0
+    assert "ch0: beats:" in out and "ch3: beats:" in out
+    assert os.path.getsize(tmp_path / "ppg.svg") > 0
+    with np.load(tmp_path / "ppg.npz") as archive:
+        assert archive.files == ["sample", "ch0", "ch3"]
+        samples = archive["sample"].size
+        np.testing.assert_array_equal(archive["ch3"], parse_all_raw_mmap(CH3_LOG)[:samples])
@@ -0,0 +1,87 @@
+"""
+  **************************************************************************************************
+  * @brief   CRC engines against the standard check values and bitwise reference implementations.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import numpy as np
+import pytest
+
+from crc_utility import CRC_UTILITY__CRC_8_CCITT_NORMAL, CRC_UTILITY__CRC_8_CCITT_REVERSED
+from crc_utility import CRC_UTILITY__CRC_8_TH_SHT4X, CRC_UTILITY__CRC_32_REVERSED
+from crc_utility import calculate_crc8_lsb, calculate_crc8_msb, calculate_crc16
+from crc_utility import calculate_crc32
+
+# input of the catalogue check values
+CHECK_INPUT = b"123456789"
+
+
+def _reference_crc_lsb(data, polynomial, crc=0):
+    # bitwise CRC, least significant bit first, as in the NovAtel manual
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ polynomial if crc & 1 else crc >> 1
+    return crc
+
+
+def test_crc8_check_values():
+    # Sensirion SHT4x datasheet example, CRC-8 (CRC-8/SMBUS) check value
+    assert calculate_crc8_msb(b"\xbe\xef", CRC_UTILITY__CRC_8_TH_SHT4X, 0xFF) == 0x92
+    assert calculate_crc8_msb(CHECK_INPUT, CRC_UTILITY__CRC_8_CCITT_NORMAL) == 0xF4
+    assert calculate_crc8_lsb(CHECK_INPUT, CRC_UTILITY__CRC_8_CCITT_REVERSED) == \
+        _reference_crc_lsb(CHECK_INPUT, 0xE0)
+
+
+def test_crc16_kermit():
+    assert calculate_crc16(CHECK_INPUT) == 0x2189
+    # continued over several buffers, and zero once the CRC is appended low byte first
+    assert calculate_crc16(CHECK_INPUT[4:], calculate_crc16(CHECK_INPUT[:4])) == 0x2189
+    assert calculate_crc16(CHECK_INPUT + (0x2189).to_bytes(2, "little")) == 0
+
+
+def test_crc32_novatel_convention():
+    # reflected 0x04C11DB7, initial value 0 and no final XOR: not zlib's CRC-32 (0xCBF43926)
+    assert calculate_crc32(CHECK_INPUT) == _reference_crc_lsb(CHECK_INPUT,
+                                                              CRC_UTILITY__CRC_32_REVERSED)
+    assert calculate_crc32(CHECK_INPUT) == 0x2DFD2D88
+    assert calculate_crc32(CHECK_INPUT[4:], calculate_crc32(CHECK_INPUT[:4])) == 0x2DFD2D88
+    assert calculate_crc32(CHECK_INPUT + (0x2DFD2D88).to_bytes(4, "little")) == 0
+
+
+@pytest.mark.parametrize("data, polynomial", [(b"\x01", 0), (b"\x01", 0x100), (b"\x01", "0x31"),
+                                              ([256], 0x31), (["a"], 0x31), (1.5, 0x31)])
+def test_crc8_invalid_parameters_raise(data, polynomial):
+    with pytest.raises(ValueError):
+        calculate_crc8_lsb(data, polynomial)
+    with pytest.raises(ValueError):
+        calculate_crc8_msb(data, polynomial)
+
+
+@pytest.mark.parametrize("calculate", [calculate_crc16, calculate_crc32])
+def test_invalid_data_raises(calculate):
+    for data in ([256], 1.5, np.array([1, 256]), np.array([-1]), np.array([1.0, 2.0])):
+        with pytest.raises(ValueError):
+            calculate(data)
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.int16, "<u2", ">u4", np.int64, np.uint64])
+def test_integer_arrays_are_one_byte_per_element(dtype):
+    values = np.array([0xBE, 0xEF], dtype=dtype)
+    assert calculate_crc16(values) == calculate_crc16([0xBE, 0xEF]) == calculate_crc16(b"\xbe\xef")
+    assert calculate_crc32(values) == calculate_crc32(b"\xbe\xef")
+    assert calculate_crc8_msb(values, CRC_UTILITY__CRC_8_TH_SHT4X, 0xFF) == 0x92
+    # non-contiguous arrays in C order
+    strided = np.arange(8, dtype=dtype)[::2]
+    assert calculate_crc16(strided) == calculate_crc16(bytes([0, 2, 4, 6]))
+
+
+def test_byte_buffers_are_read_raw():
+    data = bytearray(CHECK_INPUT)
+    assert calculate_crc16(memoryview(data)) == calculate_crc16(data) == 0x2189
+    assert calculate_crc32(memoryview(data)[::2]) == calculate_crc32(CHECK_INPUT[::2])
+    # a memoryview of wider items is still its raw bytes
+    assert calculate_crc16(memoryview(np.array([0xEFBE], dtype="<u2"))) == \
+        calculate_crc16(b"\xbe\xef")
@@ -0,0 +1,109 @@
+"""
+  **************************************************************************************************
+  * @brief   Bulk export of a track and a PPG table, read back with each format's own reader.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from conftest import DATA_DIRECTORY
+from export_utility import EXPORT_UTILITY__FORMATS, export_columns, export_csv, export_format
+from export_utility import load_npy
+from gnss_utility import parse_track
+from ppg_utility import parse_all_raw_mmap
+
+GPS_LOG = os.path.join(DATA_DIRECTORY, "gps.txt")
+PPG_LOG = os.path.join(DATA_DIRECTORY, "ppg-raw-data_ch3_6_12_2023_16-57-13.TXT")
+ROWS = 200
+
+
+@pytest.fixture(params=["track", "ppg"])
+def table(request):
+    """
+    @brief: a few hundred rows of a decoded track (float columns with NaN) or of a PPG
+    capture (integer columns).
+    """
+    if request.param == "track":
+        track = parse_track(GPS_LOG)
+        # the last epoch has no GPVTG sentence, its columns are NaN
+        return {name: values[-ROWS:] for name, values in track.items()}
+    ppg = parse_all_raw_mmap(PPG_LOG)[:ROWS]
+    return {"sample": np.arange(1, ppg.size + 1), "ch3": ppg}
+
+
+def assert_columns_equal(read, table, rtol=0.0):
+    assert list(read) == list(table)
+    for name, values in table.items():
+        np.testing.assert_allclose(np.asarray(read[name], dtype=values.dtype), values,
+                                   rtol=rtol, atol=0)
+
+
+def read_csv(output_file):
+    data = np.genfromtxt(output_file, delimiter=",", names=True, dtype=None,
+                         missing_values="", filling_values=np.nan)
+    return {name: data[name] for name in data.dtype.names}
+
+
+def read_xlsx(output_file):
+    openpyxl = pytest.importorskip("openpyxl")
+    sheet = openpyxl.load_workbook(output_file).active
+    header, *rows = sheet.iter_rows(values_only=True)
+    return {name: [np.nan if value is None else value for value in column]
+            for name, column in zip(header, zip(*rows))}
+
+
+def read_npz(output_file):
+    with np.load(output_file) as archive:
+        return {name: archive[name] for name in archive.files}
+
+
+@pytest.mark.parametrize("extension, read", [("npz", read_npz), ("", load_npy),
+                                             ("csv", read_csv), ("xlsx", read_xlsx)])
+def test_round_trip(tmp_path, table, extension, read):
+    output_file = str(tmp_path / ("export." + extension if extension else "export"))
+    file_format = export_columns(table, output_file)
+    assert file_format == (extension or "npy")
+    read_back = read(output_file)
+    if extension == "":
+        # columns of an npy directory come back in name order
+        read_back = {name: read_back[name] for name in table}
+    # openpyxl writes 16 significant digits, a spreadsheet holds 15
+    assert_columns_equal(read_back, table, rtol=1e-15 if extension == "xlsx" else 0.0)
+
+
+@pytest.mark.parametrize("extension", ["parquet", "feather"])
+def test_arrow_round_trip(tmp_path, table, extension):
+    pytest.importorskip("pyarrow")
+    import pyarrow.feather
+    import pyarrow.parquet
+    output_file = str(tmp_path / ("export." + extension))
+    assert export_columns(table, output_file) == extension
+    read = pyarrow.parquet.read_table if extension == "parquet" else pyarrow.feather.read_table
+    read_back = read(output_file)
+    assert_columns_equal({name: read_back[name].to_numpy() for name in read_back.column_names},
+                         table)
+
+
+def test_csv_blanks_only_missing_values(tmp_path):
+    output_file = str(tmp_path / "nan.csv")
+    # "nan" inside a column name is kept, only NaN cells are blank
+    export_csv({"nanometre": np.array([1.5, np.nan, -np.inf]), "count": np.array([1, 2, 3])},
+               output_file, chunk_rows=2)
+    with open(output_file) as cf:
+        assert cf.read() == "nanometre,count\n1.5,1\n,2\n-inf,3\n"
+
+
+def test_export_format():
+    assert export_format("track.PARQUET") == "parquet"
+    assert export_format("columns") == "npy"
+    assert export_format("track.bin", "npz") == "npz"
+    assert set(EXPORT_UTILITY__FORMATS) >= {"csv", "xlsx"}
+    with pytest.raises(ValueError):
+        export_format("track.bin")
+    with pytest.raises(ValueError):
+        export_columns({"a": np.arange(2), "b": np.arange(3)}, "track.npz")
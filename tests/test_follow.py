@@ -0,0 +1,111 @@
+"""
+  **************************************************************************************************
+  * @brief   Following a growing log: appended lines, partial lines, truncation and rotation.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from conftest import DATA_DIRECTORY
+from follow_utility import GrowableBuffer, LogFollower, follow
+from gnss_utility import decode_gpgga
+
+GPS_LOG = os.path.join(DATA_DIRECTORY, "gps.txt")
+
+
+@pytest.fixture(scope="module")
+def gps_lines():
+    with open(GPS_LOG, 'rb') as lf:
+        return lf.readlines()
+
+
+def _fixes(lines):
+    return decode_gpgga(b"".join(lines))
+
+
+def _append(log_file, data):
+    with open(log_file, 'ab') as lf:
+        lf.write(data)
+
+
+def test_growable_buffer():
+    buffer = GrowableBuffer(np.float64, capacity=2)
+    for start in range(0, 10, 3):
+        buffer.append(np.arange(start, start + 3, dtype=np.float64))
+    assert buffer.view().tolist() == list(range(12)) and buffer.data.size >= 12
+    buffer.clear()
+    assert buffer.view().size == 0
+
+
+def test_appended_and_partial_lines(gps_lines, tmp_path):
+    log_file = str(tmp_path / "gps.txt")
+    follower = LogFollower(log_file, decode_gpgga)
+    # the capture has not started yet
+    assert follower.poll() == 0 and follower.columns() == ()
+    _append(log_file, b"".join(gps_lines[:30]))
+    rows = follower.poll()
+    assert rows == _fixes(gps_lines[:30])[0].size > 0
+    assert follower.poll() == 0
+    # a line written in two parts is decoded once its line feed arrives
+    gga = next(index for index in range(30, 60) if gps_lines[index].startswith(b"$GPGGA"))
+    _append(log_file, b"".join(gps_lines[30:gga]) + gps_lines[gga][:20])
+    appended = follower.poll()
+    _append(log_file, gps_lines[gga][20:])
+    assert follower.poll() == 1
+    assert rows + appended + 1 == follower.columns()[0].size
+    for column, expected in zip(follower.columns(), _fixes(gps_lines[:gga + 1])):
+        np.testing.assert_array_equal(column, expected)
+
+
+def test_truncated_log_starts_over(gps_lines, tmp_path):
+    log_file = str(tmp_path / "gps.txt")
+    _append(log_file, b"".join(gps_lines[:60]))
+    follower = LogFollower(log_file, decode_gpgga)
+    follower.poll()
+    with open(log_file, 'wb') as lf:
+        lf.write(b"".join(gps_lines[-30:]))
+    follower.poll()
+    for column, expected in zip(follower.columns(), _fixes(gps_lines[-30:])):
+        np.testing.assert_array_equal(column, expected)
+
+
+def test_rotated_log_at_least_as_large_starts_over(gps_lines, tmp_path):
+    log_file = str(tmp_path / "gps.txt")
+    _append(log_file, b"".join(gps_lines[:30]))
+    follower = LogFollower(log_file, decode_gpgga)
+    follower.poll()
+    # the capture moves on to a new file under the same name, already longer than the old one
+    os.replace(log_file, log_file + ".1")
+    _append(log_file, b"".join(gps_lines[-60:]))
+    follower.poll()
+    for column, expected in zip(follower.columns(), _fixes(gps_lines[-60:])):
+        np.testing.assert_array_equal(column, expected)
+
+
+def test_log_rewritten_in_place_starts_over(gps_lines, tmp_path):
+    log_file = str(tmp_path / "gps.txt")
+    _append(log_file, b"".join(gps_lines[:30]))
+    follower = LogFollower(log_file, decode_gpgga)
+    follower.poll()
+    # same file (inode), truncated and written past the old end between two polls
+    with open(log_file, 'r+b') as lf:
+        lf.truncate(0)
+        lf.write(b"".join(gps_lines[-60:]))
+    follower.poll()
+    for column, expected in zip(follower.columns(), _fixes(gps_lines[-60:])):
+        np.testing.assert_array_equal(column, expected)
+
+
+def test_follow_calls_back_on_new_rows(gps_lines, tmp_path):
+    log_file = str(tmp_path / "gps.txt")
+    _append(log_file, b"".join(gps_lines[:30]))
+    updates = []
+    rows = follow(LogFollower(log_file, decode_gpgga),
+                  lambda latitude, longitude: updates.append(latitude.size),
+                  interval=0.01, idle_timeout=0.05)
+    assert updates == [rows] and rows == _fixes(gps_lines[:30])[0].size
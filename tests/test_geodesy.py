@@ -0,0 +1,94 @@
+"""
+  **************************************************************************************************
+  * @brief   Geodesic track analytics against reference values and the reported speed / course.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from conftest import DATA_DIRECTORY
+from geodesy_utility import analyse_track, angle_difference, elapsed_seconds, haversine_distance
+from geodesy_utility import initial_bearing, summarize_track, vincenty_distance
+from gnss_utility import parse_track
+from synthetic_utility import generate_nmea
+
+GPS_LOG = os.path.join(DATA_DIRECTORY, "gps.txt")
+# Vincenty's own test line, Flinders Peak to Buninyong
+FLINDERS_PEAK = (-(37 + 57 / 60 + 3.72030 / 3600), 144 + 25 / 60 + 29.52440 / 3600)
+BUNINYONG = (-(37 + 39 / 60 + 10.15610 / 3600), 143 + 55 / 60 + 35.38390 / 3600)
+
+
+def test_reference_distances():
+    assert vincenty_distance(*FLINDERS_PEAK, *BUNINYONG) == pytest.approx(54972.271, abs=1e-3)
+    # the sphere is within 0.5 % of the ellipsoid
+    assert haversine_distance(*FLINDERS_PEAK, *BUNINYONG) == pytest.approx(54972.271, rel=5e-3)
+    # one degree of longitude on the equator, and a nearly antipodal pair
+    assert vincenty_distance(0, 0, 0, 1) == pytest.approx(111319.491, abs=1e-3)
+    assert np.isfinite(vincenty_distance(0, 0, 0.5, 179.7))
+    assert initial_bearing(*FLINDERS_PEAK, *BUNINYONG) == pytest.approx(306.868, abs=0.2)
+
+
+def test_vectorized_over_arrays():
+    latitude = np.array([0.0, 0.0, np.nan, 10.0])
+    longitude = np.array([0.0, 1.0, 1.0, 1.0])
+    distance = vincenty_distance(latitude[:-1], longitude[:-1], latitude[1:], longitude[1:])
+    assert distance.shape == (3,)
+    assert np.isnan(distance[1:]).all() and distance[0] > 0
+    assert initial_bearing([0, 0], [0, 0], [1, 0], [0, 1]).tolist() == [0.0, 90.0]
+    assert angle_difference([359.0, 1.0], [1.0, 359.0]).tolist() == [-2.0, 2.0]
+
+
+def test_elapsed_seconds_across_midnight():
+    assert elapsed_seconds(np.array([86398.0, 86399.0, 0.0, 1.0])).tolist() == [0, 1, 2, 3]
+    assert elapsed_seconds(np.empty(0)).size == 0
+
+
+def test_recorded_log_agrees_with_reported_speed_and_course():
+    track = parse_track(GPS_LOG)
+    analytics = analyse_track(track)
+    assert all(values.size == track["utc_time"].size for values in analytics.values())
+    assert np.isnan(analytics["ground_speed"][0]) and analytics["path_length"][0] == 0
+    summary = summarize_track(track, analytics)
+    assert summary["fixes"] == 4071
+    assert summary["path_length_m"] == pytest.approx(200.6e3, rel=1e-3)
+    assert summary["speed_error_median_mps"] < 0.2
+    assert summary["heading_error_median_degrees"] < 0.5
+
+
+def test_cross_check_uses_gpvtg():
+    track = parse_track(GPS_LOG)
+    analytics = analyse_track(track)
+    summary = summarize_track(track, analytics)
+    # GPRMC values are ignored where GPVTG reported (all epochs but the last one of the log)
+    has_vtg = ~np.isnan(track["vtg_course_true"])
+    rmc_off = dict(track, speed_knots=np.where(has_vtg, track["speed_knots"] * 10,
+                                               track["speed_knots"]),
+                   course_true=np.where(has_vtg, (track["course_true"] + 180) % 360,
+                                        track["course_true"]))
+    assert summarize_track(rmc_off, analytics) == summary
+    # and stand in where it did not
+    no_vtg = dict(track, vtg_speed_knots=np.full_like(track["vtg_speed_knots"], np.nan),
+                  vtg_course_true=np.full_like(track["vtg_course_true"], np.nan),
+                  speed_kmh=np.full_like(track["speed_kmh"], np.nan))
+    assert summarize_track(no_vtg, analytics)["heading_error_median_degrees"] < 0.5
+    assert summarize_track(dict(no_vtg, speed_knots=rmc_off["speed_knots"]),
+                           analytics)["speed_error_median_mps"] > 1
+
+
+def test_synthetic_track(tmp_path):
+    log_file = str(tmp_path / "track.txt")
+    generate_nmea(log_file, 2000, noise=0.0, seed=9)
+    track = parse_track(log_file)
+    haversine = analyse_track(track)
+    vincenty = analyse_track(track, "vincenty")
+    np.testing.assert_allclose(vincenty["path_length"], haversine["path_length"], rtol=5e-3)
+    # the climb rate is the altitude difference over the one second epochs
+    np.testing.assert_allclose(haversine["climb_rate"][1:], np.diff(track["altitude"]))
+    assert summarize_track(track)["speed_error_median_mps"] < 0.5
+    with pytest.raises(ValueError):
+        analyse_track(track, "flat")
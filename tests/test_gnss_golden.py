@@ -0,0 +1,124 @@
+"""
+  **************************************************************************************************
+  * @brief   GNSS parsers against the data/*expected* golden files and against each other.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from conftest import DATA_DIRECTORY
+from gnss_utility import decode_gpgga, decode_track, iter_gpgga_chunks, parse_all_vectorized
+from gnss_utility import parse_track
+
+GPS_LOG = os.path.join(DATA_DIRECTORY, "gps.txt")
+GPS_TEST_INPUT = os.path.join(DATA_DIRECTORY, "gps_test_input.txt")
+EXPECTED_GPS_TEST_OUTPUT = os.path.join(DATA_DIRECTORY, "expected_gps_test_output.txt")
+PROGRESSIVE_TEST_INPUT = os.path.join(DATA_DIRECTORY, "gps_test_input_progressive_solution.txt")
+EXPECTED_PROGRESSIVE_OUTPUT = os.path.join(DATA_DIRECTORY,
+                                           "expected_gps_test_output_progressive_solution.txt")
+
+
+def _expected_position():
+    with open(EXPECTED_GPS_TEST_OUTPUT) as ef:
+        latitude, longitude = (float(line) for line in ef.read().split())
+    return latitude, longitude
+
+
+def _flatten(nested):
+    return np.array(sum(nested, []))
+
+
+def test_parse_matches_golden_file(gnss_plots):
+    with open(GPS_TEST_INPUT) as tf:
+        fixes = [gnss_plots.parse(line, gnss_plots.DEFAULT_DELIMS) for line in tf]
+    fixes = [fix for fix in fixes if fix[0] == gnss_plots.GNSS__TRUE]
+    assert len(fixes) == 1
+    _, latitude, longitude = fixes[0]
+    assert (latitude[0], longitude[0]) == _expected_position()
+
+
+def test_parse_all_matches_golden_file(gnss_plots):
+    latitude, longitude = gnss_plots.parse_all(GPS_TEST_INPUT, gnss_plots.DEFAULT_DELIMS)
+    assert (_flatten(latitude).tolist(), _flatten(longitude).tolist()) == \
+        ([_expected_position()[0]], [_expected_position()[1]])
+
+
+def test_parse_raw_matches_progressive_golden_file(gnss_plots):
+    with open(PROGRESSIVE_TEST_INPUT) as tf:
+        extracted = [gnss_plots.parse_raw(line, gnss_plots.DEFAULT_DELIMS) for line in tf]
+    extracted = [fields for fields in extracted if fields != gnss_plots.GNSS__FALSE]
+    with open(EXPECTED_PROGRESSIVE_OUTPUT) as ef:
+        expected = ef.read().split()
+    assert sum(extracted, []) == expected
+
+
+def test_vectorized_matches_golden_file():
+    latitude, longitude = parse_all_vectorized(GPS_TEST_INPUT)
+    assert (latitude.tolist(), longitude.tolist()) == \
+        ([_expected_position()[0]], [_expected_position()[1]])
+
+
+def test_vectorized_is_bit_exact_with_parse_all(gnss_plots):
+    latitude, longitude = gnss_plots.parse_all(GPS_LOG, gnss_plots.DEFAULT_DELIMS)
+    lat_array, long_array = parse_all_vectorized(GPS_LOG)
+    assert lat_array.size == 4071
+    np.testing.assert_array_equal(lat_array, _flatten(latitude))
+    np.testing.assert_array_equal(long_array, _flatten(longitude))
+
+
+@pytest.mark.parametrize("batch_size, read_size", [(1, 4096), (100, 1000), (65536, 1 << 22)])
+def test_streaming_matches_vectorized(batch_size, read_size):
+    chunks = list(iter_gpgga_chunks(GPS_LOG, batch_size, read_size))
+    lat_array, long_array = parse_all_vectorized(GPS_LOG)
+    np.testing.assert_array_equal(np.concatenate([chunk[0] for chunk in chunks]), lat_array)
+    np.testing.assert_array_equal(np.concatenate([chunk[1] for chunk in chunks]), long_array)
+
+
+def test_checksums_of_recorded_log_are_valid():
+    stats = {}
+    parse_all_vectorized(GPS_LOG, stats=stats)
+    assert stats["rejected"] == 0
+
+
+def test_corrupt_sentence_is_rejected():
+    with open(GPS_TEST_INPUT, 'rb') as tf:
+        sentence = tf.readline()
+    corrupt = sentence.replace(b"3354.9990", b"3354.9991")
+    stats = {}
+    latitude, _ = decode_gpgga(sentence + corrupt, stats=stats)
+    assert latitude.size == 1 and stats["rejected"] == 1
+    latitude, _ = decode_gpgga(sentence + corrupt, drop_invalid=False)
+    assert latitude.size == 2
+
+
+def test_track_table_of_recorded_log():
+    track = parse_track(GPS_LOG)
+    assert track["utc_time"].size == 4071
+    first = {name: values[0] for name, values in track.items()}
+    assert first["utc_time"] == 1 * 3600 + 13 * 60 + 10.0
+    assert first["date"] == 220519
+    assert first["latitude"] == pytest.approx(-(33 + 54.9990 / 60))
+    assert first["longitude"] == pytest.approx(150 + 59.6067 / 60)
+    assert (first["altitude"], first["satellites"], first["hdop"]) == (13.99, 19, 0.6)
+    # GPRMC takes precedence over GPVTG for the columns both carry
+    assert (first["speed_knots"], first["speed_kmh"], first["course_true"]) == \
+        (0.068, 0.125, 227.3)
+    assert first["course_magnetic"] == 227.308
+    assert (first["vtg_speed_knots"], first["vtg_course_true"]) == (0.068, 227.308)
+
+
+def test_track_of_log_cut_off_mid_sentence():
+    # a followed or streamed log can end inside a sentence, here after an empty field
+    track = decode_track(b"$GPRMC,011311.00,", drop_invalid=False)
+    assert track["utc_time"].tolist() == [4391.0]
+    assert np.isnan(track["latitude"][0]) and np.isnan(track["rmc_valid"][0])
+    with open(GPS_LOG, 'rb') as lf:
+        head = lf.read(4096)
+    for end in range(head.rfind(b"\n$GPRMC"), len(head)):
+        track = decode_track(head[:end], drop_invalid=False)
+        assert track["utc_time"].size >= 1
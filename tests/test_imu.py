@@ -0,0 +1,102 @@
+"""
+  **************************************************************************************************
+  * @brief   NovAtel binary framing and CORRIMUDATAS decoding of synthetic frames.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import numpy as np
+
+from crc_utility import calculate_crc32
+from imu_utility import IMU_UTILITY__CORRIMUDATAS_DTYPE, IMU_UTILITY__CORRIMUDATAS_MESSAGE_ID
+from imu_utility import _crc32_frames, decode_corrimudatas, frame_messages
+
+SHORT_SYNC = (0xAA, 0x44, 0x13)
+# a float64 whose bytes hold a sync pattern, as payload
+SYNC_IN_PAYLOAD = np.frombuffer(b"\xaa\x44\x13\x00\x00\x00\xf0\x3f", dtype="<f8")[0]
+
+
+def _with_crc(message: bytes) -> bytes:
+    return message + calculate_crc32(message).to_bytes(4, "little")
+
+
+def _imu_frame(seconds, pitch_rate=0.0):
+    record = np.zeros(1, dtype=IMU_UTILITY__CORRIMUDATAS_DTYPE)
+    record["sync"] = SHORT_SYNC
+    record["message_length"] = 60
+    record["message_id"] = IMU_UTILITY__CORRIMUDATAS_MESSAGE_ID
+    record["header_week"] = record["week"] = 2058
+    record["header_milliseconds"] = int(seconds * 1000)
+    record["seconds"] = seconds
+    record["pitch_rate"] = pitch_rate
+    record["vertical_acc"] = 9.81
+    return _with_crc(record.tobytes()[:-4])
+
+
+def _long_header_frame(message_id, payload: bytes):
+    # 28 byte long header: sync, header length, message id, ..., message length at byte 8
+    header = bytearray(28)
+    header[:4] = bytes((0xAA, 0x44, 0x12, 28))
+    header[4:6] = message_id.to_bytes(2, "little")
+    header[8:10] = len(payload).to_bytes(2, "little")
+    return _with_crc(bytes(header) + payload)
+
+
+def test_back_to_back_records():
+    log = b"".join(_imu_frame(100.0 + i * 0.01) for i in range(50))
+    stats = {}
+    records = decode_corrimudatas(log, stats)
+    assert records.size == 50 and stats["rejected"] == 0
+    np.testing.assert_allclose(records["seconds"], 100.0 + np.arange(50) * 0.01)
+    assert np.all(records["vertical_acc"] == 9.81)
+    # back to back messages are decoded in place
+    assert np.shares_memory(records, np.frombuffer(log, dtype=np.uint8))
+
+
+def test_corrupted_crc_is_rejected():
+    frames = [bytearray(_imu_frame(100.0 + i)) for i in range(3)]
+    frames[1][30] ^= 0x01
+    stats = {}
+    records = decode_corrimudatas(b"".join(frames), stats)
+    assert records["seconds"].tolist() == [100.0, 102.0]
+    assert stats["rejected"] == 1
+
+
+def test_junk_between_frames_is_skipped():
+    junk = b"\x00\xaa\x44\x13\x40garbage\xaa\x44"
+    log = junk + _imu_frame(1.0) + junk + _imu_frame(2.0, SYNC_IN_PAYLOAD) + junk
+    stats = {}
+    records = decode_corrimudatas(log, stats)
+    assert records["seconds"].tolist() == [1.0, 2.0]
+    assert records["pitch_rate"][1] == SYNC_IN_PAYLOAD
+    # the sync patterns of the junk; the one in the payload is not a candidate message
+    assert stats["rejected"] == 3
+
+
+def test_truncated_trailing_frame():
+    log = _imu_frame(1.0) + _imu_frame(2.0) + _imu_frame(3.0)[:-10]
+    stats = {}
+    assert decode_corrimudatas(log, stats)["seconds"].tolist() == [1.0, 2.0]
+    assert stats["rejected"] == 1
+    assert decode_corrimudatas(_imu_frame(1.0)[:11]).size == 0
+
+
+def test_other_messages_are_framed_but_not_decoded():
+    other = _long_header_frame(42, bytes(range(100)))
+    log = other + _imu_frame(1.0) + other
+    starts, header_lengths, message_ids = frame_messages(log)
+    assert starts.tolist() == [0, len(other), len(other) + 76]
+    assert header_lengths.tolist() == [28, 12, 28]
+    assert message_ids.tolist() == [42, IMU_UTILITY__CORRIMUDATAS_MESSAGE_ID, 42]
+    assert decode_corrimudatas(log)["seconds"].tolist() == [1.0]
+
+
+def test_vectorised_crc_matches_calculate_crc32():
+    rng = np.random.default_rng(7)
+    buf = rng.integers(0, 256, 10000, dtype=np.uint8)
+    starts = rng.integers(0, 5000, 200)
+    lengths = rng.integers(0, 300, 200)
+    expected = [calculate_crc32(buf[start:start + length].tobytes())
+                for start, length in zip(starts, lengths)]
+    assert _crc32_frames(buf, starts, lengths).tolist() == expected
@@ -0,0 +1,87 @@
+"""
+  **************************************************************************************************
+  * @brief   Stage instrumentation of the decoders and plot functions.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+import instrument_utility
+from conftest import DATA_DIRECTORY
+from gnss_utility import parse_all_vectorized, parse_track
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_BUILD, stage
+
+GPS_LOG = os.path.join(DATA_DIRECTORY, "gps.txt")
+GPS_LOG_LINES = 12212
+
+
+@pytest.fixture
+def instrumentation():
+    yield instrument_utility.enable()
+    instrument_utility.disable()
+
+
+def test_disabled_by_default():
+    assert not instrument_utility.enabled()
+    assert instrument_utility.report() is None
+    with stage(INSTRUMENT_UTILITY__STAGE_BUILD) as build_stage:
+        build_stage.add(lines=1)
+
+
+def test_decoder_stages(instrumentation):
+    latitude, _ = parse_all_vectorized(GPS_LOG)
+    stages = instrument_utility.report()["stages"]
+    assert list(stages) == ["read", "parse", "convert"]
+    assert stages["read"]["bytes"] == os.path.getsize(GPS_LOG)
+    assert stages["parse"]["lines"] == GPS_LOG_LINES
+    assert stages["convert"]["lines"] == latitude.size
+    assert stages["parse"]["lines_per_second"] > 0
+    assert stages["read"]["lines_per_second"] is None
+
+
+def test_reference_parser_stages(instrumentation, gnss_plots):
+    latitude, _ = gnss_plots.parse_all(GPS_LOG, gnss_plots.DEFAULT_DELIMS)
+    stages = instrument_utility.report()["stages"]
+    assert list(stages) == ["read", "parse", "convert"]
+    assert stages["read"]["lines"] == stages["parse"]["lines"] == GPS_LOG_LINES
+    assert stages["convert"]["lines"] == len(latitude)
+    assert stages["parse"]["calls"] == stages["convert"]["calls"] == 1
+
+
+def test_track_stages(instrumentation):
+    parse_track(GPS_LOG)
+    stages = instrument_utility.report()["stages"]
+    # one parse and one convert block per sentence type, plus the line scan
+    assert stages["parse"]["calls"] == 4
+    assert stages["convert"]["calls"] == 3
+    assert stages["build"]["calls"] == 1
+
+
+def test_nested_stage_peak_memory(instrumentation):
+    with stage("outer"):
+        with stage("inner"):
+            block = np.ones(1_000_000)
+            del block
+        small = np.ones(1000)
+    stages = instrument_utility.report()["stages"]
+    assert stages["inner"]["peak_memory_bytes"] >= 8_000_000
+    # the outer stage includes the peak of the inner one
+    assert stages["outer"]["peak_memory_bytes"] >= stages["inner"]["peak_memory_bytes"]
+    assert small.size
+
+
+def test_plot_stages_and_json_report(instrumentation, gnss_plots, tmp_path):
+    latitude, longitude = parse_all_vectorized(GPS_LOG)
+    gnss_plots.data_plot(latitude, longitude, str(tmp_path / "flight_route.png"))
+    report_file = tmp_path / "profile.json"
+    instrument_utility.write_report(str(report_file))
+    report = json.loads(report_file.read_text())
+    assert {"render", "save"} <= set(report["stages"])
+    assert report["stages"]["render"]["lines"] == latitude.size
+    assert report["wall_seconds"] >= report["stages"]["save"]["wall_seconds"]
@@ -0,0 +1,67 @@
+"""
+  **************************************************************************************************
+  * @brief   Level-of-detail reduction: budgets, end points, order and surviving extremes.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+
+from lod_utility import lttb_indices, min_max_indices, point_budget
+
+SAMPLES = 100_000
+
+
+@pytest.fixture(scope="module")
+def signal():
+    y = np.random.default_rng(3).normal(size=SAMPLES)
+    # spikes far apart, every one in a bucket of its own
+    spikes = np.linspace(1000, SAMPLES - 1000, 20).astype(np.int64)
+    y[spikes[::2]] += 100
+    y[spikes[1::2]] -= 100
+    return y, spikes
+
+
+def _assert_reduction(indices, size):
+    assert indices.dtype.kind == "i"
+    assert indices[0] == 0 and indices[-1] == size - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+@pytest.mark.parametrize("budget", [4, 101, 1280, 5000])
+def test_min_max_keeps_the_extremes(signal, budget):
+    y, spikes = signal
+    indices = min_max_indices(y, budget)
+    _assert_reduction(indices, y.size)
+    assert budget - 3 <= indices.size <= budget
+    assert y.argmin() in indices and y.argmax() in indices
+    if budget >= 2 * spikes.size + 2:
+        assert np.isin(spikes, indices).all()
+
+
+@pytest.mark.parametrize("budget", [3, 100, 1280, 5000])
+def test_lttb_keeps_the_budget(signal, budget):
+    y, spikes = signal
+    x = np.cumsum(np.abs(y)) / 10
+    indices = lttb_indices(x, y, budget)
+    _assert_reduction(indices, y.size)
+    assert indices.size == budget
+    # a spike makes the largest triangle of its bucket
+    if budget >= 1000:
+        assert np.isin(spikes, indices).all()
+
+
+@pytest.mark.parametrize("reduce", [lambda y, budget: min_max_indices(y, budget),
+                                    lambda y, budget: lttb_indices(np.arange(y.size), y, budget)])
+def test_short_series_are_kept_whole(reduce):
+    y = np.arange(10.0)
+    assert reduce(y, 10).tolist() == list(range(10))
+    assert reduce(y, 2).tolist() == list(range(10))
+    assert reduce(y[:0], 100).size == 0
+
+
+def test_point_budget():
+    assert point_budget(Figure(figsize=(6.4, 4.8), dpi=100)) == 1280
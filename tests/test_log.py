@@ -0,0 +1,56 @@
+"""
+  **************************************************************************************************
+  * @brief   Shared byte-level helpers of the log decoders: line blocks and vectorised numbers.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import numpy as np
+import pytest
+
+from log_utility import line_blocks, parse_decimal, parse_integer
+
+
+def fields(*texts):
+    """
+    @brief: uint8 buffer of the texts separated by commas, and the [start, end) of each.
+    """
+    data = ",".join(texts).encode()
+    lengths = np.array([len(text) for text in texts])
+    starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+    return np.frombuffer(data, dtype=np.uint8), starts, starts + lengths
+
+
+@pytest.mark.parametrize("block_size", [1, 5, 7, 16, 1000])
+def test_line_blocks_cut_at_line_ends(block_size):
+    data = b"12\n3456\n\n7890123456789\n1"
+    buf = np.frombuffer(data, dtype=np.uint8)
+    blocks = list(line_blocks(buf, block_size))
+    assert b"".join(block.tobytes() for _, block in blocks) == data
+    for offset, block in blocks:
+        assert block.size and data[offset:offset + block.size] == block.tobytes()
+        # whole lines only, except the unterminated last one; long lines extend a block
+        assert block[-1] == ord("\n") or offset + block.size == len(data)
+        assert block.size <= block_size or ord("\n") not in block[:block_size]
+    assert list(line_blocks(np.empty(0, dtype=np.uint8), 4)) == []
+
+
+def test_parse_integer():
+    buf, starts, ends = fields("0", "8414014", "-12", "007", "1x2", "", "-", "12-", "1.0",
+                               " 5", "4294967296")
+    values = parse_integer(buf, starts, ends, int((ends - starts).max()))
+    assert values[:4].tolist() == [0, 8414014, -12, 7]
+    # corrupt fields are not read as plausible values
+    assert np.isnan(values[4:10]).all()
+    assert values[10] == 2 ** 32
+
+
+def test_parse_decimal():
+    texts = ("3354.9990", "-0.5", "12", ".25", "7.", "1.2.3", "1e3", "", "-", ".", "12:00")
+    buf, starts, ends = fields(*texts)
+    values = parse_decimal(buf, starts, ends, int((ends - starts).max()))
+    assert values[:5].tolist() == [float(text) for text in texts[:5]]
+    assert np.isnan(values[5:]).all()
+    # bytes beyond width are not read
+    assert parse_decimal(buf, starts[:1], ends[:1], 4).tolist() == [3354.0]
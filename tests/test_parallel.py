@@ -0,0 +1,93 @@
+"""
+  **************************************************************************************************
+  * @brief   Decoding byte ranges of one log in worker processes gives the serial results.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+import parallel_utility
+from conftest import DATA_DIRECTORY
+from gnss_utility import parse_all_vectorized, parse_track
+from log_utility import map_log_file
+from parallel_utility import PARALLEL_UTILITY__EPOCH_SEPARATORS, aligned_ranges
+from parallel_utility import parallel_parse_all, parallel_parse_ppg, parallel_parse_track
+from ppg_utility import parse_all_raw_mmap
+from synthetic_utility import generate_nmea, generate_ppg
+
+GPS_LOG = os.path.join(DATA_DIRECTORY, "gps.txt")
+GPS_TEST_INPUT = os.path.join(DATA_DIRECTORY, "gps_test_input.txt")
+SHARED_MEMORY_DIRECTORY = "/dev/shm"
+
+
+@pytest.fixture
+def small_ranges(monkeypatch):
+    # split even the small test logs into many ranges
+    monkeypatch.setattr(parallel_utility, "PARALLEL_UTILITY__MIN_RANGE_BYTES", 4096)
+
+
+def _segments():
+    if not os.path.isdir(SHARED_MEMORY_DIRECTORY):
+        return set()
+    return set(os.listdir(SHARED_MEMORY_DIRECTORY))
+
+
+@pytest.mark.parametrize("separators", [(b"\n",), PARALLEL_UTILITY__EPOCH_SEPARATORS])
+def test_ranges_start_at_separators(separators):
+    buf = map_log_file(GPS_LOG)
+    ranges = aligned_ranges(buf, 16, separators)
+    assert len(ranges) == 16
+    assert ranges[0][0] == 0 and ranges[-1][1] == buf.size
+    assert all(end == start for (_, end), (start, _) in zip(ranges[:-1], ranges[1:]))
+    data = buf.tobytes()
+    for start, _ in ranges[1:]:
+        assert any(data.startswith(separator, start - 1) for separator in separators)
+
+
+def test_parse_all_matches_golden_file(gnss_plots, small_ranges):
+    for log_file in (GPS_TEST_INPUT, GPS_LOG):
+        latitude, longitude = gnss_plots.parse_all(log_file, gnss_plots.DEFAULT_DELIMS)
+        lat_array, long_array = parallel_parse_all(log_file, workers=2)
+        assert lat_array.tolist() == np.ravel(latitude).tolist()
+        assert long_array.tolist() == np.ravel(longitude).tolist()
+
+
+def test_checksum_counters_are_added(tmp_path, small_ranges):
+    log_file = str(tmp_path / "corrupt.txt")
+    written = generate_nmea(log_file, 3000, corrupt=0.02, seed=6)
+    stats, expected_stats = {}, {}
+    latitude, _ = parallel_parse_all(log_file, workers=3, stats=stats)
+    expected_latitude, _ = parse_all_vectorized(log_file, stats=expected_stats)
+    np.testing.assert_array_equal(latitude, expected_latitude)
+    assert stats == expected_stats and stats["rejected"] > 0
+    assert written["corrupt"] > 0
+
+
+def test_track_epochs_split_between_ranges(small_ranges):
+    segments = _segments()
+    track = parallel_parse_track(GPS_LOG, workers=2)
+    expected = parse_track(GPS_LOG)
+    assert track.keys() == expected.keys()
+    for name, values in expected.items():
+        np.testing.assert_array_equal(track[name], values, err_msg=name)
+    # every segment was unlinked
+    assert _segments() == segments
+
+
+def test_ppg_samples(tmp_path, small_ranges):
+    log_file = str(tmp_path / "ppg.txt")
+    generate_ppg(log_file, 20000, line_format="log", seed=7)
+    ppg = parallel_parse_ppg(log_file, workers=2)
+    assert ppg.dtype == np.uint32
+    np.testing.assert_array_equal(ppg, parse_all_raw_mmap(log_file))
+
+
+def test_small_log_is_decoded_in_process(monkeypatch):
+    monkeypatch.setattr(parallel_utility.concurrent.futures, "ProcessPoolExecutor", None)
+    latitude, _ = parallel_parse_all(GPS_LOG)
+    np.testing.assert_array_equal(latitude, parse_all_vectorized(GPS_LOG)[0])
@@ -0,0 +1,79 @@
+"""
+  **************************************************************************************************
+  * @brief   Threaded loading of one PPG capture per channel into a samples x channels array.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from conftest import DATA_DIRECTORY, PPG_EXERCISE_DIRECTORY
+from ppg_utility import PPG_UTILITY__ALIGN_INDEX, PPG_UTILITY__ALIGN_TIMESTAMP
+from ppg_utility import channel_number, decode_ppg_timestamps, parse_all_raw_mmap
+from ppg_utility import parse_channels
+
+CH0_LOG = os.path.join(PPG_EXERCISE_DIRECTORY, "ppg-raw-data_ch0_6_12_2023_15-37-29.TXT")
+CH3_LOG = os.path.join(DATA_DIRECTORY, "ppg-raw-data_ch3_6_12_2023_16-57-13.TXT")
+PPG_FULL_LOG = os.path.join(PPG_EXERCISE_DIRECTORY, "only_ppg-raw-data_5_12_2023_18-37-18.TXT")
+
+
+def test_channel_number():
+    assert (channel_number(CH0_LOG), channel_number(CH3_LOG)) == (0, 3)
+    assert channel_number(PPG_FULL_LOG) is None
+
+
+@pytest.mark.parametrize("log_files", [[CH0_LOG, CH3_LOG], [CH3_LOG, CH0_LOG],
+                                       [CH3_LOG, CH0_LOG, CH3_LOG]])
+@pytest.mark.parametrize("workers", [None, 1])
+def test_columns_follow_the_file_order(log_files, workers):
+    channels = parse_channels(log_files, workers=workers)
+    expected = [parse_all_raw_mmap(log_file) for log_file in log_files]
+    samples = min(ppg.size for ppg in expected)
+    assert channels.shape == (samples, len(log_files))
+    assert channels.dtype == np.uint32
+    for column, ppg in zip(channels.T, expected):
+        np.testing.assert_array_equal(column, ppg[:samples])
+
+
+def test_single_channel_is_not_cut():
+    channels = parse_channels([CH3_LOG])
+    np.testing.assert_array_equal(channels[:, 0], parse_all_raw_mmap(CH3_LOG))
+    assert parse_channels([]).shape == (0, 0)
+
+
+def test_timestamp_alignment(tmp_path):
+    with open(PPG_FULL_LOG, 'rb') as lf:
+        lines = lf.read().splitlines(keepends=True)
+    # a second channel started 100 samples later and stopped 50 samples earlier
+    late_log = tmp_path / "ppg-raw-data_ch1_late.TXT"
+    late_log.write_bytes(b"".join(lines[100:-50]))
+    full = parse_all_raw_mmap(PPG_FULL_LOG)
+    timestamps = decode_ppg_timestamps(b"".join(lines))
+    late_timestamps = decode_ppg_timestamps(b"".join(lines[100:-50]))
+    # samples share timestamps, the span of the late channel can hold a few more of the first
+    in_span = (timestamps >= late_timestamps[0]) & (timestamps <= late_timestamps[-1])
+
+    channels = parse_channels([PPG_FULL_LOG, str(late_log)], PPG_UTILITY__ALIGN_TIMESTAMP)
+    samples = min(np.count_nonzero(in_span), late_timestamps.size)
+    assert channels.shape == (samples, 2)
+    np.testing.assert_array_equal(channels[:, 0], full[in_span][:samples])
+    np.testing.assert_array_equal(channels[:, 1], parse_all_raw_mmap(str(late_log))[:samples])
+    # by index, the channels are paired from their first samples
+    by_index = parse_channels([PPG_FULL_LOG, str(late_log)], PPG_UTILITY__ALIGN_INDEX)
+    np.testing.assert_array_equal(by_index[:, 0], full[:late_timestamps.size])
+
+
+def test_timestamp_alignment_of_plain_logs_falls_back_to_index():
+    np.testing.assert_array_equal(parse_channels([CH0_LOG, CH3_LOG], PPG_UTILITY__ALIGN_TIMESTAMP),
+                                  parse_channels([CH0_LOG, CH3_LOG]))
+
+
+def test_missing_file_and_unknown_alignment(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        parse_channels([CH3_LOG, str(tmp_path / "ppg-raw-data_ch9_missing.TXT")])
+    with pytest.raises(ValueError):
+        parse_channels([CH3_LOG], align="nearest")
@@ -0,0 +1,77 @@
+"""
+  **************************************************************************************************
+  * @brief   Block-wise PPG filtering, beat detection and heart rate on a synthetic pulse.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from ppg_dsp_utility import PPG_DSP_UTILITY__BASELINE_WINDOW_SECONDS, PPG_DSP_UTILITY__BLOCK_SIZE
+from ppg_dsp_utility import PPG_DSP_UTILITY__SAMPLE_RATE_HZ, process_ppg
+
+SECONDS = 60
+HEART_RATE_BPM = 72.0
+
+
+def pulse(seconds=SECONDS, heart_rate=HEART_RATE_BPM, noise=0.0, seed=0):
+    """
+    @brief: 24 bit adc values of a pulse at heart_rate on a slow baseline wander; the systolic
+    peaks are at the multiples of 60 / heart_rate seconds.
+    """
+    sample_rate = PPG_DSP_UTILITY__SAMPLE_RATE_HZ
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = (5e6 + 2000 * np.sin(2 * np.pi * 0.05 * t) +
+              500 * np.cos(2 * np.pi * heart_rate / 60 * t))
+    signal += np.random.default_rng(seed).normal(0, noise, t.size)
+    peaks = np.rint(np.arange(0, seconds * heart_rate / 60) * 60 / heart_rate *
+                    sample_rate).astype(np.int64)
+    return np.rint(signal).astype(np.uint32), peaks
+
+
+@pytest.mark.parametrize("heart_rate", [48.0, 72.0, 150.0])
+def test_beats_and_heart_rate(heart_rate):
+    ppg, peaks = pulse(heart_rate=heart_rate, noise=20.0)
+    beats, rate, _ = process_ppg(ppg)
+    # every beat is at a systolic peak, one beat per peak ...
+    nearest = peaks[np.abs(beats[:, None] - peaks[None, :]).argmin(axis=1)]
+    assert np.abs(beats - nearest).max() <= 1
+    assert np.unique(nearest).size == beats.size
+    # ... and only peaks within the filter delays of the start and end are missed
+    margin = 2 * PPG_DSP_UTILITY__SAMPLE_RATE_HZ
+    inner = peaks[(peaks > margin) & (peaks < ppg.size - margin)]
+    assert set(inner.tolist()) <= set(nearest.tolist())
+    assert np.isnan(rate[0])
+    assert np.nanmedian(rate) == pytest.approx(heart_rate, rel=0.03)
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 4096, PPG_DSP_UTILITY__BLOCK_SIZE])
+def test_block_size_does_not_change_results(block_size):
+    ppg, _ = pulse(noise=50.0, seed=1)
+    beats, rate, _ = process_ppg(ppg, block_size=None)
+    block_beats, block_rate, throughput = process_ppg(ppg, block_size=block_size)
+    np.testing.assert_array_equal(block_beats, beats)
+    np.testing.assert_array_equal(block_rate, rate)
+    assert set(throughput) == {"baseline", "bandpass", "beats", "heart_rate", "total"}
+
+
+def test_default_block_size_bounds_peak_memory():
+    ppg, _ = pulse(seconds=200_000 / PPG_DSP_UTILITY__SAMPLE_RATE_HZ)
+    width = round(PPG_DSP_UTILITY__BASELINE_WINDOW_SECONDS * PPG_DSP_UTILITY__SAMPLE_RATE_HZ)
+    tracemalloc.start()
+    try:
+        process_ppg(ppg)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # the rolling median of one block, not of the whole capture, plus the block copies
+    assert peak < 2 * PPG_DSP_UTILITY__BLOCK_SIZE * width * 8 < ppg.size * width * 8
+
+
+def test_empty_capture():
+    beats, rate, _ = process_ppg(np.empty(0, dtype=np.uint32))
+    assert beats.size == rate.size == 0
@@ -0,0 +1,70 @@
+"""
+  **************************************************************************************************
+  * @brief   PPG loader against the data/*expected* golden file and the exercise captures.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+
+import numpy as np
+
+from conftest import DATA_DIRECTORY, PPG_EXERCISE_DIRECTORY
+from ppg_utility import decode_ppg_raw, decode_ppg_timestamps, parse_all_raw_mmap
+
+PPG_TEST_INPUT = os.path.join(PPG_EXERCISE_DIRECTORY, "only_ppg-raw-data_test_input.TXT")
+EXPECTED_PPG_TEST_OUTPUT = os.path.join(DATA_DIRECTORY,
+                                        "expected_only_ppg-raw-data_test_output.TXT")
+# the same capture as the full algorithm log and as extracted values only
+PPG_FULL_LOG = os.path.join(PPG_EXERCISE_DIRECTORY, "only_ppg-raw-data_5_12_2023_18-37-18.TXT")
+PPG_VALUES_ONLY = os.path.join(PPG_EXERCISE_DIRECTORY,
+                               "only_ppg-raw-data_5_12_2023_18-37-18 -.TXT")
+
+
+def test_loader_matches_golden_file():
+    with open(EXPECTED_PPG_TEST_OUTPUT) as ef:
+        expected = [int(line) for line in ef.read().split()]
+    assert parse_all_raw_mmap(PPG_TEST_INPUT).tolist() == expected
+
+
+def test_full_log_and_values_only_agree():
+    full_log = parse_all_raw_mmap(PPG_FULL_LOG)
+    assert full_log.size == 2844
+    np.testing.assert_array_equal(full_log, parse_all_raw_mmap(PPG_VALUES_ONLY))
+
+
+def test_loader_matches_int_per_line():
+    log_file = os.path.join(DATA_DIRECTORY, "ppg-raw-data_ch3_6_12_2023_16-57-13.TXT")
+    with open(log_file) as lf:
+        expected = [int(line) for line in lf if line.strip()]
+    ppg = parse_all_raw_mmap(log_file)
+    assert ppg.dtype == np.uint32
+    assert ppg.tolist() == expected
+
+
+def test_line_formats():
+    buffer = b"8414014\r\n8397898,gain_adj_flg = 0\r\n\r\n5|x|[A]ppg_rawdata = 8406754,g = 0\n12"
+    assert decode_ppg_raw(buffer).tolist() == [8414014, 8397898, 8406754, 12]
+    assert decode_ppg_raw(b"").size == 0
+
+
+def test_corrupt_lines_are_skipped(caplog):
+    buffer = (b"8414014\n1x2\n-5\n4294967296\n8397898 \n\t12\r\n"
+              b"5|000d 00:00:01.304|[A]ppg_rawdata = 84O6754,g = 0\n"
+              b"6|000d 00:00:01.332|[A]ppg_rawdata = 8406754,g = 0\n")
+    assert decode_ppg_raw(buffer).tolist() == [8414014, 8397898, 12, 8406754]
+    assert "4 PPG lines" in caplog.text
+    # timestamps stay aligned with the samples that are kept
+    timestamps = decode_ppg_timestamps(buffer)
+    assert timestamps.size == 4 and timestamps[-1] == 1.332
+    assert np.isnan(timestamps[:3]).all()
+
+
+def test_timestamps_of_full_log():
+    with open(PPG_FULL_LOG, 'rb') as lf:
+        timestamps = decode_ppg_timestamps(lf.read())
+    assert timestamps.size == 2844
+    assert (timestamps[0], timestamps[-1]) == (1.304, 79.368)
+    assert np.all(np.diff(timestamps) >= 0)
+    assert np.isnan(decode_ppg_timestamps(b"8414014\n")).all()
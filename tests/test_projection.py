@@ -0,0 +1,74 @@
+"""
+  **************************************************************************************************
+  * @brief   Web Mercator and UTM projections against reference coordinates (PROJ), and the
+  *          plot axes of the flight route.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from conftest import DATA_DIRECTORY
+from geodesy_utility import vincenty_distance
+from gnss_utility import parse_all_vectorized
+from projection_utility import inverse_web_mercator, project, utm, utm_zone, web_mercator
+
+GPS_LOG = os.path.join(DATA_DIRECTORY, "gps.txt")
+
+
+@pytest.mark.parametrize("latitude, longitude, zone, easting, northing", [
+    (40.0, -74.0, 18, 585360.4618427712, 4428236.064633089),
+    (-33.8568, 151.2153, 56, 334900.56965226424, 6252288.752888294),
+    # 2.9 degrees east of the central meridian, in the neighbouring zone
+    (-33.8568, 155.9, 56, 768301.0508174407, 6249936.807472125),
+    (0.0, 3.0, 31, 500000.0, 0.0),
+])
+def test_utm_reference_points(latitude, longitude, zone, easting, northing):
+    projected_easting, projected_northing, _, _ = utm(latitude, longitude, zone=zone)
+    assert projected_easting == pytest.approx(easting, abs=1e-6)
+    assert projected_northing == pytest.approx(northing, abs=1e-6)
+
+
+def test_utm_zone_of_the_first_fix():
+    latitude, longitude = parse_all_vectorized(GPS_LOG)
+    easting, northing, zone, south = utm(latitude, longitude)
+    assert (zone, south) == (int(utm_zone(longitude[0])), True) == (56, True)
+    # grid distances are geodesic distances times the scale of the projection (~1)
+    grid = np.hypot(np.diff(easting), np.diff(northing))
+    geodesic = vincenty_distance(latitude[:-1], longitude[:-1], latitude[1:], longitude[1:])
+    moving = geodesic > 10
+    np.testing.assert_allclose(grid[moving], geodesic[moving], rtol=2e-3)
+    assert np.isnan(utm(np.array([np.nan, -33.0]), np.array([np.nan, 151.0]))[0][0])
+
+
+def test_web_mercator():
+    x, y = web_mercator(-33.8688, 151.2093)
+    assert (x, y) == (pytest.approx(16832542.27920734, abs=1e-6),
+                      pytest.approx(-4011198.647307572, abs=1e-6))
+    latitude = np.array([-85.0, -33.8688, 0.0, 60.0])
+    longitude = np.array([-179.0, 151.2093, 0.0, 10.0])
+    np.testing.assert_allclose(inverse_web_mercator(*web_mercator(latitude, longitude)),
+                               (latitude, longitude), atol=1e-9)
+
+
+def test_route_axes_follow_the_spec():
+    # x-axis = longitude, y-axis = latitude
+    x, y, xlabel, ylabel = project(np.array([-31.0]), np.array([150.0]))
+    assert (x[0], y[0], xlabel, ylabel) == (150.0, -31.0, 'longitude (degree)',
+                                            'latitude (degree)')
+    assert project(np.array([-31.0]), np.array([150.0]), "utm")[2] == 'UTM 56S easting (m)'
+    with pytest.raises(ValueError):
+        project(np.array([0.0]), np.array([0.0]), "plate carree")
+
+
+@pytest.mark.parametrize("projection", ["degrees", "mercator", "utm"])
+def test_data_plot_projections(gnss_plots, tmp_path, projection):
+    latitude, longitude = parse_all_vectorized(GPS_LOG)
+    output_file = str(tmp_path / f"{projection}.png")
+    assert gnss_plots.data_plot(latitude, longitude, output_file, projection) == \
+        gnss_plots.GNSS__TRUE
+    assert os.path.getsize(output_file) > 0
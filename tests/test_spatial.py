@@ -0,0 +1,106 @@
+"""
+  **************************************************************************************************
+  * @brief   Grid index queries against a linear scan of the fixes.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from conftest import DATA_DIRECTORY
+from geodesy_utility import haversine_distance
+from gnss_utility import parse_track
+from spatial_utility import GridIndex, cached_grid_index, tile_bounds, tile_xy, time_ranges
+
+GPS_LOG = os.path.join(DATA_DIRECTORY, "gps.txt")
+FIXES = 200000
+
+
+@pytest.fixture(scope="module")
+def scattered():
+    rng = np.random.default_rng(10)
+    latitude = rng.uniform(-85, 85, FIXES)
+    longitude = rng.uniform(-180, 180, FIXES)
+    latitude[::1000] = np.nan
+    return latitude, longitude, GridIndex.build(latitude, longitude, zoom=8)
+
+
+def test_tile_math():
+    # Sydney at zoom 10, and the tile edges around it
+    assert tile_xy(-33.8688, 151.2093, 10) == (942, 614)
+    latitude_min, latitude_max, longitude_min, longitude_max = tile_bounds(942, 614, 10)
+    assert latitude_min < -33.8688 < latitude_max
+    assert longitude_min < 151.2093 < longitude_max
+    assert tile_xy(90.0, 180.0, 2) == (3, 0) and tile_xy(-90.0, -180.0, 2) == (0, 3)
+
+
+@pytest.mark.parametrize("box", [(-10, 10, 20, 40), (50, 51, 170, -170), (-90, 90, -180, 180),
+                                 (0, 0.001, 0, 0.001)])
+def test_bbox(scattered, box):
+    latitude, longitude, index = scattered
+    latitude_min, latitude_max, longitude_min, longitude_max = box
+    with np.errstate(invalid="ignore"):
+        in_longitude = ((longitude >= longitude_min) | (longitude <= longitude_max)) \
+            if longitude_min > longitude_max \
+            else ((longitude >= longitude_min) & (longitude <= longitude_max))
+        expected = np.flatnonzero((latitude >= latitude_min) & (latitude <= latitude_max) &
+                                  in_longitude)
+    np.testing.assert_array_equal(index.bbox(*box), expected)
+
+
+@pytest.mark.parametrize("center, radius_m", [((0, 179.9), 300e3), ((84.0, 10.0), 500e3),
+                                              ((-33.9, 151.0), 2e6)])
+def test_radius(scattered, center, radius_m):
+    latitude, longitude, index = scattered
+    with np.errstate(invalid="ignore"):
+        expected = np.flatnonzero(haversine_distance(*center, latitude, longitude) <= radius_m)
+    assert expected.size > 0
+    np.testing.assert_array_equal(index.radius(*center, radius_m), expected)
+
+
+@pytest.mark.parametrize("zoom", [2, 8, 12])
+def test_tile_membership_and_coverage(scattered, zoom):
+    latitude, longitude, index = scattered
+    located = ~np.isnan(latitude)
+    x, y = tile_xy(latitude[located], longitude[located], zoom)
+    keys, counts = np.unique((x << zoom) | y, return_counts=True)
+    tile_x, tile_y, tile_count = index.coverage(zoom)
+    np.testing.assert_array_equal(tile_x, keys >> zoom)
+    np.testing.assert_array_equal(tile_y, keys & ((1 << zoom) - 1))
+    np.testing.assert_array_equal(tile_count, counts)
+    assert tile_count.sum() == index.size == np.count_nonzero(located)
+    fixes = index.tile(tile_x[0], tile_y[0], zoom)
+    assert fixes.size == tile_count[0]
+    np.testing.assert_array_equal(tile_xy(latitude[fixes], longitude[fixes], zoom),
+                                  (np.full(fixes.size, tile_x[0]), np.full(fixes.size, tile_y[0])))
+
+
+def test_passes_over_a_tile_of_the_recorded_log(tmp_path):
+    index = cached_grid_index(GPS_LOG, zoom=12, cache_dir=str(tmp_path))
+    track = parse_track(GPS_LOG)
+    np.testing.assert_array_equal(index.utc_time, track["utc_time"])
+    tile_x, tile_y, tile_count = index.coverage(12)
+    busiest = np.argmax(tile_count)
+    fixes = index.tile(tile_x[busiest], tile_y[busiest], 12)
+    passes = time_ranges(fixes, index.utc_time)
+    assert passes.shape[1] == 2 and passes.shape[0] >= 1
+    assert np.all(passes[:, 0] <= passes[:, 1])
+    # the second call is served from the cache, as memory-mapped arrays
+    cached = cached_grid_index(GPS_LOG, zoom=12, cache_dir=str(tmp_path))
+    assert isinstance(cached.order, np.memmap)
+    np.testing.assert_array_equal(cached.tile(tile_x[busiest], tile_y[busiest], 12), fixes)
+
+
+def test_time_ranges():
+    ranges = time_ranges(np.array([1, 2, 3, 7, 8, 20]), np.arange(30.0) * 10)
+    assert ranges.tolist() == [[10, 30], [70, 80], [200, 200]]
+    assert time_ranges(np.empty(0, dtype=np.int64), np.arange(3.0)).shape == (0, 2)
+
+
+def test_invalid_zoom():
+    with pytest.raises(ValueError):
+        GridIndex.build([0.0], [0.0], zoom=31)
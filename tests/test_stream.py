@@ -0,0 +1,110 @@
+"""
+  **************************************************************************************************
+  * @brief   Stream ingestion from the replay server over TCP and UDP against a full parse.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import asyncio
+import os
+import socket
+import time
+
+import numpy as np
+import pytest
+
+from conftest import DATA_DIRECTORY
+from gnss_utility import parse_track
+from stream_utility import ingest, replay_server, replay_udp
+
+GPS_LOG = os.path.join(DATA_DIRECTORY, "gps.txt")
+# small batches, so the log is ingested in many of them and epochs are split between batches
+BATCH_SIZE = 4096
+TIMEOUT_SECONDS = 30
+
+
+def assert_track_equal(track, expected):
+    assert track.keys() == expected.keys()
+    for name, values in expected.items():
+        np.testing.assert_array_equal(track[name], values, err_msg=name)
+
+
+async def _ingest_tcp(batch_size=BATCH_SIZE, **kwargs):
+    server = await replay_server(GPS_LOG, port=0, speed=0)
+    async with server:
+        host, port = server.sockets[0].getsockname()[:2]
+        return await asyncio.wait_for(ingest(f"tcp://{host}:{port}", batch_size=batch_size,
+                                             **kwargs), TIMEOUT_SECONDS)
+
+
+def test_ingest_tcp():
+    batches = []
+    track = asyncio.run(_ingest_tcp(on_batch=lambda columns: batches.append(len(columns))))
+    assert_track_equal(track, parse_track(GPS_LOG))
+    assert len(batches) > 1
+
+
+def _free_udp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+        udp.bind(("127.0.0.1", 0))
+        return udp.getsockname()[1]
+
+
+async def _ingest_udp(port, stats):
+    receiver = asyncio.create_task(ingest(f"udp://127.0.0.1:{port}", queue_size=100000,
+                                          batch_size=BATCH_SIZE, stats=stats,
+                                          idle_timeout=0.5))
+    # let the receiver bind its socket before the first datagram
+    await asyncio.sleep(0.1)
+    await replay_udp(GPS_LOG, port=port, speed=0)
+    return await asyncio.wait_for(receiver, TIMEOUT_SECONDS)
+
+
+def test_ingest_udp():
+    stats = {}
+    track = asyncio.run(_ingest_udp(_free_udp_port(), stats))
+    assert stats.get("dropped", 0) == 0
+    assert_track_equal(track, parse_track(GPS_LOG))
+
+
+def test_consumer_failure_stops_the_reader():
+    def on_batch(columns):
+        raise RuntimeError("plot failed")
+
+    # the reader would block on the full queue if the failure were not propagated
+    with pytest.raises(RuntimeError, match="plot failed"):
+        asyncio.run(_ingest_tcp(queue_size=2, on_batch=on_batch))
+
+
+def test_decoding_does_not_block_the_event_loop(monkeypatch):
+    import stream_utility
+    decode_track = stream_utility.decode_track
+
+    def slow_decode_track(*args):
+        time.sleep(0.2)
+        return decode_track(*args)
+
+    monkeypatch.setattr(stream_utility, "decode_track", slow_decode_track)
+
+    async def run():
+        gaps = []
+
+        async def tick():
+            while True:
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                gaps.append(time.perf_counter() - start)
+
+        ticker = asyncio.create_task(tick())
+        stats = {}
+        # a few large batches, each held up in the decoder
+        track = await _ingest_tcp(batch_size=128 * 1024, stats=stats)
+        ticker.cancel()
+        return track, stats, gaps
+
+    track, stats, gaps = asyncio.run(run())
+    assert_track_equal(track, parse_track(GPS_LOG))
+    assert stats == {"rejected": 0}
+    # the loop kept running while each batch was decoded
+    assert len(gaps) > 20 and max(gaps) < 0.15
@@ -0,0 +1,96 @@
+"""
+  **************************************************************************************************
+  * @brief   Synthetic NMEA and PPG logs decode like recorded ones.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import numpy as np
+import pytest
+
+from gnss_utility import parse_all_vectorized, parse_track
+from ppg_dsp_utility import process_ppg
+from ppg_utility import decode_ppg_timestamps, parse_all_raw_mmap
+from synthetic_utility import generate_nmea, generate_ppg, parse_size
+
+EPOCHS = 600
+SAMPLES = 3600
+
+
+@pytest.fixture
+def edge_case_log(tmp_path):
+    log_file = str(tmp_path / "edge_cases.txt")
+    return log_file, generate_nmea(log_file, EPOCHS, edge_cases=True, seed=1)
+
+
+def test_nmea_sentences_pass_checksum(edge_case_log):
+    log_file, written = edge_case_log
+    stats = {}
+    track = parse_track(log_file, stats=stats)
+    assert stats["rejected"] == 0
+    assert track["utc_time"].size == written["epochs"] == EPOCHS
+    assert np.all(np.diff(track["utc_time"]) == 1.0)
+    assert not np.isnan(track["course_magnetic"]).any()
+
+
+def test_nmea_covers_hemispheres(edge_case_log):
+    track = parse_track(edge_case_log[0])
+    latitude, longitude = track["latitude"], track["longitude"]
+    assert (latitude < 0).any() and (latitude > 0).any()
+    assert (longitude < -100).any() and (longitude > 100).any()
+    assert (np.abs(longitude) < 1).any()
+    # legs start at the origins and stay in plausible driving distance of them
+    assert np.abs(np.diff(latitude)).max() < 90
+
+
+def test_vectorized_parser_matches_parse(gnss_plots, edge_case_log):
+    log_file = edge_case_log[0]
+    expected_latitude, expected_longitude = gnss_plots.parse_all(log_file,
+                                                                 gnss_plots.DEFAULT_DELIMS)
+    latitude, longitude = parse_all_vectorized(log_file)
+    assert latitude.tolist() == np.ravel(expected_latitude).tolist()
+    assert longitude.tolist() == np.ravel(expected_longitude).tolist()
+
+
+def test_corrupt_sentences_are_rejected(tmp_path):
+    log_file = str(tmp_path / "corrupt.txt")
+    written = generate_nmea(log_file, EPOCHS, corrupt=0.05, seed=2)
+    stats = {}
+    parse_track(log_file, stats=stats)
+    assert written["corrupt"] > 0
+    assert stats["rejected"] == written["corrupt"]
+
+
+def test_size_and_seed(tmp_path):
+    first, second = str(tmp_path / "first.txt"), str(tmp_path / "second.txt")
+    written = generate_nmea(first, size="64K", seed=3)
+    generate_nmea(second, size=64 * 1024, seed=3)
+    with open(first, 'rb') as ff, open(second, 'rb') as sf:
+        data = ff.read()
+        assert data == sf.read()
+    assert written["bytes"] == len(data) >= parse_size("64K")
+
+
+@pytest.mark.parametrize("line_format", ["values", "log"])
+def test_ppg_trace(tmp_path, line_format):
+    log_file = str(tmp_path / "ppg.txt")
+    written = generate_ppg(log_file, SAMPLES, line_format=line_format, seed=4)
+    ppg = parse_all_raw_mmap(log_file)
+    assert ppg.size == written["samples"] == SAMPLES
+    # beat to beat rates are quantised to whole samples at 36 Hz
+    _, heart_rate, _ = process_ppg(ppg)
+    assert np.nanmedian(heart_rate) == pytest.approx(72, abs=5)
+
+
+def test_ppg_log_lines_match_values(tmp_path):
+    values_file, log_file = str(tmp_path / "values.txt"), str(tmp_path / "log.txt")
+    generate_ppg(values_file, SAMPLES, seed=5)
+    written = generate_ppg(log_file, SAMPLES, line_format="log", seed=5)
+    assert np.array_equal(parse_all_raw_mmap(values_file), parse_all_raw_mmap(log_file))
+    with open(log_file, 'rb') as lf:
+        data = lf.read()
+    assert len(data) == written["bytes"]
+    seconds = decode_ppg_timestamps(data)
+    assert seconds[-1] == pytest.approx((SAMPLES - 1) / 36, abs=1e-3)
+    assert np.all(np.diff(seconds) > 0)
@@ -0,0 +1,82 @@
+"""
+  **************************************************************************************************
+  * @brief   XYZ coverage tiles of a flight route.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+
+import numpy as np
+import pytest
+from matplotlib.image import imread
+
+from conftest import DATA_DIRECTORY
+from gnss_utility import parse_all_vectorized
+from spatial_utility import tile_xy
+from tile_utility import densify, parse_zooms, render_tiles, route_pixels, tile_file
+from tile_utility import touched_tiles, world_pixels
+
+GPS_LOG = os.path.join(DATA_DIRECTORY, "gps.txt")
+
+
+def test_parse_zooms():
+    assert parse_zooms("12") == [12]
+    assert parse_zooms("8-10") == [8, 9, 10]
+    with pytest.raises(ValueError):
+        parse_zooms("10-8")
+    with pytest.raises(ValueError):
+        parse_zooms("30")
+
+
+def test_world_pixels_match_tile_numbers():
+    latitude, longitude = parse_all_vectorized(GPS_LOG)
+    px, py = world_pixels(latitude, longitude, 14)
+    x, y = tile_xy(latitude, longitude, 14)
+    np.testing.assert_array_equal(np.floor(px / 256).astype(np.int64), x)
+    np.testing.assert_array_equal(np.floor(py / 256).astype(np.int64), y)
+
+
+def test_densify_fills_segments():
+    px, py = densify(np.array([0.0, 10.0, np.nan, 20.0]), np.array([0.0, 0.0, 5.0, 5.0]),
+                     world=256)
+    assert np.all(np.diff(px[:21]) == 0.5) and px[20] == 10.0
+    # no line to or from a fix without a position
+    assert px.size == 22 and px[-1] == 20.0
+    # the jump across the antimeridian is not filled in
+    px, _ = densify(np.array([1.0, 255.0]), np.array([0.0, 0.0]), world=256)
+    assert px.tolist() == [1.0, 255.0]
+
+
+@pytest.mark.parametrize("zoom", [6, 12, 16])
+def test_touched_tiles_cover_every_fix(zoom):
+    latitude, longitude = parse_all_vectorized(GPS_LOG)
+    x, y = touched_tiles(latitude, longitude, zoom)
+    fix_x, fix_y = tile_xy(latitude, longitude, zoom)
+    touched = set(zip(x.tolist(), y.tolist()))
+    assert set(zip(fix_x.tolist(), fix_y.tolist())) <= touched
+    # only tiles within the bounding box of the route
+    assert len(touched) <= (np.ptp(fix_x) + 1) * (np.ptp(fix_y) + 1)
+
+
+def test_render_tiles(tmp_path):
+    latitude, longitude = parse_all_vectorized(GPS_LOG)
+    output_dir = str(tmp_path / "tiles")
+    written = render_tiles(latitude, longitude, output_dir, [9, 12], workers=2)
+    for zoom in (9, 12):
+        x, y = touched_tiles(latitude, longitude, zoom)
+        assert written[zoom] == x.size
+        files = {os.path.relpath(os.path.join(directory, name), output_dir)
+                 for directory, _, names in os.walk(os.path.join(output_dir, str(zoom)))
+                 for name in names}
+        assert files == {os.path.relpath(tile_file(output_dir, zoom, tx, ty), output_dir)
+                         for tx, ty in zip(x.tolist(), y.tolist())}
+    # the pixels of a tile image are those of the route in that tile
+    ix, iy = route_pixels(latitude, longitude, 12)
+    x, y = int(ix[0] // 256), int(iy[0] // 256)
+    image = imread(tile_file(output_dir, 12, x, y))
+    assert image.shape == (256, 256, 4)
+    in_tile = (ix // 256 == x) & (iy // 256 == y)
+    assert np.count_nonzero(image[..., 3]) == np.count_nonzero(in_tile)
+    assert image[iy[0] % 256, ix[0] % 256, 3] == 1.0
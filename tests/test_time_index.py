@@ -0,0 +1,89 @@
+"""
+  **************************************************************************************************
+  * @brief   Time windows read through the byte-offset index match a full parse.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from conftest import DATA_DIRECTORY
+from gnss_utility import parse_all_vectorized, parse_track
+from synthetic_utility import generate_nmea
+from time_index_utility import build_index, index_path, load_index, open_index, parse_utc
+from time_index_utility import query_fixes, query_track, read_window
+
+GPS_LOG = os.path.join(DATA_DIRECTORY, "gps.txt")
+# first epoch of gps.txt, 01:13:10 UTC
+FIRST_EPOCH = 4390.0
+
+
+@pytest.fixture
+def gps_log(tmp_path):
+    # the sidecar is written next to the log, so work on a copy
+    log_file = str(tmp_path / "gps.txt")
+    shutil.copyfile(GPS_LOG, log_file)
+    return log_file
+
+
+def test_window_matches_full_parse(gps_log):
+    track = parse_track(gps_log)
+    t0, t1 = parse_utc("01:20:00"), parse_utc("01:25:00")
+    window = query_track(gps_log, t0, t1)
+    inside = (track["utc_time"] >= t0) & (track["utc_time"] <= t1)
+    assert window["utc_time"].size == np.count_nonzero(inside) == 301
+    for name, values in window.items():
+        np.testing.assert_array_equal(values, track[name][inside], err_msg=name)
+    latitude, _ = query_fixes(gps_log, t0, t1)
+    # gps.txt has one GPGGA fix per epoch
+    np.testing.assert_array_equal(latitude, parse_all_vectorized(gps_log)[0][inside])
+    assert read_window(gps_log, t0, t1).startswith(b"$GPGGA,012000.00,")
+
+
+def test_window_bounds(gps_log):
+    index = open_index(gps_log)
+    assert index.times[0] == FIRST_EPOCH and index.times.size == 4071
+    assert read_window(gps_log, 0, FIRST_EPOCH - 1, index) == b""
+    assert read_window(gps_log, index.times[-1] + 1, index.times[-1] + 60, index) == b""
+    with open(gps_log, 'rb') as lf:
+        assert read_window(gps_log, 0, 1e9, index) == lf.read()
+    # a single epoch is its GPGGA, GPRMC and GPVTG lines
+    assert read_window(gps_log, FIRST_EPOCH, FIRST_EPOCH, index).count(b"\n") == 3
+
+
+def test_sidecar_is_reused_and_rebuilt(gps_log):
+    assert load_index(gps_log) is None
+    index = open_index(gps_log)
+    assert os.path.isfile(index_path(gps_log))
+    np.testing.assert_array_equal(load_index(gps_log).offsets, index.offsets)
+    with open(gps_log, 'ab') as lf:
+        lf.write(b"$GPGGA,021000.00,3354.9990,S,15059.6067,E,2,19,0.6,13.99,M,22.0,M,,*7A\n")
+    # the log changed, the index is stale
+    assert load_index(gps_log) is None
+    assert open_index(gps_log).offsets.size == index.offsets.size + 1
+
+
+def test_blocks_and_midnight_rollover(tmp_path):
+    log_file = str(tmp_path / "midnight.txt")
+    generate_nmea(log_file, 600, start=np.datetime64("2024-01-01T23:55:00"), seed=8)
+    index = build_index(log_file, block_size=4096)
+    # epochs after midnight continue the day, every epoch is indexed once
+    assert index.times.size == 600
+    assert np.all(np.diff(index.times) == 1.0)
+    assert index.times[-1] == 86400 + 4 * 60 + 59
+    latitude, _ = query_fixes(log_file, 86400, 86400 + 59, index)
+    assert latitude.size == 60
+
+
+def test_parse_utc():
+    assert parse_utc("01:13:10") == FIRST_EPOCH
+    assert parse_utc("01:13:10.5") == FIRST_EPOCH + 0.5
+    assert parse_utc("01:13") == FIRST_EPOCH - 10
+    assert parse_utc("4390") == FIRST_EPOCH
+    with pytest.raises(ValueError):
+        parse_utc("1:2:3:4")
@@ -0,0 +1,203 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for rendering the coverage of a flight route as XYZ map tiles
+  *          (output_dir/z/x/y.png, 256 x 256, transparent where the route did not pass), so it
+  *          can be laid over any web map.
+  *
+  *          The route is projected to Web Mercator pixels of each zoom level in one vectorised
+  *          call, filled in along its segments every half pixel and widened by a square brush.
+  *          Only the tiles those pixels fall in are rendered, and the tiles of all zoom levels
+  *          are rasterised in batches by a pool of worker processes. The route is handed to
+  *          every worker once, when the worker starts.
+  *            python gnss-plots.py data/gps.txt --tiles tiles --tile-zooms 8-14
+  *
+  *          A segment jumping more than half way around the world is taken as crossing the
+  *          antimeridian and is not filled in.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import concurrent.futures
+import os
+
+import numpy as np
+
+from projection_utility import PROJECTION_UTILITY__MERCATOR_HALF_WORLD, web_mercator
+
+TILE_UTILITY__TILE_SIZE = 256
+TILE_UTILITY__ZOOMS = "10-14"
+TILE_UTILITY__ZOOM_SEPARATOR = "-"
+TILE_UTILITY__MAX_ZOOM = 24
+# route points are filled in at this spacing, so lines have no gaps
+TILE_UTILITY__STEP_PIXELS = 0.5
+TILE_UTILITY__LINE_WIDTH = 3
+# matplotlib's default line colour (C0), as in the flight route plot
+TILE_UTILITY__COLOR = (0x1f, 0x77, 0xb4)
+TILE_UTILITY__OPAQUE = 255
+TILE_UTILITY__TILES_PER_TASK = 64
+TILE_UTILITY__FILE_FORMAT = "png"
+
+# the route of a worker process, set once by _set_route()
+_route = None
+# pixels of the last zoom level a worker rasterised, reused by its next batch
+_route_pixels = {}
+
+
+def parse_zooms(text=None):
+    """
+    @brief: zoom levels of "Z" or "Z0-Z1".
+    @returns:
+        list of int zoom levels, ascending.
+    """
+    first, _, last = text.partition(TILE_UTILITY__ZOOM_SEPARATOR)
+    zooms = list(range(int(first), int(last or first) + 1))
+    if not zooms or zooms[0] < 0 or zooms[-1] > TILE_UTILITY__MAX_ZOOM:
+        raise ValueError(f"invalid zoom levels, 0..{TILE_UTILITY__MAX_ZOOM}: {text}")
+    return zooms
+
+
+def world_pixels(latitude=None, longitude=None, zoom=0, tile_size=TILE_UTILITY__TILE_SIZE):
+    """
+    @brief: Web Mercator pixel coordinates of fixes at a zoom level.
+    @returns:
+        px, py: float64 arrays, (0, 0) at the north-west corner of the world, which is
+        tile_size * 2**zoom pixels wide.
+    """
+    x, y = web_mercator(latitude, longitude)
+    scale = tile_size * (1 << zoom) / (2 * PROJECTION_UTILITY__MERCATOR_HALF_WORLD)
+    return ((x + PROJECTION_UTILITY__MERCATOR_HALF_WORLD) * scale,
+            (PROJECTION_UTILITY__MERCATOR_HALF_WORLD - y) * scale)
+
+
+def densify(px=None, py=None, world=None, step=TILE_UTILITY__STEP_PIXELS):
+    """
+    @brief: points along the route segments at most step pixels apart.
+    @param:
+        px, py: pixel coordinates of the fixes, NaN for fixes without a position.
+        world: width of the world in pixels; longer jumps are not filled in.
+        step: spacing of the points in pixels.
+    @returns:
+        px, py: float64 arrays of the points, fixes without a position left out.
+    """
+    if px.size == 0:
+        return px, py
+    dx, dy = np.diff(px), np.diff(py)
+    connected = np.isfinite(dx) & np.isfinite(dy) & (np.abs(dx) <= world / 2)
+    counts = np.where(connected, np.maximum(np.ceil(np.hypot(dx, dy) / step), 1), 1)
+    counts = counts.astype(np.int64)
+    segment = np.repeat(np.arange(counts.size), counts)
+    # position of every point along its segment, 0 <= fraction < 1
+    fraction = (np.arange(segment.size) - np.repeat(np.cumsum(counts) - counts, counts)) / \
+        counts[segment]
+    dx, dy = np.where(connected, dx, 0)[segment], np.where(connected, dy, 0)[segment]
+    x = np.append(px[segment] + dx * fraction, px[-1])
+    y = np.append(py[segment] + dy * fraction, py[-1])
+    located = ~np.isnan(x) & ~np.isnan(y)
+    return x[located], y[located]
+
+
+def route_pixels(latitude=None, longitude=None, zoom=0, tile_size=TILE_UTILITY__TILE_SIZE,
+                 line_width=TILE_UTILITY__LINE_WIDTH):
+    """
+    @brief: the pixels a route covers at a zoom level, with lines line_width pixels wide.
+    @returns:
+        ix, iy: int64 arrays of unique pixel coordinates, sorted by tile and pixel.
+    """
+    world = tile_size * (1 << zoom)
+    px, py = densify(*world_pixels(latitude, longitude, zoom, tile_size), world)
+    ix, iy = np.floor(px).astype(np.int64), np.floor(py).astype(np.int64)
+    # square brush around every point; it wraps around the antimeridian like the map
+    brush = np.arange(line_width) - (line_width - 1) // 2
+    ix = ((ix[:, None, None] + brush[None, :, None]) % world).ravel()
+    iy = np.clip(iy[:, None, None] + brush[None, None, :], 0, world - 1).ravel()
+    tile = (ix // tile_size) * (world // tile_size) + iy // tile_size
+    keys = np.unique((tile * tile_size + iy % tile_size) * tile_size + ix % tile_size)
+    tile, pixel = keys // (tile_size * tile_size), keys % (tile_size * tile_size)
+    tiles = world // tile_size
+    return ((tile // tiles) * tile_size + pixel % tile_size,
+            (tile % tiles) * tile_size + pixel // tile_size)
+
+
+def touched_tiles(latitude=None, longitude=None, zoom=0, tile_size=TILE_UTILITY__TILE_SIZE,
+                  line_width=TILE_UTILITY__LINE_WIDTH):
+    """
+    @brief: the XYZ tiles a route is drawn on at a zoom level.
+    @returns:
+        x, y: int64 arrays of the tiles, sorted by x then y.
+    """
+    ix, iy = route_pixels(latitude, longitude, zoom, tile_size, line_width)
+    tiles = np.unique((ix // tile_size) << zoom | iy // tile_size)
+    return tiles >> zoom, tiles & ((1 << zoom) - 1)
+
+
+def tile_file(output_dir=None, zoom=0, x=0, y=0):
+    return os.path.join(output_dir, str(zoom), str(x), f"{y}.{TILE_UTILITY__FILE_FORMAT}")
+
+
+def _set_route(latitude, longitude, tile_size, line_width):
+    global _route
+    _route = (latitude, longitude, tile_size, line_width)
+    _route_pixels.clear()
+
+
+def _render_tiles(output_dir, zoom, tiles):
+    """
+    @brief: worker: rasterise and write the given tiles (keys x << zoom | y) of a zoom level.
+    @returns:
+        number of tiles written.
+    """
+    from matplotlib.image import imsave
+    latitude, longitude, tile_size, line_width = _route
+    if zoom not in _route_pixels:
+        _route_pixels.clear()
+        _route_pixels[zoom] = route_pixels(latitude, longitude, zoom, tile_size, line_width)
+    ix, iy = _route_pixels[zoom]
+    key = (ix // tile_size) << zoom | iy // tile_size
+    # the pixels are sorted by tile, so every tile is one run of them
+    first = np.searchsorted(key, tiles, side="left")
+    last = np.searchsorted(key, tiles, side="right")
+    for tile, start, end in zip(tiles, first, last):
+        x, y = int(tile >> zoom), int(tile & ((1 << zoom) - 1))
+        image = np.zeros((tile_size, tile_size, 4), dtype=np.uint8)
+        image[..., :3] = TILE_UTILITY__COLOR
+        image[iy[start:end] % tile_size, ix[start:end] % tile_size, 3] = TILE_UTILITY__OPAQUE
+        output_file = tile_file(output_dir, zoom, x, y)
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        imsave(output_file, image, format=TILE_UTILITY__FILE_FORMAT)
+    return len(tiles)
+
+
+def render_tiles(latitude=None, longitude=None, output_dir=None, zooms=None, workers=None,
+                 tile_size=TILE_UTILITY__TILE_SIZE, line_width=TILE_UTILITY__LINE_WIDTH):
+    """
+    @brief: render the coverage of a route as XYZ tiles, only those the route touches.
+    @param:
+        latitude, longitude: float64 arrays of the fixes in signed degrees, in route order.
+        output_dir: directory of the tile tree output_dir/z/x/y.png, created if missing.
+        zooms: iterable of zoom levels, None for TILE_UTILITY__ZOOMS.
+        workers: number of worker processes, None for one per CPU core.
+        tile_size: tile width and height in pixels.
+        line_width: route line width in pixels.
+    @returns:
+        dict mapping every zoom level to the number of tiles written.
+    """
+    zooms = parse_zooms(TILE_UTILITY__ZOOMS) if zooms is None else list(zooms)
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    os.makedirs(output_dir, exist_ok=True)
+    written = {zoom: 0 for zoom in zooms}
+    tasks = []
+    for zoom in zooms:
+        x, y = touched_tiles(latitude, longitude, zoom, tile_size, line_width)
+        keys = x << zoom | y
+        tasks.extend((zoom, keys[start:start + TILE_UTILITY__TILES_PER_TASK])
+                     for start in range(0, keys.size, TILE_UTILITY__TILES_PER_TASK))
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_set_route,
+            initargs=(latitude, longitude, tile_size, line_width)) as pool:
+        futures = [(zoom, pool.submit(_render_tiles, output_dir, zoom, keys))
+                   for zoom, keys in tasks]
+        for zoom, future in futures:
+            written[zoom] += future.result()
+    return written
@@ -0,0 +1,203 @@
+"""
+  **************************************************************************************************
+  * @brief   This module is used for reading a time window of a GNSS log without parsing the
+  *          whole log.
+  *
+  *          build_index() scans the log once and records the UTC time and byte offset of the
+  *          first GPGGA / GPRMC sentence of every epoch. The index is stored as a sidecar file
+  *          next to the log (gps.txt -> gps.txt.tidx.npz) and rebuilt when the log changes.
+  *          A query finds the byte range of a [t0, t1] window with two binary searches, seeks
+  *          to it and decodes only those bytes:
+  *            latitude, longitude = query_fixes("gps.txt", parse_utc("01:20:00"),
+  *                                              parse_utc("01:25:00"))
+  *
+  *          Times are seconds of the UTC day. A log running past midnight continues at
+  *          86400 s and up, so the index stays sorted.
+  *
+  @verbatim
+  **************************************************************************************************
+"""
+
+import logging as log
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from gnss_utility import GNSS_UTILITY__SECONDS_PER_HOUR, GNSS_UTILITY__SECONDS_PER_MINUTE
+from gnss_utility import GNSS_UTILITY__SECONDS_PER_DAY, GNSS_UTILITY__ROLLOVER_SECONDS
+from gnss_utility import decode_epochs, decode_gpgga, decode_track
+from instrument_utility import INSTRUMENT_UTILITY__STAGE_READ, stage
+from log_utility import line_blocks, map_log_file
+
+TIME_INDEX_UTILITY__SUFFIX = ".tidx.npz"
+# the log is scanned in blocks of whole lines of about this size, bounding peak memory
+TIME_INDEX_UTILITY__BLOCK_SIZE = 16 * 1024 * 1024
+TIME_INDEX_UTILITY__TIME_SEPARATOR = ":"
+
+
+class TimeIndex:
+    """
+    @brief: UTC time and byte offset of the epochs of one log version.
+    """
+
+    def __init__(self, times, offsets, log_size, log_mtime_ns):
+        # non-decreasing search key, see build_index()
+        self.times = times
+        self.offsets = offsets
+        self.log_size = log_size
+        self.log_mtime_ns = log_mtime_ns
+
+    def matches(self, log_file) -> bool:
+        """
+        @brief: True while the log has the size and modification time the index was built of.
+        """
+        status = os.stat(log_file)
+        return status.st_size == self.log_size and status.st_mtime_ns == self.log_mtime_ns
+
+    def window(self, t0, t1):
+        """
+        @brief: [start, end) byte range of the epochs with t0 <= UTC time <= t1.
+        """
+        first = np.searchsorted(self.times, t0, side="left")
+        last = np.searchsorted(self.times, t1, side="right")
+        if first >= last:
+            return 0, 0
+        start = int(self.offsets[first])
+        end = int(self.offsets[last]) if last < self.offsets.size else self.log_size
+        return start, end
+
+
+def index_path(log_file=None) -> str:
+    return log_file + TIME_INDEX_UTILITY__SUFFIX
+
+
+def build_index(log_file=None, block_size=TIME_INDEX_UTILITY__BLOCK_SIZE, stats=None):
+    """
+    @brief: scan a GPS log and index the start of every UTC epoch.
+    @param:
+        log_file: Full path of the log file.
+        block_size: bytes decoded at a time.
+        stats: optional dict, stats["rejected"] is increased by the number of timed sentences
+               failing the checksum; those are not indexed.
+    @returns:
+        TimeIndex of the log.
+    """
+    status = os.stat(log_file)
+    offsets, times = [], []
+    for offset, block in line_blocks(map_log_file(log_file), block_size):
+        block_offsets, block_times = decode_epochs(block, stats=stats)
+        offsets.append(block_offsets + offset)
+        times.append(block_times)
+    offsets = np.concatenate(offsets) if offsets else np.empty(0, dtype=np.int64)
+    times = np.concatenate(times) if times else np.empty(0)
+    # an epoch whose sentences were split between two blocks is indexed once
+    new_epoch = np.ones(times.size, dtype=bool)
+    new_epoch[1:] = times[1:] != times[:-1]
+    offsets, times = offsets[new_epoch], times[new_epoch]
+    days = np.zeros(times.size)
+    days[1:] = np.cumsum(np.diff(times) < -GNSS_UTILITY__ROLLOVER_SECONDS)
+    # the running maximum keeps the search key sorted when a receiver repeats or reorders
+    # an epoch; the fixes themselves are always decoded from the log
+    times = np.maximum.accumulate(times + days * GNSS_UTILITY__SECONDS_PER_DAY)
+    return TimeIndex(times, offsets, status.st_size, status.st_mtime_ns)
+
+
+def save_index(index: TimeIndex, log_file=None):
+    """
+    @brief: write the index as the sidecar file of log_file, replacing it atomically.
+    """
+    directory = os.path.dirname(os.path.abspath(log_file))
+    handle, staging = tempfile.mkstemp(dir=directory, suffix=TIME_INDEX_UTILITY__SUFFIX)
+    try:
+        with os.fdopen(handle, 'wb') as sf:
+            np.savez(sf, times=index.times, offsets=index.offsets,
+                     log_size=index.log_size, log_mtime_ns=index.log_mtime_ns)
+        os.replace(staging, index_path(log_file))
+    except OSError:
+        if os.path.exists(staging):
+            os.remove(staging)
+        raise
+
+
+def load_index(log_file=None):
+    """
+    @brief: the sidecar index of log_file.
+    @returns:
+        TimeIndex, None if there is no readable index of the current log.
+    """
+    try:
+        with np.load(index_path(log_file)) as sidecar:
+            index = TimeIndex(sidecar["times"], sidecar["offsets"], int(sidecar["log_size"]),
+                              int(sidecar["log_mtime_ns"]))
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        return None
+    return index if index.matches(log_file) else None
+
+
+def open_index(log_file=None, rebuild=False):
+    """
+    @brief: load the sidecar index of log_file, building and saving it if it is missing or
+    out of date.
+    @returns:
+        TimeIndex of the log.
+    """
+    index = None if rebuild else load_index(log_file)
+    if index is None:
+        index = build_index(log_file)
+        try:
+            save_index(index, log_file)
+        except OSError as error:
+            # a read-only log directory only costs the scan on the next query
+            log.warning(f"could not save the time index of {log_file}: {error}")
+    return index
+
+
+def read_window(log_file=None, t0=None, t1=None, index=None) -> bytes:
+    """
+    @brief: the log lines of the epochs with t0 <= UTC time <= t1, read with one seek.
+    @param:
+        log_file: Full path of the log file.
+        t0, t1: window in seconds of the UTC day, see the module description.
+        index: TimeIndex of the log, None for open_index().
+    """
+    index = index or open_index(log_file)
+    start, end = index.window(t0, t1)
+    with stage(INSTRUMENT_UTILITY__STAGE_READ) as read_stage, open(log_file, 'rb') as lf:
+        lf.seek(start)
+        window = lf.read(end - start)
+        read_stage.add(nbytes=len(window))
+    return window
+
+
+def query_fixes(log_file=None, t0=None, t1=None, index=None, drop_invalid=True, stats=None):
+    """
+    @brief: GPGGA fixes of a time window, see read_window() and gnss_utility.decode_gpgga().
+    @returns:
+        latitude, longitude: float64 arrays in signed degrees.
+    """
+    return decode_gpgga(read_window(log_file, t0, t1, index), drop_invalid, stats)
+
+
+def query_track(log_file=None, t0=None, t1=None, index=None, drop_invalid=True, stats=None):
+    """
+    @brief: track table of a time window, see read_window() and gnss_utility.decode_track().
+    @returns:
+        dict of float64 column arrays.
+    """
+    return decode_track(read_window(log_file, t0, t1, index), drop_invalid, stats)
+
+
+def parse_utc(text=None) -> float:
+    """
+    @brief: seconds of the UTC day of "HH:MM[:SS.ss]", or of a plain number of seconds.
+    """
+    fields = text.split(TIME_INDEX_UTILITY__TIME_SEPARATOR)
+    if len(fields) == 1:
+        return float(text)
+    if len(fields) > 3:
+        raise ValueError(f"invalid UTC time: {text}")
+    hours, minutes, seconds = (fields + ["0"])[:3]
+    return (int(hours) * GNSS_UTILITY__SECONDS_PER_HOUR +
+            int(minutes) * GNSS_UTILITY__SECONDS_PER_MINUTE + float(seconds))